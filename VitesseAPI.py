@@ -1,22 +1,39 @@
 # API Compatible with binary version 26.1.2 and below
 from __future__ import annotations
 from types import FunctionType
-from .utils import float16_to_decimal, float24_to_decimal, int_temp, ext_temp, dec_enc, dec_enc_float, empty, decode_version_new
+from .utils import int_temp, ext_temp, int_temp_array, ext_temp_array, decode_peripherals, decode_echo_signal, DECODE_BLOCK_SAMPLES, channel_signs, check_output_dtype, dec_enc, dec_enc_float, empty, decode_version_new, load_simulator_ascans, frame_markers_valid
 from . import sonoboticsFTDI as sbftdi
+from .streaming import VitesseStream, BACKPRESSURE_BLOCK
+from .vitesseProfile import VitesseProfile
+from .layout import FrameLayout
+from .enumeration import deviceEnumerator, vitesse_entry
+from .transport import TransportProfile, TRANSPORT_PROFILES, CALIBRATION_TRANSFER_SIZES, CALIBRATION_LATENCY_TIMERS, CALIBRATION_CHUNK_SIZES, CALIBRATION_READ_DELAYS, calibrateTransport, loadTransportProfile, saveTransportProfile
+from .timing import FrameTiming, TimingStats, PHASE_TRIGGER, PHASE_WAIT, PHASE_READY, PHASE_TRANSFER, PHASE_PERIPHERALS, PHASE_DECODE
 import time
 import numpy as np
+import numpy.typing as npt
 import sys
+import threading
 if sys.version_info >= (3, 11):
     from typing import Self, Optional, Union
 else:
     from typing_extensions import Self, Optional, Union
 from contextlib import contextmanager
-from pathlib import Path
+from typing import Any, Callable, Iterator, TypeVar
 
 # Global constants factored out for simplicity
 # Do not ever change them in runtime, these are constants!
 DEFAULT_ADC_FREQ = int(50e6)
 VALID_TARGET_CLOCK = [int(50e6), int(25e6)]
+COMMAND_BYTES = 5
+READY_BYTE = 100  # Sent by the device once a triggered frame is ready, followed by the frame
+IDLE_BYTE = 200   # Clocked out by an idle device, e.g. once the last byte of a frame is sent
+FRAME_TAIL_BYTES = 3  # Read after each checked frame, and expected to be idle, see _frameAligned
+# Weight of each new measurement in the estimate of the device latency, see _waitForFrame
+READY_LATENCY_GAIN = 0.25
+MAX_SPI_WRITE_BYTES = 255  # spiWrite takes the length as a uint8
+
+T = TypeVar("T")
 
 
 @contextmanager
@@ -29,6 +46,18 @@ def initialiseVitesse(serialNumber: Optional[str] = None, simulation: bool = Fal
             V.closeDevice()
 
 
+class CommandBatch:
+    """
+    Commands queued by Vitesse.batch(). Once sent, statuses[i] is the status byte the
+    device returned for commands[i] (50 on success).
+    """
+
+    def __init__(self):
+        self.pending: list[bytes] = []
+        self.commands: list[bytes] = []
+        self.statuses: list[int] = []
+
+
 class Vitesse:
     """
     Vitesse Python Wrapper
@@ -48,6 +77,9 @@ class Vitesse:
         self.numAverages: int = 1
         self.maxChannels: int = 0
         self.spiDevice: Optional[sbftdi.ftdiChannel] = None
+        self.serialNumber: Optional[str] = None
+        # USB transport settings last applied, see setTransportProfile
+        self.transportProfile: Optional[TransportProfile] = None
 
         # Dedicated to handling the receiving channels
         self.numChannelsOnReceive: int = 0  # Number of channels enabled
@@ -65,6 +97,22 @@ class Vitesse:
 
         self.recordPoints: int = 0
         self.MAX_READ_CHUNK = 64000
+        # Bytes read per poll for the ready byte; whatever follows it is kept as payload
+        self.READY_BLOCK_BYTES: int = 512
+        # Seconds a frame may take beyond numAverages / prf before the read times out
+        self.READY_TIMEOUT: float = 1.0
+        # Seconds the device may take to reach its idle pattern when drained, see _clearBuffer
+        self.CLEAR_TIMEOUT: float = 2.0
+        # Frames are checked to end where the layout says, the device idle right after them; a
+        # misaligned frame is drained and acquired again up to FRAME_RESYNC_ATTEMPTS times.
+        # FRAME_MARKER_CHECK also checks the channel and trailer markers, which catches dropped
+        # bytes too, but expects them to be FRAME_MARKER (100), which only the ready sentinel
+        # is confirmed to be, so enable it only for firmware known to send that
+        self.FRAME_CHECK: bool = True
+        self.FRAME_MARKER_CHECK: bool = False
+        self.FRAME_RESYNC_ATTEMPTS: int = 2
+        self.framesDesynced: int = 0   # Frames read misaligned
+        self.framesRecovered: int = 0  # Frames read aligned after a resync
         self.sensorArray: list[str] = ["Internal Temperature", "External Temperature",
                                        "Encoder 1", "Encoder 2", "Encoder Cart X", "Encoder Cart Y", "Encoder Cart Theta", "NA"]
         self.peripheralsOnArray: list[int] = [0, 0, 0, 0, 0, 0, 0, 0]
@@ -72,9 +120,44 @@ class Vitesse:
         self.bytesArray: list[int] = [2, 2, 4, 4, 4, 4, 4, 0]
         self.functionArray: list[FunctionType] = [int_temp, ext_temp, dec_enc, dec_enc,
                                                   dec_enc_float, dec_enc_float, dec_enc_float, empty]
+        # Vectorised decoding of the peripherals: record field, wire format, decoded format,
+        # converter (None to cast as is) and the attribute holding the latest reading
+        self.fieldArray: list[str] = ["internalTemp", "externalTemp", "encoder1", "encoder2",
+                                      "cartX", "cartY", "cartTheta", ""]
+        self.rawFormatArray: list[str] = [">u2", ">u2", ">u4", ">u4", ">f4", ">f4", ">f4", ""]
+        self.recordFormatArray: list[str] = ["f8", "f8", "u4", "u4", "f4", "f4", "f4", ""]
+        self.arrayFunctionArray: list[Optional[Callable[[np.ndarray], np.ndarray]]] = [
+            int_temp_array, ext_temp_array, None, None, None, None, None, None]
+        self.attributeArray: list[str] = ["internalTemp", "externalTemp", "encoder1", "e2",
+                                          "ex", "ey", "etheta", ""]
+        self.peripheralRawDtype: np.dtype = np.dtype({"names": [], "formats": [], "itemsize": 0})
+        self.peripheralDtype: np.dtype = np.dtype([])
+        self.peripheralRecord: Optional[np.ndarray] = None
+        self._peripheralConverters: list[Optional[Callable[[np.ndarray], np.ndarray]]] = []
+        self._peripheralAttributes: list[str] = []
+        self._emptyPeripherals: int = 0
         self.additionalBytes: int = 0
         self.totalDataBytes: int = 0
         self.totalBytes: int = 0
+        # Reused across getArray calls: ready sentinel followed by totalBytes of payload
+        self._frameBuffer: Optional[np.ndarray] = None
+        self._readyBuffer: Optional[np.ndarray] = None
+        self._tailBuffer = np.empty(FRAME_TAIL_BYTES, dtype=np.uint8)
+        # When the last frame was triggered, and how long frames take beyond numAverages / prf
+        self._triggeredAt: float = 0.0
+        self._readyLatency: float = 0.0
+        self._stream: Optional[VitesseStream] = None
+        self._batch: Optional[CommandBatch] = None
+        # Last acknowledged commands for each device register, see _writeRegister
+        self._shadow: dict[str, tuple[bytes, ...]] = {}
+        # Per-thread scratch buffers for decoding
+        self._scratch = threading.local()
+        # Acquisition timing, see enableTiming; frames are not timed while _timingStats is None
+        self._timingStats: Optional[TimingStats] = None
+        self._timingObservers: list[Callable[[FrameTiming], None]] = []
+        self._timedFrames: int = 0
+        # Noise generator of the simulation mode, see setSimulationSeed
+        self._simulationRng = np.random.default_rng()
         self.messageArray: list[int] = []
         self.clockArray: list[int] = []
         self.simulation: bool = False
@@ -125,10 +208,30 @@ class Vitesse:
 
         Raises:
             ValueError: The provided serial number does not belong to a Vitesse device.
-            IOError: No SPI device found, or none of the devices is a Vitesse device.
+            IOError: No SPI device found, none of the devices is a Vitesse device, or the device
+                     with the provided serial number cannot be opened (not connected or in use).
         """
+        self._connect(serialNumber, simulation)
+        if not self.simulation:
+            # Load default parameters
+            self.setConfig(clearEncoders=True)
+        return self
+
+    def _connect(self, serialNumber: Optional[str] = None, simulation: bool = False,
+                 devices: Optional[list[tuple[str, str, int]]] = None) -> Self:
+        """
+        Opens the device and reads its version and ADC frequency, without loading
+        the default configuration. See initialise.
 
+        Args:
+            devices (Optional[list[tuple[str, str, int]]]): The output of listDevices, if already
+                known. Devices opening concurrently must not list while another one is open.
+
+        Returns:
+            Self: Returns the instance for method chaining.
+        """
         self.simulation = simulation
+        self.invalidateShadow()
         if self.simulation:
             self.spiDevice = sbftdi.ftdiChannel()
             self.maxChannels = 8
@@ -138,30 +241,105 @@ class Vitesse:
             self.adcFrequency = DEFAULT_ADC_FREQ
             return self
 
-        devices = self.listDevices()
-        serialNumbers = [serialNumber for (serialNumber, _, _) in devices]
-        if len(devices) == 0:
-            raise IOError("No Vitesse device connected.")
-
-        if type(serialNumber) == str:
-            if serialNumber not in serialNumbers:
-                raise ValueError(
-                    "The serial number indicated does not belong to a Vitesse device.")
+        if devices is None and type(serialNumber) == str:
+            # Known serial number: open it directly rather than scanning every device
+            self.spiDevice, maxChannels = self._openBySerial(serialNumber)
+            self.serialNumber = serialNumber
+            self._handshake(maxChannels)
         else:
-            serialNumber = serialNumbers[0]
+            if devices is None:
+                devices = self.listDevices()
+            serialNumbers = [serialNumber for (serialNumber, _, _) in devices]
+            if len(devices) == 0:
+                raise IOError("No Vitesse device connected.")
+
+            if type(serialNumber) == str:
+                if serialNumber not in serialNumbers:
+                    raise ValueError(
+                        "The serial number indicated does not belong to a Vitesse device.")
+            else:
+                serialNumber = serialNumbers[0]
 
-        serialNumber = serialNumber + "B"
+            self.serialNumber = serialNumber
+            serialNumber = serialNumber + "B"
 
-        self.spiDevice = sbftdi.sonoboticsFtdiChannel(
-            "SPI", "serialNum", serialNumber.encode())
+            self.spiDevice = sbftdi.sonoboticsFtdiChannel(
+                "SPI", "serialNum", serialNumber.encode())
+            # Channel information of the chosen device from listDevices
+            self._handshake(devices[serialNumbers.index(self.serialNumber)][2])
 
-        # Clearing the buffer
-        initialarray = [0, 0, 0]
-        while initialarray[-1] != 200 or initialarray[-2] != 200 or initialarray[-3] != 200:
-            initialarray = np.frombuffer(
-                self.spiDevice.read(1000), dtype=np.uint8)
+        # Settings found by calibrateTransport on an earlier run
+        profile = loadTransportProfile(self.serialNumber)
+        if profile is not None:
+            self.setTransportProfile(profile)
+        return self
+
+    @staticmethod
+    def _openBySerial(serialNumber: str) -> tuple[sbftdi.sonoboticsFtdiChannel, int]:
+        """
+        Opens the SPI channel of a Vitesse device by serial number, without listing the
+        devices. The channel count comes from a fresh listing if there is one, else from
+        the EEPROM of the device.
+
+        Returns:
+            tuple[sbftdi.sonoboticsFtdiChannel, int]: The open channel and the number of channels of the device.
 
-        self.maxChannels = devices[0][2]  # Channel information for listDevices
+        Raises:
+            ValueError: The device that was opened is not a Vitesse device.
+            IOError: No FTDI device is connected, or the device cannot be opened, e.g. because
+                it is not connected or another process holds it. The driver status is included.
+        """
+        try:
+            spiDevice = sbftdi.sonoboticsFtdiChannel(
+                "SPI", "serialNum", (serialNumber + "B").encode())
+        except Exception as error:
+            if sbftdi.getNumDevices() == 0:
+                raise IOError("No Vitesse device connected.") from error
+            raise IOError(
+                f"Cannot open the Vitesse device {serialNumber}: {error}") from error
+
+        entry = deviceEnumerator.lookup(serialNumber)
+        if entry is None:
+            try:
+                entry = vitesse_entry(spiDevice.readEEPROM())
+            except Exception:
+                entry = None
+        if entry is None:
+            spiDevice.close()
+            raise ValueError(
+                "The serial number indicated does not belong to a Vitesse device.")
+        return spiDevice, entry[2]
+
+    def initialiseChannel(self, channel: sbftdi.ftdiChannel, maxChannels: int = 8) -> Self:
+        """
+        Initialises a Vitesse device reached through an already open channel, e.g. a
+        SessionRecorder around a real channel, or a ReplayFtdiChannel.
+
+        Args:
+            channel (sbftdi.ftdiChannel): The open channel to the device.
+            maxChannels (int): Number of channels of the device.
+
+        Returns:
+            Self: Returns the instance for method chaining.
+        """
+        self.simulation = False
+        self.invalidateShadow()
+        self.spiDevice = channel
+        self._handshake(maxChannels)
+        # Load default parameters
+        return self.setConfig(clearEncoders=True)
+
+    def _handshake(self, maxChannels: int) -> Self:
+        """
+        Brings a freshly opened channel to the idle state and reads the version and
+        ADC frequency of the device behind it.
+
+        Returns:
+            Self: Returns the instance for method chaining.
+        """
+        self._clearBuffer()
+
+        self.maxChannels = maxChannels
         self.setAdcThreshold()
 
         try:
@@ -178,45 +356,43 @@ class Vitesse:
             # Handle for legacy FPGA binaries
             self.adcFrequency = DEFAULT_ADC_FREQ
 
-        # Load default parameters
-        self.setConfig()
-
         return self
 
-    @staticmethod
-    def listDevices() -> list[tuple[str, str, int]]:
+    def _clearBuffer(self) -> None:
         """
-        Lists the actual Vitesse devices currently connected to the device. Virtual devices are not counted.
+        Reads from the device until it clocks out the idle pattern, discarding whatever it
+        still had to send.
 
-        Returns:
-            devices (list[(serialNumber: str, deviceName: str, numberOfChannels: int)]): list of tuples containing Vitesse device information.
+        Raises:
+            IOError: If the device is not idle after CLEAR_TIMEOUT seconds.
         """
-        numDevices = sbftdi.getNumDevices()
-        serialNumbers: list[str] = []
-        devices: list[tuple[str, str, int]] = []
-
-        for i in range(0, numDevices):
+        deadline = time.perf_counter() + self.CLEAR_TIMEOUT
+        initialarray = [0, 0, 0]
+        while initialarray[-1] != 200 or initialarray[-2] != 200 or initialarray[-3] != 200:
+            if time.perf_counter() > deadline:
+                raise IOError(
+                    f"Device did not return to its idle pattern within {self.CLEAR_TIMEOUT} s")
             try:
-                spiDevice = sbftdi.sonoboticsFtdiChannel("SPI", "deviceNum", i)
-            except Exception:
-                # Cannot connect to a device, probably because it's locked by other process; omit it
-                continue
-            eepromData = spiDevice.readEEPROM()
-
-            manufacturer = eepromData['Manufacturer']
-            serialNumber = eepromData['Serial Number']
-            device = eepromData['Device']
+                initialarray = np.frombuffer(
+                    self.spiDevice.read(1000), dtype=np.uint8)
+            except sbftdi.ReadRecoveredError:
+                # Whatever was lost was to be discarded anyway; keep draining
+                initialarray = [0, 0, 0]
 
-            if ((manufacturer == 'Sonobotics')
-                    and serialNumber != "0"
-                    and serialNumber not in serialNumbers
-                    and device[0].isdigit()):
-                devices.append((serialNumber, device, int(device[0])))
-                serialNumbers.append(serialNumber)
+    @staticmethod
+    def listDevices(refresh: bool = False) -> list[tuple[str, str, int]]:
+        """
+        Lists the actual Vitesse devices currently connected to the device. Virtual devices are not counted.
+        The EEPROMs are read in parallel, and the result is reused for DEVICE_CACHE_TTL seconds
+        unless the number of FTDI devices changes, see enumeration.DeviceEnumerator.
 
-            spiDevice.close()
+        Args:
+            refresh (bool): Scan the devices again even if the last scan is still fresh.
 
-        return devices
+        Returns:
+            devices (list[(serialNumber: str, deviceName: str, numberOfChannels: int)]): list of tuples containing Vitesse device information.
+        """
+        return deviceEnumerator.listDevices(refresh)
 
     def checkValidity(self, phaseArrayMicro: Optional[list[int]] = None, delayArrayMicro: Optional[list[int]] = None, recordLength: Optional[float] = None, PRF: Optional[int] = None) -> Self:
         """
@@ -248,12 +424,16 @@ class Vitesse:
             raise ValueError('Provided signal is invalid')
         return self
 
-    def _writeSpiDevice(self, chars: list[Union[str, int]]) -> None:
+    def _writeSpiDevice(self, chars: Union[list[Union[str, int]], bytes], immediate: bool = False) -> None:
         """
         Writes data to the SPI device and raises exceptions on failure.
+        Inside a batch() block the command is queued instead, and sent with the rest of the batch.
 
         Args:
-            chars (list[Union[str, int]]): List of bytes as characters/integers to send to the device.
+            chars (Union[list[Union[str, int]], bytes]): List of bytes as characters/integers to send to the device,
+                                                         or the already encoded command.
+            immediate (bool): Send now even inside a batch, e.g. because a reply follows the status.
+                              Any queued commands are sent first.
 
         Returns:
             Self: Returns the instance for method chaining.
@@ -261,33 +441,276 @@ class Vitesse:
         Raises:
             IOError: If SPI device is not initialised.
             ValueError: If device returns invalid response (200).
-            RuntimeError: If device operation fails (other response codes).
+            RuntimeError: If device operation fails (other response codes), or an acquisition
+                          stream is running.
         """
         if self.spiDevice is None:
             raise IOError(
                 "SPI Device not initialised. Perhaps you forgot to call initialise()")
+        self._checkStreamStopped()
         if self.simulation:
             # Do not write anything in simulation mode
             return
-        channelStr = ""
-        for char in chars:
-            if type(char) == str:
-                channelStr += f"{ord(char):02x}"
-            else:
-                channelStr += f"{char:02x}"
-        channelByt = bytes.fromhex(channelStr)
+        channelByt = self._encodeCommand(chars)
+
+        if self._batch is not None:
+            if not immediate:
+                self._batch.pending.append(channelByt)
+                return
+            self._flushBatch()
 
         self.spiDevice.write(channelByt)
         time.sleep(self.READ_DELAY)
-        dataBack = self.spiDevice.read(1)
+        try:
+            dataBack = self.spiDevice.read(1)
+        except sbftdi.ReadRecoveredError:
+            # The status was lost, so whether the command was applied is unknown
+            self._clearBuffer()
+            self.invalidateShadow()
+            raise
         result = int.from_bytes(dataBack, byteorder='big')
         if result == 50:
             return
-        elif result == 200:
+        # The device state is uncertain after a failure
+        self.invalidateShadow()
+        if result == 200:
             raise ValueError("Device returned invalid response")
         else:
             raise RuntimeError("Device operation failed")
 
+    @staticmethod
+    def _encodeCommand(chars: Union[list[Union[str, int]], bytes]) -> bytes:
+        """
+        Encodes a command given as characters/integers into the bytes sent to the device.
+        Already encoded commands are returned unchanged.
+        """
+        if isinstance(chars, bytes):
+            return chars
+        return bytes(ord(char) if type(char) == str else char for char in chars)
+
+    @contextmanager
+    def batch(self) -> Iterator[CommandBatch]:
+        """
+        Queues the configuration commands issued inside the block and sends them in as few
+        transactions as possible when the block exits, collecting all status bytes in one read.
+        Attributes are updated as commands are queued; nothing is sent if the block raises.
+        Nested blocks join the outermost batch.
+
+        Example:
+            with V.batch():
+                V.setAverages(100).setPrf(1000)
+
+        Yields:
+            CommandBatch: Holds the sent commands and their status bytes once flushed.
+
+        Raises:
+            ValueError: If the device returns invalid response (200) to a command.
+            RuntimeError: If a device operation fails (other response codes).
+        """
+        if self._batch is not None:
+            yield self._batch
+            return
+
+        self._batch = CommandBatch()
+        try:
+            yield self._batch
+            self._flushBatch()
+        except BaseException:
+            # Queued values were recorded in the shadow but may never have reached the device
+            self.invalidateShadow()
+            raise
+        finally:
+            self._batch = None
+
+    def _writeRegister(self, register: str, commands: list[Union[list[Union[str, int]], bytes]]) -> bool:
+        """
+        Writes the commands setting one device register, unless the shadow shows that the
+        device already holds exactly this value.
+
+        Args:
+            register (str): Shadow key of the register, the command character by convention.
+            commands (list[Union[list[Union[str, int]], bytes]]): Commands as passed to _writeSpiDevice.
+
+        Returns:
+            bool: True if the commands were sent (or queued in a batch), False if skipped.
+        """
+        encoded = tuple(self._encodeCommand(command) for command in commands)
+        if self._shadow.get(register) == encoded:
+            return False
+
+        # Forget the old value until the device acknowledges the new one
+        self._shadow.pop(register, None)
+        for command in commands:
+            self._writeSpiDevice(command)
+        self._shadow[register] = encoded
+        return True
+
+    def invalidateShadow(self) -> Self:
+        """
+        Forgets the host-side copy of the device registers, so that the next configuration
+        resends every register. Called automatically on (re)connection and on errors.
+
+        Returns:
+            Self: Returns the instance for method chaining.
+        """
+        self._shadow.clear()
+        return self
+
+    def _flushBatch(self) -> None:
+        """
+        Sends the commands queued in the current batch and checks their status bytes.
+
+        Raises:
+            ValueError: If the device returns invalid response (200) to a command.
+            RuntimeError: If a device operation fails (other response codes).
+            sbftdi.ReadRecoveredError: If the statuses were lost to a read error the channel
+                recovered from. The device is drained and the register shadow invalidated,
+                so sending the configuration again sends every register.
+        """
+        batch = self._batch
+        if batch is None or not batch.pending or self.spiDevice is None:
+            return
+        self._checkStreamStopped()
+
+        commands, batch.pending = batch.pending, []
+        statuses: list[int] = []
+        try:
+            for chunk in self._batchChunks(commands):
+                self.spiDevice.write(b''.join(chunk))
+                time.sleep(self.READ_DELAY)
+                statuses += list(self.spiDevice.read(len(chunk)))
+        except sbftdi.ReadRecoveredError:
+            # Which commands were applied is unknown
+            self._clearBuffer()
+            self.invalidateShadow()
+            raise
+        self._checkBatchStatuses(batch, commands, statuses)
+
+    @staticmethod
+    def _batchChunks(commands: list[bytes]) -> list[list[bytes]]:
+        """
+        Splits queued commands into the groups sent in one write each.
+        """
+        commandsPerWrite = MAX_SPI_WRITE_BYTES // COMMAND_BYTES
+        return [commands[i:i + commandsPerWrite] for i in range(0, len(commands), commandsPerWrite)]
+
+    def _checkBatchStatuses(self, batch: CommandBatch, commands: list[bytes], statuses: list[int]) -> None:
+        """
+        Records the sent commands and their status bytes in the batch, and raises for the
+        first failed one, see _flushBatch.
+        """
+        batch.commands += commands
+        batch.statuses += statuses
+        for command, status in zip(commands, statuses):
+            if status == 50:
+                continue
+            self.invalidateShadow()
+            if status == 200:
+                raise ValueError(
+                    f"Device returned invalid response to command {command!r}")
+            else:
+                raise RuntimeError(
+                    f"Device operation failed for command {command!r}")
+
+    def _readSpiDeviceInto(self, buffer: np.ndarray, offset: int, numBytes: int) -> None:
+        """
+        Reads numBytes from the SPI device into buffer at offset, split into
+        transfers of at most MAX_READ_CHUNK bytes.
+
+        Raises:
+            IOError: If SPI device is not initialised.
+        """
+        if self.spiDevice is None:
+            raise IOError(
+                "SPI Device not initialised. Perhaps you forgot to call initialise()")
+        while numBytes > 0:
+            chunk = min(numBytes, self.MAX_READ_CHUNK)
+            self.spiDevice.read_into(buffer, offset, chunk)
+            offset += chunk
+            numBytes -= chunk
+
+    def setTransportProfile(self, profile: Union[str, TransportProfile]) -> Self:
+        """
+        Applies USB transport settings: the FTDI transfer sizes, latency timer and timeouts,
+        MAX_READ_CHUNK and READ_DELAY.
+
+        Args:
+            profile (Union[str, TransportProfile]): "low-latency" for the fastest command round trips
+                and short frames, "bulk-throughput" for large frames, or a profile, e.g. from
+                calibrateTransport.
+
+        Returns:
+            Self: Returns the instance for method chaining.
+
+        Raises:
+            ValueError: If the profile name is unknown.
+            IOError: If SPI device is not initialised.
+        """
+        if isinstance(profile, str):
+            if profile not in TRANSPORT_PROFILES:
+                raise ValueError(
+                    f'Invalid transport profile, expected one of {list(TRANSPORT_PROFILES)}.')
+            profile = TRANSPORT_PROFILES[profile]
+        if self.spiDevice is None:
+            raise IOError(
+                "SPI Device not initialised. Perhaps you forgot to call initialise()")
+        self._checkStreamStopped()
+        self.spiDevice.setUSBParameters(profile.inTransferSize, profile.outTransferSize)
+        self.spiDevice.setLatencyTimer(profile.latencyTimer)
+        self.spiDevice.setTimeouts(profile.readTimeout, profile.writeTimeout)
+        self.MAX_READ_CHUNK = profile.maxReadChunk
+        self.READ_DELAY = profile.readDelay
+        self.transportProfile = profile
+        return self
+
+    def calibrateTransport(self,
+                           transferSizes: list[int] = CALIBRATION_TRANSFER_SIZES,
+                           latencyTimers: list[int] = CALIBRATION_LATENCY_TIMERS,
+                           chunkSizes: list[int] = CALIBRATION_CHUNK_SIZES,
+                           readDelays: list[float] = CALIBRATION_READ_DELAYS,
+                           numFrames: int = 5,
+                           persist: bool = True) -> tuple[TransportProfile, list[dict[str, Any]]]:
+        """
+        Finds the best USB transport settings for the current configuration and applies them.
+        First the shortest READ_DELAY at which status bytes are read back reliably is found,
+        resending an already acknowledged command. Then, for every combination of latency
+        timer, USB transfer size and read chunk size, the command round trip and the time to
+        trigger and read a frame (the averaging excluded) are measured. The combination that
+        reads frames the fastest wins. A combination that fails is recorded and skipped.
+
+        The averaging is set to 1 for the duration and restored afterwards, so each of the
+        len(latencyTimers) * len(transferSizes) * len(chunkSizes) combinations (36 by default)
+        costs about numCommands command round trips and 1 + numFrames acquisitions of
+        1 / prf plus the frame transfer: a few seconds at 1 kHz with the defaults, but minutes
+        at low PRF or with large frames over a slow link. Frames acquired meanwhile are discarded.
+
+        Args:
+            transferSizes (list[int]): Candidate USB IN transfer sizes in bytes.
+            latencyTimers (list[int]): Candidate FTDI latency timers in milliseconds.
+            chunkSizes (list[int]): Candidate MAX_READ_CHUNK values in bytes.
+            readDelays (list[float]): Candidate READ_DELAY values in seconds.
+            numFrames (int): Frames measured per combination.
+            persist (bool): Save the result for the serial number of the device, so that initialise
+                applies it from then on. See transport.calibrationPath for the location.
+
+        Returns:
+            tuple[TransportProfile, list[dict[str, Any]]]: The applied profile, and the measurements
+                of every combination: "roundTrip" and "frameReadTime" in seconds, "throughput" in
+                bytes per second, or "error" for a combination that failed.
+
+        Raises:
+            RuntimeError: In simulation, if the device has not been configured yet, or if no
+                combination could be measured. The previous transport profile is then applied
+                again. If none was applied, READ_DELAY and MAX_READ_CHUNK are restored, but the
+                FTDI settings of the last combination tried remain, see the error message.
+        """
+        profile, measurements = calibrateTransport(
+            self, transferSizes, latencyTimers, chunkSizes, readDelays, numFrames)
+        if persist:
+            serialNumber = self.serialNumber or self.spiDevice.readEEPROM()["Serial Number"]
+            saveTransportProfile(serialNumber, profile)
+        return profile, measurements
+
     def setConfig(self,
                   numCycles:            int = 2,
                   channelsOnReceive:    list[int] = [1, 0, 0, 0, 0, 0, 0, 0],
@@ -304,38 +727,92 @@ class Vitesse:
                   encoderWheelbase:     int = 40,
                   wheelRadius:        float = 39.8/2,
                   encoderCpr:           int = 2048,
-                  targetClock:          int = int(50e6)
+                  targetClock:          int = int(50e6),
+                  clearEncoders:        bool = False
                   ) -> Self:
         """
         Configures the Vitesse device with the specified parameters.
         This is recommended over setting each parameter manually, since this ensures the
         correct precedence of the parameters.
+        Only the registers whose value differs from the last acknowledged one are sent.
+
+        Args:
+            clearEncoders (bool): Whether to clear the encoders first (takes about a second).
 
         Returns:
             Self: Returns the instance for method chaining.
+
+        Raises:
+            RuntimeError: If an acquisition stream is running.
         """
+        self._checkStreamStopped()
 
         self.setNumChips(pulseFrequency, opFrequency)
 
         self.samplingMode = samplingMode
         self.peripheralsOnArray = peripheralsOnArray
 
-        return self.clearEncoders() \
-            .checkValidity(phaseArrayMicro, delayArrayMicro, recordLength, PRF) \
-            .setSymbol(self.numChips, numCycles) \
-            .setChannelReceive(channelsOnReceive) \
-            .setChannelDrive(channelsOnDrive) \
-            .setSamplingMode(samplingMode) \
-            .setPeripheralEnable(peripheralsOnArray) \
-            .setClockControlEnable(targetClock) \
-            .setAverages(numAverages) \
-            .setPrf(PRF) \
-            .setRecordLength(recordLength) \
-            .setTriggerPhasing(phaseArrayMicro) \
-            .setRecordDelay(delayArrayMicro) \
-            .setEncoderWheelbase(encoderWheelbase) \
-            .setEncoderRadiusCpr(wheelRadius, encoderCpr) \
-            .configureAttributes()
+        if clearEncoders:
+            self.clearEncoders()
+
+        with self.batch():
+            self.checkValidity(phaseArrayMicro, delayArrayMicro, recordLength, PRF) \
+                .setSymbol(self.numChips, numCycles) \
+                .setChannelReceive(channelsOnReceive) \
+                .setChannelDrive(channelsOnDrive) \
+                .setSamplingMode(samplingMode) \
+                .setPeripheralEnable(peripheralsOnArray) \
+                .setClockControlEnable(targetClock) \
+                .setAverages(numAverages) \
+                .setPrf(PRF) \
+                .setRecordLength(recordLength) \
+                .setTriggerPhasing(phaseArrayMicro) \
+                .setRecordDelay(delayArrayMicro) \
+                .setEncoderWheelbase(encoderWheelbase) \
+                .setEncoderRadiusCpr(wheelRadius, encoderCpr) \
+                .configureAttributes()
+        return self
+
+    def compileProfile(self, **config: Any) -> VitesseProfile:
+        """
+        Validates a configuration once and compiles it, for the firmware of this device, into
+        an immutable and hashable profile holding the register commands and the resulting
+        frame layout. Nothing is sent to the device; use apply to do so.
+
+        Args:
+            **config: Any parameter of setConfig except clearEncoders.
+
+        Returns:
+            VitesseProfile: The compiled profile.
+
+        Raises:
+            ValueError: If the configuration is invalid.
+        """
+        return VitesseProfile.compile(self, **config)
+
+    def apply(self, profile: VitesseProfile) -> Self:
+        """
+        Applies a profile compiled by compileProfile in a single batch, sending only the
+        registers that differ from the last acknowledged values.
+
+        Args:
+            profile (VitesseProfile): The profile to apply.
+
+        Returns:
+            Self: Returns the instance for method chaining.
+
+        Raises:
+            ValueError: If the profile was compiled for another firmware version or channel
+                        count, or if the device returns invalid response (200).
+            RuntimeError: If device operation fails.
+        """
+        self._checkStreamStopped()
+        profile.checkCompatible(self)
+        with self.batch():
+            for register, commands in profile.registers:
+                self._writeRegister(register, list(commands))
+        profile.restoreAttributes(self)
+        return self.configureAttributes()
 
     def setNumChips(self, pulseFrequency: int, opFrequency: int) -> Self:
         """
@@ -378,7 +855,7 @@ class Vitesse:
         else:
             symbol: list[Union[str, int]] = [
                 '1', numChips, numCycles, 'p', 'a']
-            self._writeSpiDevice(symbol)
+            self._writeRegister('1', [symbol])
             return self
 
     def setChannelReceive(self, channelsOnReceive: list[int]) -> Self:
@@ -410,7 +887,7 @@ class Vitesse:
             raise ValueError('Maximum number of channels exceeded!\n')
         else:
             channel: list[Union[str, int]] = ['2', channelByte, 'a', 'a', 'a']
-            self._writeSpiDevice(channel)
+            self._writeRegister('2', [channel])
             return self
 
     def setChannelDrive(self, channelsOnDrive: list[int]) -> Self:
@@ -450,7 +927,7 @@ class Vitesse:
 
         channel: list[Union[str, int]] = [
             'd', channelByte, 'a', 'a', 'a']
-        self._writeSpiDevice(channel)
+        self._writeRegister('d', [channel])
 
         return self
 
@@ -520,7 +997,7 @@ class Vitesse:
 
         peripheral: list[Union[str, int]] = [
             '9', peripheralByte, 'a', 'a', 'a']
-        self._writeSpiDevice(peripheral)
+        self._writeRegister('9', [peripheral])
 
         return self
 
@@ -552,7 +1029,7 @@ class Vitesse:
 
         samplingCommand: list[Union[str, int]] = [
             'b', samplingByte, 'a', 'a', 'a']
-        self._writeSpiDevice(samplingCommand)
+        self._writeRegister('b', [samplingCommand])
         return self
 
     def clearCounterEnable(self, clearCountersOnArray: list[int]) -> Self:
@@ -631,7 +1108,9 @@ class Vitesse:
         else:
             clearCounterCommand: list[Union[str, int]] = [
                 'c', clearCounterByte, 'a', 'a', 'a']
-            self._writeSpiDevice(clearCounterCommand)
+            if not self._writeRegister('c', [clearCounterCommand]):
+                # Clock unchanged, so the ADC frequency read last time still holds
+                return self
         try:
             self.adcFrequency = self.getFrequency()
         except ValueError:
@@ -654,6 +1133,7 @@ class Vitesse:
             return self
 
         self.clearCounterEnable([0, 0, 0, 0, 0, 0, 0, 0])
+        self._flushBatch()
         time.sleep(1)
         self.clearCounterEnable([1, 0, 0, 0, 0, 0, 0, 0])
         return self
@@ -681,7 +1161,7 @@ class Vitesse:
 
             average: list[Union[str, int]] = [
                 '3', int(bitAveVals[-8:], 2), int(bitAveVals[-16:-8], 2), 'a', 'a']
-            self._writeSpiDevice(average)
+            self._writeRegister('3', [average])
             # Update number of averages upon success
             self.numAverages = numAverages
             return self
@@ -710,7 +1190,7 @@ class Vitesse:
             pulse: list[Union[str, int]] = ['4', int(bitPRFVals[-8:], 2), int(
                 bitPRFVals[-16:-8], 2), int(bitPRFVals[-24:-16], 2), int(bitPRFVals[-32:-24])]
 
-            self._writeSpiDevice(pulse)
+            self._writeRegister('4', [pulse])
             self.prf = PRF
             return self
 
@@ -739,7 +1219,7 @@ class Vitesse:
                 pulse: list[Union[str, int]] = ['h', wheelbase_symbols[0],
                                                 wheelbase_symbols[1], wheelbase_symbols[2], wheelbase_symbols[3]]
 
-                self._writeSpiDevice(pulse)
+                self._writeRegister('h', [pulse])
                 self.encoderWheelbase = 1/float(wheelbase_float32)
                 return self
             except:
@@ -772,7 +1252,7 @@ class Vitesse:
                 pulse: list[Union[str, int]] = ['i', const_symbol[0],
                                                 const_symbol[1], const_symbol[2], const_symbol[3]]
 
-                self._writeSpiDevice(pulse)
+                self._writeRegister('i', [pulse])
                 self.wheelRadius = float(radius_float32)
                 self.encoderCpr = float(CPR_float32)
 
@@ -788,6 +1268,7 @@ class Vitesse:
         2) If that fails (likely no status for 'v'), resend raw.
         3) Read exactly two data bytes (hi, lo), skipping any stray status markers.
         4) Returns the version if success, -1 if failed.
+        A read error the channel recovered from drains the device and the query is sent once more.
 
         :return: The FPGA bitstream version.
         :rtype: int
@@ -799,12 +1280,16 @@ class Vitesse:
         if self.spiDevice is None:
             raise IOError(
                 "SPI Device not initialised. Perhaps you forgot to call initialise()")
+        # Commands queued before the query are not safe to resend: flush them first
+        self._flushBatch()
+        return self._retryAfterRecovery(self._queryVersion)
 
+    def _queryVersion(self) -> int:
         version_command: list[Union[str, int]] = ['v', 'a', 'a', 'a', 'a']
 
         try:
             # Preferred path: matches other methods (device returns 0x32 'pass')
-            self._writeSpiDevice(version_command)
+            self._writeSpiDevice(version_command, immediate=True)
             # If we get here, one status byte (0x32) has already been consumed.
         except ValueError:
             # Device explicitly said 'invalid' (0xC8). Mirror your other methods.
@@ -841,7 +1326,10 @@ class Vitesse:
     def getFrequency(self) -> int:
         """
         Get the ADC sampling frequency (single byte) from the FPGA.
-        Matches the existing pattern: send via _writeSpiDevice, then read.
+        Matches the existing pattern: send via _writeSpiDevice, which reads the status byte,
+        then read the value byte. Firmware that sends no status for 's' is asked once more and
+        its value byte read directly. The value is never taken for a status: 50 MHz reads as 50.
+        A read error the channel recovered from drains the device and the query is sent once more.
 
         :return: The ADC sampling frequency.
         :rtype: int
@@ -851,12 +1339,16 @@ class Vitesse:
         if self.spiDevice is None:
             raise IOError(
                 "SPI Device not initialised. Perhaps you forgot to call initialise()")
+        # Commands queued before the query are not safe to resend: flush them first
+        self._flushBatch()
+        return self._retryAfterRecovery(self._queryFrequency)
 
+    def _queryFrequency(self) -> int:
         freq_command: list[Union[str, int]] = ['s', 'a', 'a', 'a', 'a']
 
         try:
             # Preferred path: device returns 0x32 and _writeSpiDevice consumes it.
-            self._writeSpiDevice(freq_command)
+            self._writeSpiDevice(freq_command, immediate=True)
         except ValueError:
             raise ValueError(
                 "getFrequency: device returned 'Invalid' (200) for frequency command.")
@@ -865,21 +1357,29 @@ class Vitesse:
             self.spiDevice.write(b'saaaa')
             time.sleep(self.READ_DELAY)
 
-        # Read exactly one payload byte (allow at most one retry if we see a status)
+        # Read exactly one payload byte
         time.sleep(self.READ_DELAY)
         b = self.spiDevice.read(1)
         if not b:
             raise TimeoutError("getFrequency: timeout (no byte).")
 
-        val = b[0]
-        if val in (50, 200):  # if a stray status shows up, read once more
-            time.sleep(self.READ_DELAY)
-            b = self.spiDevice.read(1)
-            if not b:
-                raise TimeoutError("getFrequency: timeout after status byte.")
-            val = b[0]
+        return int(b[0]*1000000)
 
-        return int(val*1000000)
+    def _retryAfterRecovery(self, query: Callable[[], T]) -> T:
+        """
+        Runs a device query, and once more if its reply was lost to a read error the channel
+        recovered from. The device is drained and the register shadow invalidated in between,
+        since a command in flight may or may not have been applied.
+
+        Raises:
+            sbftdi.ReadRecoveredError: If the reply of the second attempt is lost too.
+        """
+        try:
+            return query()
+        except sbftdi.ReadRecoveredError:
+            self._clearBuffer()
+            self.invalidateShadow()
+            return query()
 
     def setAdcThreshold(self) -> Self:
         """
@@ -896,7 +1396,7 @@ class Vitesse:
 
         ADC: list[Union[str, int]] = [
             '5', str(self.TRIGGER), numADCByte, 'a', 'a']
-        self._writeSpiDevice(ADC)
+        self._writeRegister('5', [ADC])
         return self
 
     def setRecordLength(self, recordLength: float) -> Self:
@@ -921,7 +1421,7 @@ class Vitesse:
 
         record: list[Union[str, int]] = [
             '6', numRecByte1, numRecByte2, 'a', 'a']
-        self._writeSpiDevice(record)
+        self._writeRegister('6', [record])
         return self
 
     def setTriggerPhasing(self, phaseArrayMicro: list[int]) -> Self:
@@ -941,9 +1441,10 @@ class Vitesse:
         phaseArray = np.ceil(
             np.array(phaseArrayMicro[::-1]) * self.adcFrequency / 1_000_000)
         phasingActive = any(phaseArray > 0)
+        phaseCommands: list[list[Union[str, int]]] = []
         if phasingActive == False:
             phaseByt: list[Union[str, int]] = [x for x in '7Naaa']
-            self._writeSpiDevice(phaseByt)
+            phaseCommands.append(phaseByt)
         else:
             phaseIndices = [index for index,
                             value in enumerate(phaseArray) if value != 0]
@@ -956,7 +1457,8 @@ class Vitesse:
                 numPhaseByte4 = int(bitPhaseVals[-24:-16], 3)
                 phase: list[Union[str, int]] = ['7', numPhaseByte1,
                                                 numPhaseByte2, numPhaseByte3, numPhaseByte4]
-                self._writeSpiDevice(phase)
+                phaseCommands.append(phase)
+        self._writeRegister('7', phaseCommands)
         return self
 
     def setRecordDelay(self, delayArrayMicro: list[int]) -> Self:
@@ -976,9 +1478,10 @@ class Vitesse:
         delayArray = np.ceil(
             np.array(delayArrayMicro[::-1]) * self.adcFrequency / 1_000_000)
         delayActive = any(delayArray > 0)
+        delayCommands: list[list[Union[str, int]]] = []
         if delayActive == False:
             phaseByt: list[Union[str, int]] = [x for x in '8Naaa']
-            self._writeSpiDevice(phaseByt)
+            delayCommands.append(phaseByt)
         else:
             delayIndices = [index for index,
                             value in enumerate(delayArray) if value != 0]
@@ -991,7 +1494,8 @@ class Vitesse:
                 numDelayByte4 = int(bitDelayVals[-24:-16], 3)
                 delay: list[Union[str, int]] = ['8', numDelayByte1,
                                                 numDelayByte2, numDelayByte3, numDelayByte4]
-                self._writeSpiDevice(delay)
+                delayCommands.append(delay)
+        self._writeRegister('8', delayCommands)
         return self
 
     def configureAttributes(self) -> Self:
@@ -1026,203 +1530,810 @@ class Vitesse:
             self.recordPoints * self.messageBytes * self.numChannelsOnReceive + 2 * self.numChannelsOnReceive - 1)
         self.totalBytes = self.totalDataBytes + self.additionalBytes
 
+        self._configurePeripheralLayout()
+
         return self
 
+    def _configurePeripheralLayout(self) -> None:
+        """
+        Builds the structured dtypes locating and decoding the enabled peripherals in the
+        trailer that follows the channel data (additionalBytes long), so that each frame is
+        decoded with a single view and no per-sensor work.
+        """
+        names: list[str] = []
+        rawFormats: list[str] = []
+        recordFormats: list[str] = []
+        offsets: list[int] = []
+        self._peripheralConverters = []
+        self._peripheralAttributes = []
+        # Enabled peripherals without data ("NA") still get an entry in messageArray
+        self._emptyPeripherals = 0
+
+        offset = 1  # The peripheral data starts after one marker byte
+        for i in range(len(self.peripheralsOnArray)):
+            if self.peripheralsOnArray[i] == 1 and self.bytesArray[i] == 0:
+                self._emptyPeripherals += 1
+            elif self.peripheralsOnArray[i] == 1:
+                names.append(self.fieldArray[i])
+                rawFormats.append(self.rawFormatArray[i])
+                recordFormats.append(self.recordFormatArray[i])
+                offsets.append(offset)
+                self._peripheralConverters.append(self.arrayFunctionArray[i])
+                self._peripheralAttributes.append(self.attributeArray[i])
+            offset += self.bytesArray[i] * self.peripheralsOnArray[i]
+
+        self.peripheralRawDtype = np.dtype({"names": names, "formats": rawFormats,
+                                            "offsets": offsets, "itemsize": self.additionalBytes})
+        self.peripheralDtype = np.dtype(list(zip(names, recordFormats)))
+
+    def _decodePeripherals(self, trailer: np.ndarray) -> np.ndarray:
+        """
+        Decodes the peripheral trailer of a frame into a record of dtype peripheralDtype,
+        and updates the attributes holding the latest readings.
+        """
+        record = decode_peripherals(
+            trailer, self.peripheralRawDtype, self.peripheralDtype, self._peripheralConverters)
+        values = record.item()
+        for attribute, value in zip(self._peripheralAttributes, values):
+            setattr(self, attribute, value)
+        self.messageArray = list(values) + [None] * self._emptyPeripherals
+        self.peripheralRecord = record
+        return record
+
     def getPeripheralData(self):
         return self.messageArray
 
-    def getArray(self) -> np.ndarray[tuple[int, int], np.dtype[np.float64]]:
+    def getPeripheralRecord(self) -> Optional[np.ndarray]:
+        """
+        Returns the peripheral readings of the last frame as a NumPy record of dtype
+        peripheralDtype, with one field per enabled peripheral (e.g. record["encoder1"]).
+        """
+        return self.peripheralRecord
+
+    def enableTiming(self, observer: Optional[Callable[[FrameTiming], None]] = None, window: int = 1000) -> Self:
+        """
+        Times every frame acquired from the device from then on: the trigger, the
+        numAverages / prf wait, the ready poll, the transfer and the decoding of the
+        peripherals and samples, with the bytes read, poll iterations and read retries.
+        Simulated frames are not timed.
+
+        Args:
+            observer (Optional[Callable[[FrameTiming], None]]): Called with the FrameTiming of each
+                frame once decoded, from the thread that decoded it. Adds to the observers already
+                registered.
+            window (int): Number of most recent frames the statistics of getTimingStats cover.
+                Changing it starts the statistics afresh.
+
+        Returns:
+            Self: Returns the instance for method chaining.
+        """
+        if self._timingStats is None or self._timingStats.window != window:
+            self._timingStats = TimingStats(window)
+        if observer is not None:
+            self._timingObservers.append(observer)
+        return self
+
+    def disableTiming(self) -> Self:
+        """
+        Stops timing frames, and forgets the observers and statistics of enableTiming.
+
+        Returns:
+            Self: Returns the instance for method chaining.
+        """
+        self._timingStats = None
+        self._timingObservers = []
+        return self
+
+    def getTimingStats(self) -> Optional[TimingStats]:
+        """
+        Returns the rolling statistics of the frames timed since enableTiming, e.g.
+        getTimingStats().summary() for the p50/p95/p99 duration of each phase, or None if
+        timing is disabled.
+        """
+        return self._timingStats
+
+    def _startFrameTiming(self) -> Optional[FrameTiming]:
+        """
+        Returns a FrameTiming for the frame about to be acquired, or None if timing is disabled.
+        """
+        if self._timingStats is None:
+            return None
+        self._timedFrames += 1
+        retries = self.spiDevice.readRetries if self.spiDevice is not None else 0
+        return FrameTiming(self._timedFrames - 1, time.perf_counter(), retries)
+
+    def _finishFrameTiming(self, timing: Optional[FrameTiming]) -> None:
+        """
+        Reports the timing of a completed frame to the statistics and observers.
+        """
+        stats = self._timingStats
+        if timing is None or stats is None:
+            return
+        stats.record(timing)
+        for observer in self._timingObservers:
+            observer(timing)
+
+    def getArray(self, dtype: npt.DTypeLike = np.float64, raw: bool = False,
+                 out: Optional[np.ndarray] = None) -> np.ndarray[tuple[int, int], np.dtype[Any]]:
         """
         Acquires data array from the Vitesse device, including peripheral messages
         and dynamic decoding based on sampling mode.
 
+        Args:
+            dtype (npt.DTypeLike): Floating point type of the echo signal, e.g. np.float32 to halve memory.
+            raw (bool): Return the undivided accumulator codes as int32 instead, without the
+                        averaging, offset and channel inversion (dtype is then ignored).
+            out (Optional[np.ndarray]): Writable array of shape (numChannelsOn, recordPoints) to decode
+                        into, e.g. a view into a larger memory-mapped block. Its dtype replaces the
+                        dtype argument, and must be int32 when raw is True.
+
         Returns:
             numpy.ndarray: Echo signal data for all enabled channels with shape
-                        (numChannelsOn, recordPoints).
+                        (numChannelsOn, recordPoints). This is out when provided.
 
         Raises:
             IOError: If SPI device is not initialised.
-            ValueError: If sampling configuration is invalid.
+            ValueError: If sampling configuration is invalid, or out does not match it.
         """
+        if self._stream is not None and self._stream.running:
+            raise RuntimeError(
+                "An acquisition stream is running; read frames from the stream instead.")
+
         if self.simulation:
-            # If in simulation mode, then reads in default parameters and pre-recorded
-            # A-Scans, add random noise to the output, and then return the simulated result.
-            if self.adcFrequency <= 0:
-                self.adcFrequency = DEFAULT_ADC_FREQ
-            if self.recordPoints <= 0:
-                if self.recordLength and self.recordLength > 0:
-                    self.recordPoints = int(
-                        self.recordLength * self.adcFrequency)
-                else:
-                    self.recordPoints = 2048
-            if self.numChannelsOnReceive <= 0:
-                self.numChannelsOnReceive = 1
-
-            sim_dir = Path(__file__).resolve().parent / "simulator"
-            sim_files = [
-                sim_dir / "sample_ascan_6.25mm.npy",
-                sim_dir / "sample_ascan_12.5mm.npy",
-                sim_dir / "sample_ascan_18.75mm.npy",
-                sim_dir / "sample_ascan_25mm.npy",
-            ]
-
-            switch_period_s = 5.0
-            now = time.monotonic()
-
-            if not hasattr(self, "_sim_file_index"):
-                self._sim_file_index = 0
-            if not hasattr(self, "_sim_last_switch_t"):
-                self._sim_last_switch_t = now
-
-            elapsed = now - self._sim_last_switch_t
-            steps = int(elapsed // switch_period_s)
-            if steps > 0:
-                self._sim_file_index = (
-                    self._sim_file_index + steps) % len(sim_files)
-                self._sim_last_switch_t += steps * switch_period_s
-
-            sim_file = sim_files[self._sim_file_index]
-
-            clean: np.ndarray[tuple[int, int], np.dtype[np.float64]] = np.load(
-                sim_file).astype(float)
-            if clean.ndim == 1:
-                clean = clean.reshape(1, -1)
-            clean = clean[: self.numChannelsOnReceive, : self.recordPoints]
-
-            noise_std = 100.0
-            accumulator = np.zeros_like(clean)
-
-            for _ in range(self.numAverages):
-                accumulator += clean + \
-                    np.random.normal(0.0, noise_std, clean.shape)
-
-            echoSignal = accumulator / self.numAverages
-            self.messageArray = []
-            return echoSignal
+            if raw:
+                return self._convertEchoSignal(self._getArraySimulated(), dtype, raw, inverted=False, out=out)
+            return self._getArraySimulated(dtype, out)
 
         if (self.version < 3000):
-            return self._getArrayLegacy()
+            return self._convertEchoSignal(self._getArrayLegacy(self._startFrameTiming()), dtype, raw, out=out)
+
+        frameLength = self.totalBytes + 1
+        if self._frameBuffer is None or len(self._frameBuffer) != frameLength:
+            self._frameBuffer = self._newFrameBuffer()
+        if out is not None:
+            # Fail before acquiring rather than after
+            self._checkOutputArray(out, raw)
+        timing = self._startFrameTiming()
+        self._acquireFrameInto(self._frameBuffer, timing)
+        return self._decodeFrame(self._frameBuffer, dtype, raw, out, timing)
+
+    def getArrays(self, numFrames: int, dtype: npt.DTypeLike = np.float64, raw: bool = False,
+                  out: Optional[np.ndarray] = None) -> tuple[np.ndarray[tuple[int, int, int], np.dtype[Any]], np.ndarray]:
+        """
+        Acquires numFrames consecutive frames into one (numFrames, numChannelsOn, recordPoints) block.
+
+        Each acquisition is triggered as soon as the previous frame has been read, so the
+        decoding of a frame overlaps with the averaging of the next one on the device.
+
+        Args:
+            numFrames (int): Number of frames to acquire.
+            dtype (npt.DTypeLike): See getArray.
+            raw (bool): See getArray.
+            out (Optional[np.ndarray]): Writable array of shape (numFrames, numChannelsOn, recordPoints)
+                        to decode into, e.g. a slice of a memory-mapped file. Its dtype replaces
+                        the dtype argument. In simulation, frames have the shape getArray returns.
+
+        Returns:
+            tuple[numpy.ndarray, numpy.ndarray]: The frames, oldest first (out when provided), and a
+                        structured array of dtype frameTableDtype() with one row per frame: the
+                        time.time() at which the frame was triggered and its peripheral readings.
+
+        Raises:
+            IOError: If SPI device is not initialised.
+            ValueError: If out does not match the configuration.
+        """
+        if self._stream is not None and self._stream.running:
+            raise RuntimeError(
+                "An acquisition stream is running; read frames from the stream instead.")
+
+        table = np.zeros(numFrames, dtype=self.frameTableDtype())
+        if self.simulation or self.version < 3000:
+            # Simulated frames have as many channels and points as the reference A-scan, so the
+            # block is sized from the first frame; getArray checks out frame by frame
+            if out is not None and len(out) != numFrames:
+                raise ValueError(
+                    f"Output array holds {len(out)} frames, expected {numFrames}.")
+            for i in range(numFrames):
+                table["timestamp"][i] = time.time()
+                if out is None:
+                    frame = self.getArray(dtype, raw)
+                    out = np.empty((numFrames, *frame.shape), dtype=frame.dtype)
+                    out[0] = frame
+                else:
+                    self.getArray(dtype, raw, out[i])
+                self._recordPeripherals(table, i)
+            if out is None:
+                out = np.empty((0, self.numChannelsOnReceive, self.recordPoints),
+                               dtype=np.int32 if raw else self._checkOutputDtype(dtype))
+            return out, table
+
+        shape = (numFrames, self.numChannelsOnReceive, self.recordPoints)
+        if out is None:
+            out = np.empty(shape, dtype=np.int32 if raw else self._checkOutputDtype(dtype))
+        elif out.shape != shape:
+            raise ValueError(
+                f"Output array has shape {out.shape}, expected {shape}.")
+
+        frameLength = self.totalBytes + 1
+        if self._frameBuffer is None or len(self._frameBuffer) != frameLength:
+            self._frameBuffer = self._newFrameBuffer()
+        if numFrames > 0:
+            self._checkOutputArray(out[0], raw)
+
+        timing = nextTiming = None
+        for i in range(numFrames):
+            if i == 0:
+                table["timestamp"][0] = time.time()
+                nextTiming = self._startFrameTiming()
+                self._triggerFrame(nextTiming)
+            # Only waits for whatever part of the acquisition the decoding did not cover
+            timing = nextTiming
+            self._readFrameInto(self._frameBuffer, timing)
+
+            # The device is idle again: start the next frame before decoding this one
+            if i + 1 < numFrames:
+                table["timestamp"][i + 1] = time.time()
+                nextTiming = self._startFrameTiming()
+                self._triggerFrame(nextTiming)
+
+            self._decodeFrame(self._frameBuffer, dtype, raw, out[i], timing)
+            self._recordPeripherals(table, i)
+        return out, table
+
+    def getRawFrame(self) -> tuple[np.ndarray, FrameLayout]:
+        """
+        Acquires a frame without decoding it, for recording at full rate and decoding later
+        with decode_frame. The peripheral readings are not updated.
+
+        Returns:
+            tuple[numpy.ndarray, FrameLayout]: The totalBytes uint8 payload read after the ready
+                        sentinel, and the layout needed to decode it.
+
+        Raises:
+            IOError: If SPI device is not initialised.
+            RuntimeError: In simulation, with binaries older than 3000, or while a stream is running.
+        """
+        if self._stream is not None and self._stream.running:
+            raise RuntimeError(
+                "An acquisition stream is running; read frames from the stream instead.")
+        layout = self._rawFrameLayout()
+        frame = self._newFrameBuffer()
+        timing = self._startFrameTiming()
+        self._acquireFrameInto(frame, timing)
+        self._finishFrameTiming(timing)
+        return frame[1:], layout
+
+    def _rawFrameLayout(self) -> FrameLayout:
+        """
+        Returns the layout of the raw frames of the current configuration.
+
+        Raises:
+            RuntimeError: If the device does not produce raw frames (simulation, binaries older than 3000).
+        """
+        if self.simulation:
+            raise RuntimeError("Raw frames are not available in simulation.")
+        if self.version < 3000:
+            raise RuntimeError("Raw frames require a binary version of 3000 or newer.")
+        return FrameLayout.fromDevice(self)
+
+    def frameTableDtype(self) -> np.dtype:
+        """
+        Returns the dtype of the per-frame table of getArrays: a float64 "timestamp"
+        followed by the fields of peripheralDtype.
+        """
+        return np.dtype([("timestamp", "f8")] + self.peripheralDtype.descr)
+
+    def _recordPeripherals(self, table: np.ndarray, index: int) -> None:
+        """
+        Copies the peripheral readings of the last frame into row index of a frame table.
+        """
+        record = self.peripheralRecord
+        if record is None or record.dtype != self.peripheralDtype:
+            return
+        for name in self.peripheralDtype.names:
+            table[name][index] = record[name]
+
+    def _channelSigns(self) -> np.ndarray:
+        """
+        Returns +1/-1 for each enabled receive channel, -1 where the channel is inverted.
+        """
+        return channel_signs(self.maxChannels, self.enabledChannelReceive[:self.numChannelsOnReceive])
+
+    def _convertEchoSignal(self, echoSignal: np.ndarray, dtype: npt.DTypeLike, raw: bool,
+                           inverted: bool = True, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Converts an echo signal produced in float64 (simulation, legacy binaries) to the
+        representation requested from getArray.
+        """
+        if raw:
+            signs = self._channelSigns()[:, None] if inverted else 1.0
+            echoSignal = np.rint((echoSignal * signs + 2048) * self.numAverages)
+        if out is not None:
+            # Simulated frames can be shorter than recordPoints; check against what was produced
+            if out.shape != echoSignal.shape:
+                raise ValueError(
+                    f"Output array has shape {out.shape}, expected {echoSignal.shape}.")
+            np.copyto(out, echoSignal, casting='unsafe' if raw else 'same_kind')
+            return out
+        if raw:
+            return echoSignal.astype(np.int32)
+        return echoSignal.astype(self._checkOutputDtype(dtype), copy=False)
+
+    def _checkOutputArray(self, out: np.ndarray, raw: bool) -> np.dtype:
+        """
+        Checks that a caller-provided array can receive a decoded frame and returns its dtype.
+
+        Raises:
+            ValueError: If the shape, dtype or writability of out does not fit.
+        """
+        shape = (self.numChannelsOnReceive, self.recordPoints)
+        if not isinstance(out, np.ndarray) or out.shape != shape:
+            raise ValueError(
+                f"Output array has shape {getattr(out, 'shape', None)}, expected {shape}.")
+        if not out.flags.writeable:
+            raise ValueError("Output array is not writeable.")
+        if raw:
+            if out.dtype != np.int32:
+                raise ValueError(
+                    f"Output array must be int32 with raw=True, got {out.dtype}.")
+            return out.dtype
+        return self._checkOutputDtype(out.dtype)
+
+    @staticmethod
+    def _checkOutputDtype(dtype: npt.DTypeLike) -> np.dtype:
+        return check_output_dtype(dtype)
+
+    def _getArraySimulated(self, dtype: npt.DTypeLike = np.float64,
+                           out: Optional[np.ndarray] = None) -> np.ndarray[tuple[int, int], np.dtype[Any]]:
+        """
+        Simulation counterpart of getArray.
+
+        Args:
+            dtype (npt.DTypeLike): Floating point type of the result.
+            out (Optional[np.ndarray]): Array to generate into; its dtype replaces dtype.
+
+        Returns:
+            numpy.ndarray: Simulated echo signal data with shape
+                        (numChannelsOn, recordPoints).
+        """
+        # If in simulation mode, then reads in default parameters and pre-recorded
+        # A-Scans, add random noise to the output, and then return the simulated result.
+        if self.adcFrequency <= 0:
+            self.adcFrequency = DEFAULT_ADC_FREQ
+        if self.recordPoints <= 0:
+            if self.recordLength and self.recordLength > 0:
+                self.recordPoints = int(
+                    self.recordLength * self.adcFrequency)
+            else:
+                self.recordPoints = 2048
+        if self.numChannelsOnReceive <= 0:
+            self.numChannelsOnReceive = 1
+
+        sim_ascans = load_simulator_ascans()
+
+        switch_period_s = 5.0
+        now = time.monotonic()
+
+        if not hasattr(self, "_sim_file_index"):
+            self._sim_file_index = 0
+        if not hasattr(self, "_sim_last_switch_t"):
+            self._sim_last_switch_t = now
+
+        elapsed = now - self._sim_last_switch_t
+        steps = int(elapsed // switch_period_s)
+        if steps > 0:
+            self._sim_file_index = (
+                self._sim_file_index + steps) % len(sim_ascans)
+            self._sim_last_switch_t += steps * switch_period_s
+
+        # Viewed straight from the memory-mapped reference A-scan
+        clean = sim_ascans[self._sim_file_index]
+        if clean.ndim == 1:
+            clean = clean.reshape(1, -1)
+        clean = clean[: self.numChannelsOnReceive, : self.recordPoints]
+
+        if out is None:
+            out = np.empty(clean.shape, dtype=self._checkOutputDtype(dtype))
+        elif out.shape != clean.shape:
+            raise ValueError(
+                f"Output array has shape {out.shape}, expected {clean.shape}.")
+
+        # The mean of numAverages independent N(0, noise_std) draws is N(0, noise_std / sqrt(numAverages)),
+        # so the averaged noise is drawn once instead of once per pulse
+        noise_std = 100.0 / np.sqrt(self.numAverages)
+        if out.dtype in (np.float32, np.float64):
+            self._simulationRng.standard_normal(dtype=out.dtype, out=out)
+        else:
+            out[...] = self._simulationRng.standard_normal(clean.shape)
+        np.multiply(out, noise_std, out=out, casting='same_kind')
+        np.add(out, clean, out=out, casting='same_kind')
+
+        self.messageArray = []
+        return out
+
+    def setSimulationSeed(self, seed: Optional[int] = None) -> Self:
+        """
+        Seeds the noise generator of the simulation mode, for reproducible simulated frames.
+
+        Args:
+            seed (Optional[int]): The seed; None for fresh entropy.
+
+        Returns:
+            Self: Returns the instance for method chaining.
+        """
+        self._simulationRng = np.random.default_rng(seed)
+        return self
+
+    def _newFrameBuffer(self) -> np.ndarray:
+        """
+        Allocates a raw frame buffer for the current configuration: the ready
+        sentinel followed by totalBytes of payload.
+        """
+        buffer = np.empty(self.totalBytes + 1, dtype=np.uint8)
+        buffer[0] = 100  # Sentinel
+        return buffer
+
+    def _acquireFrameInto(self, array: np.ndarray, timing: Optional[FrameTiming] = None) -> np.ndarray:
+        """
+        Triggers an acquisition and reads the raw frame into a buffer created by
+        _newFrameBuffer. The frame is not decoded.
+
+        Args:
+            array (np.ndarray): The frame buffer.
+            timing (Optional[FrameTiming]): Timing of the frame, from _startFrameTiming.
+
+        Returns:
+            numpy.ndarray: The filled buffer.
+
+        Raises:
+            IOError: If SPI device is not initialised.
+        """
+        self._triggerFrame(timing)
+        return self._readFrameInto(array, timing)
+
+    def _acquireTimedFrame(self, array: np.ndarray) -> tuple[np.ndarray, Optional[FrameTiming]]:
+        """
+        _acquireFrameInto for acquisition streams, handing the timing of the frame over with it.
+        """
+        timing = self._startFrameTiming()
+        return self._acquireFrameInto(array, timing), timing
+
+    def _triggerFrame(self, timing: Optional[FrameTiming] = None) -> None:
+        """
+        Sends the acquisition command. The frame is ready after about numAverages / prf seconds.
 
+        Raises:
+            IOError: If SPI device is not initialised.
+        """
         if self.spiDevice is None:
             raise IOError(
                 "SPI Device not initialised. Perhaps you forgot to call initialise()")
+        self._checkStreamStopped()
+        start = time.perf_counter()
+        self._flushBatch()
+        self.spiDevice.write(b'faaaa')
+        self._triggeredAt = time.perf_counter()
+        if timing is not None:
+            timing.mark(PHASE_TRIGGER, start, self._triggeredAt)
+
+    def _readFrameInto(self, array: np.ndarray, timing: Optional[FrameTiming] = None) -> np.ndarray:
+        """
+        Waits for the ready sentinel of a triggered acquisition and reads the raw frame
+        into a buffer created by _newFrameBuffer.
+
+        If FRAME_CHECK is set, the frame is checked to be aligned, see _frameAligned. If it is
+        not, or the channel recovers from a read error midway, the device is drained to its idle
+        pattern, the acquisition triggered again and the frame read once more, up to
+        FRAME_RESYNC_ATTEMPTS times. Both count as desynchronised frames.
+
+        Returns:
+            numpy.ndarray: The filled buffer.
+
+        Raises:
+            IOError: If SPI device is not initialised, the channel cannot recover from a read
+                error, or the frame is still misaligned after FRAME_RESYNC_ATTEMPTS resyncs.
+            TimeoutError: If the frame is not ready READY_TIMEOUT seconds after it was due.
+        """
+        if self.spiDevice is None:
+            raise IOError(
+                "SPI Device not initialised. Perhaps you forgot to call initialise()")
+
+        desynced = False
+        for attempt in range(self.FRAME_RESYNC_ATTEMPTS + 1):
+            try:
+                if attempt > 0:
+                    # Discard whatever is left of the bad frame, then acquire it again
+                    self._clearBuffer()
+                    self._triggerFrame(timing)
+                self._readFrameOnce(array, timing)
+                aligned = not self.FRAME_CHECK or self._frameAligned(array, timing)
+            except sbftdi.ReadRecoveredError:
+                # The bytes of the frame are lost, which leaves it as unusable as a misaligned one
+                self.framesDesynced += 1
+                desynced = True
+                if attempt == self.FRAME_RESYNC_ATTEMPTS:
+                    raise
+                continue
+            if aligned:
+                if desynced:
+                    self.framesRecovered += 1
+                return array
+            desynced = True
+            self.framesDesynced += 1
+        raise IOError(
+            f"Frame still misaligned after {self.FRAME_RESYNC_ATTEMPTS} resynchronisations with the device")
+
+    def _frameAligned(self, array: np.ndarray, timing: Optional[FrameTiming] = None) -> bool:
+        """
+        Returns whether the frame just read ends where the layout says: the device must clock
+        out its idle pattern right after the last byte, so FRAME_TAIL_BYTES more are read and
+        must all be IDLE_BYTE. A frame that gained bytes on the way leaves some of them behind.
+        A frame that lost bytes is only caught by FRAME_MARKER_CHECK, its markers being moved.
+        """
+        assert self.spiDevice is not None
+        tail = self._tailBuffer
+        count = self.spiDevice.read_into(tail, 0, FRAME_TAIL_BYTES)
+        if timing is not None:
+            timing.bytesRead += count
+        if count != FRAME_TAIL_BYTES or (tail != IDLE_BYTE).any():
+            return False
+        return not self.FRAME_MARKER_CHECK or frame_markers_valid(
+            array[1:], self.numChannelsOnReceive, self.recordPoints * self.messageBytes + 2)
+
+    def _readFrameOnce(self, array: np.ndarray, timing: Optional[FrameTiming] = None) -> np.ndarray:
+        payload, polls = self._waitForFrame(self.totalBytes, timing)
+        start = time.perf_counter()
 
         # -------------------------
-        # Send acquisition command and wait
+        # Read the rest of the frame in chunks straight into the frame buffer
         # -------------------------
-        self.spiDevice.write(b'faaaa')
-        time.sleep(self.numAverages / self.prf)
+        received = len(payload)
+        array[1:1 + received] = payload
+        self._readSpiDeviceInto(array, 1 + received, self.totalBytes - received)
+        if timing is not None:
+            timing.mark(PHASE_TRANSFER, start)
+            timing.bytesRead += self.totalBytes - received
+            timing.retries = self.spiDevice.readRetries - timing._retriesAtStart
+        return array
+
+    def _waitForFrame(self, frameBytes: int, timing: Optional[FrameTiming] = None) -> tuple[np.ndarray, int]:
+        """
+        Waits for the frame triggered last to be ready: sleeps until it is expected, then
+        reads blocks of up to READY_BLOCK_BYTES every READ_DELAY until one holds the ready
+        sentinel. The expected time is numAverages / prf after the trigger plus the latency
+        measured on previous frames.
+
+        Args:
+            frameBytes (int): Length of the frame after the sentinel. Blocks never read past it.
+            timing (Optional[FrameTiming]): Timing of the frame, from _startFrameTiming.
+
+        Returns:
+            tuple[numpy.ndarray, int]: The first bytes of the frame, read along with the sentinel
+                (a view valid until the next poll), and the number of blocks read.
 
-        byteBack = 0
-        while byteBack != 100:
-            Byte = self.spiDevice.read(1)
+        Raises:
+            TimeoutError: If the frame is not ready READY_TIMEOUT seconds after it was due. The
+                device may still send it later.
+        """
+        assert self.spiDevice is not None
+        start = time.perf_counter()
+        nominal = self.numAverages / self.prf
+        remaining = self._triggeredAt + nominal + self._readyLatency - start
+        if remaining > 0:
+            time.sleep(remaining)
+        if timing is not None:
+            timing.mark(PHASE_WAIT, start)
+            start = time.perf_counter()
+
+        blockBytes = max(1, min(self.READY_BLOCK_BYTES, frameBytes + 1))
+        if self._readyBuffer is None or len(self._readyBuffer) != blockBytes:
+            self._readyBuffer = np.empty(blockBytes, dtype=np.uint8)
+        block = self._readyBuffer
+        deadline = self._triggeredAt + nominal + self.READY_TIMEOUT
+        polls = 0
+        received = 0
+        while True:
+            count = self.spiDevice.read_into(block, 0, blockBytes)
+            polls += 1
+            received += count
+            sentinel = np.flatnonzero(block[:count] == READY_BYTE)
+            if len(sentinel):
+                break
+            if time.perf_counter() > deadline:
+                raise TimeoutError(
+                    f"Device did not signal a ready frame within {nominal + self.READY_TIMEOUT:.3f} s of the trigger.")
             time.sleep(self.READ_DELAY)
-            byteBack = np.frombuffer(Byte, dtype=np.uint8)
 
-        # -------------------------
-        # Read all bytes in chunks if necessary
-        # -------------------------
-        bytesBack = bytearray()
-        remainingBytes = self.totalBytes
+        # A frame ready at the first poll may have been ready earlier: probe earlier next time
+        latency = time.perf_counter() - self._triggeredAt - nominal
+        if polls == 1:
+            self._readyLatency = max(0.0, self._readyLatency - self.READ_DELAY)
+        else:
+            self._readyLatency = max(0.0, self._readyLatency + READY_LATENCY_GAIN * (latency - self._readyLatency))
 
-        while remainingBytes > self.MAX_READ_CHUNK:
-            bytesBack += self.spiDevice.read(self.MAX_READ_CHUNK)
-            remainingBytes -= self.MAX_READ_CHUNK
-        bytesBack += self.spiDevice.read(remainingBytes)
+        if timing is not None:
+            timing.mark(PHASE_READY, start)
+            timing.pollIterations += polls
+            timing.bytesRead += received
+        return block[sentinel[0] + 1:count], polls
 
-        array = np.frombuffer(bytesBack, dtype=np.uint8)
-        array = np.insert(array, 0, 100)  # Sentinel
+    def _decodeFrame(self, array: np.ndarray, dtype: npt.DTypeLike = np.float64,
+                     raw: bool = False, out: Optional[np.ndarray] = None,
+                     timing: Optional[FrameTiming] = None) -> np.ndarray[tuple[int, int], np.dtype[Any]]:
+        """
+        Decodes a raw frame filled by _acquireFrameInto into the echo signal,
+        updating the peripheral readings on the way. See getArray for dtype, raw and out.
+        The timing of the frame, if any, is completed and reported.
 
-        dataStartingPoint = len(array) - 1 - self.additionalBytes + 2
-        self.messageArray: list[int] = []
-        msg_array: list[str] = []
-        for i in range(len(self.peripheralsOnArray)):
-            activeFunction = self.functionArray[i]
-            if self.peripheralsOnArray[i] == 1:
-                indices = np.arange(dataStartingPoint,
-                                    dataStartingPoint + self.bytesArray[i])
-                dataStartingPoint += self.bytesArray[i]
-                result = activeFunction(array[indices])
-                message = f"{self.sensorArray[i]}: {result}"
-                if (self.sensorArray[i] == "Internal Temperature"):
-                    self.internalTemp = result
-                if (self.sensorArray[i] == "External Temperature"):
-                    self.externalTemp = result
-                if (self.sensorArray[i] == "Encoder 1"):
-                    self.encoder1 = result
-                if (self.sensorArray[i] == "Encoder 2"):
-                    self.e2 = result
-                if (self.sensorArray[i] == "Encoder Cart X"):
-                    self.ex = result
-                if (self.sensorArray[i] == "Encoder Cart Y"):
-                    self.ey = result
-                if (self.sensorArray[i] == "Encoder Cart Theta"):
-                    self.etheta = result
-
-                self.messageArray.append(result)
-                msg_array.append(message)
-
-        # Remove peripheral bytes
-        indicesToDelete = np.arange(-1 * (self.additionalBytes + 1), -1)
-        array = np.delete(array, indicesToDelete)
+        Returns:
+            numpy.ndarray: Echo signal data for all enabled channels with shape
+                        (numChannelsOn, recordPoints).
+        """
+        start = time.perf_counter()
+        if self.peripheralRawDtype.itemsize != self.additionalBytes:
+            self._configurePeripheralLayout()
+        # The trailer is viewed in place, the frame is never copied
+        self._decodePeripherals(array[self.totalDataBytes + 1:])
+        if timing is not None:
+            timing.mark(PHASE_PERIPHERALS, start)
+            start = time.perf_counter()
 
         # -------------------------
-        # Convert to binary string
+        # Decode samples
         # -------------------------
-        arr_uint8 = array.astype(np.uint8)
+        # Channel data is everything before the peripheral bytes; viewed, not copied
+        channel = array[:self.totalDataBytes + 1].reshape(
+            self.numChannelsOnReceive, -1)
+        channel = channel[:, 1:-1]  # Trim first and last markers
+
+        byteArray = channel.reshape(
+            self.numChannelsOnReceive, self.recordPoints, self.messageBytes)
+        shape = (self.numChannelsOnReceive, self.recordPoints)
+        if out is not None:
+            self._checkOutputArray(out, raw)
+            echoSignal = out
+        else:
+            echoSignal = np.empty(shape, dtype=np.int32 if raw else self._checkOutputDtype(dtype))
+        decode_echo_signal(byteArray, self.numAverages, self._channelSigns(),
+                           echoSignal, self._sampleScratch(), raw)
+        if timing is not None:
+            timing.mark(PHASE_DECODE, start)
+            self._finishFrameTiming(timing)
+        return echoSignal
 
-        def _to_binary(x: int) -> str:
-            return format(x, '08b')
-        binary_strings = np.vectorize(_to_binary)(arr_uint8)
+    def _sampleScratch(self) -> np.ndarray:
+        """
+        Returns the float64 block buffer of decode_echo_signal, reused across frames by the calling thread.
+        """
+        samples = getattr(self._scratch, "samples", None)
+        if samples is None:
+            samples = self._scratch.samples = np.empty(DECODE_BLOCK_SAMPLES, dtype=np.float64)
+        return samples
+
+    def startAcquisition(self, numBuffers: int = 8, backpressure: str = BACKPRESSURE_BLOCK,
+                         dtype: npt.DTypeLike = np.float64, raw: bool = False,
+                         decode: bool = True) -> VitesseStream:
+        """
+        Starts background acquisition: a producer thread keeps triggering the device and
+        reading raw frames into a bounded ring of preallocated buffers, while the caller
+        iterates over decoded frames. getArray cannot be used until the stream is stopped.
 
-        channel = np.split(binary_strings, self.numChannelsOnReceive)
-        channel = [ch[1:-1] for ch in channel]  # Trim first and last markers
+        Args:
+            numBuffers (int): Maximum number of acquired frames waiting to be consumed.
+            backpressure (str): What to do when the ring is full: "block" the producer,
+                "drop-oldest" or "drop-newest". Dropped frames are counted in droppedFrames.
+            dtype (npt.DTypeLike): See getArray.
+            raw (bool): See getArray.
+            decode (bool): If False, the stream yields undecoded (frame, layout) pairs as returned
+                by getRawFrame, leaving the decoding to decode_frame. Not available in simulation
+                or with binaries older than 3000.
 
-        byteArray = np.empty(
-            (self.numChannelsOnReceive, self.recordPoints, self.messageBytes), dtype='<U8')
-        reshapeArray = np.empty(
-            (self.numChannelsOnReceive, self.recordPoints), dtype=float)
-        normArray = np.empty(
-            (self.numChannelsOnReceive, self.recordPoints), dtype=float)
-        echoSignal = np.empty(
-            (self.numChannelsOnReceive, self.recordPoints), dtype=float)
+        Returns:
+            VitesseStream: The running stream.
 
-        for i in range(self.numChannelsOnReceive):
-            byteArray[i] = np.reshape(channel[i], (-1, self.messageBytes))
-            temp: list[float] = []
-            for row in byteArray[i]:
-                joined = ''.join(row.tolist())
-                if self.messageBytes == 2:
-                    temp.append(float16_to_decimal(joined))
-                elif self.messageBytes == 3:
-                    temp.append(float24_to_decimal(joined))
-            reshapeArray[i] = np.array(temp)
-            normArray[i] = np.divide(reshapeArray[i], self.numAverages)
+        Raises:
+            IOError: If SPI device is not initialised.
+            RuntimeError: If an acquisition stream is already running, or decode is False
+                without raw frames to capture.
+        """
+        if self.spiDevice is None:
+            raise IOError(
+                "SPI Device not initialised. Perhaps you forgot to call initialise()")
+        if self._stream is not None and self._stream.running:
+            raise RuntimeError("An acquisition stream is already running.")
+
+        if not decode:
+            layout = self._rawFrameLayout()
+
+            def copyFrame(acquired: tuple[np.ndarray, Optional[FrameTiming]]) -> tuple[np.ndarray, FrameLayout]:
+                frame, timing = acquired
+                self._finishFrameTiming(timing)
+                # The ring buffer is recycled once handed over, so the consumer gets its own copy
+                return frame[1:].copy(), layout
+
+            self._stream = VitesseStream(
+                self._newFrameBuffer, self._acquireTimedFrame, copyFrame,
+                numBuffers, backpressure)
+        elif self.simulation:
+            self._stream = VitesseStream(
+                lambda: None, lambda _: self._getArraySimulated(),
+                lambda frame: self._convertEchoSignal(frame, dtype, raw, inverted=False),
+                numBuffers, backpressure)
+        elif self.version < 3000:
+            self._stream = VitesseStream(
+                lambda: None, lambda _: self._getArrayLegacy(self._startFrameTiming()),
+                lambda frame: self._convertEchoSignal(frame, dtype, raw),
+                numBuffers, backpressure)
+        else:
+            self._stream = VitesseStream(
+                self._newFrameBuffer, self._acquireTimedFrame,
+                lambda frame: self._decodeFrame(frame[0], dtype, raw, timing=frame[1]),
+                numBuffers, backpressure)
+        return self._stream.start()
 
-            if self.maxChannels <= 4:
-                inversionArray = [0, 3]
-            else:
-                inversionArray = [0, 1, 6, 7]
+    def _checkStreamStopped(self) -> None:
+        """
+        Raises RuntimeError if an acquisition stream is running and the caller is not its
+        producer thread: any other command would interleave with the frames of the stream.
+        """
+        stream = self._stream
+        if stream is not None and stream.running and stream._thread is not threading.current_thread():
+            raise RuntimeError(
+                "An acquisition stream is running; stop it with stopAcquisition() before sending commands.")
 
-            # Conditional inversion for specific channel IDs
-            if self.enabledChannelReceive[i] in inversionArray:
-                echoSignal[i] = np.subtract(normArray[i], 2048) * -1
-            else:
-                echoSignal[i] = np.subtract(normArray[i], 2048)
+    def stopAcquisition(self) -> Self:
+        """
+        Stops the background acquisition started by startAcquisition, if any.
 
-        return echoSignal
+        Returns:
+            Self: Returns the instance for method chaining.
+        """
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream = None
+        return self
+
+    def stream(self, maxFrames: Optional[int] = None, numBuffers: int = 8, backpressure: str = BACKPRESSURE_BLOCK,
+               dtype: npt.DTypeLike = np.float64, raw: bool = False, decode: bool = True) -> Iterator[Any]:
+        """
+        Iterates over decoded frames acquired in the background, stopping the acquisition
+        when the iteration ends.
 
-    def _getArrayLegacy(self) -> np.ndarray[tuple[int, int], np.dtype[np.float64]]:
+        Args:
+            maxFrames (Optional[int]): Number of frames to yield. Runs until the caller stops iterating if None.
+            numBuffers (int): See startAcquisition.
+            backpressure (str): See startAcquisition.
+            dtype (npt.DTypeLike): See getArray.
+            raw (bool): See getArray.
+            decode (bool): See startAcquisition.
+
+        Yields:
+            numpy.ndarray: Echo signal data with shape (numChannelsOn, recordPoints), or
+                        (frame, layout) pairs if decode is False.
+        """
+        acquisition = self.startAcquisition(numBuffers, backpressure, dtype, raw, decode)
+        try:
+            for count, frame in enumerate(acquisition):
+                yield frame
+                if maxFrames is not None and count + 1 >= maxFrames:
+                    break
+        finally:
+            self.stopAcquisition()
+
+    def _getArrayLegacy(self, timing: Optional[FrameTiming] = None) -> np.ndarray[tuple[int, int], np.dtype[np.float64]]:
         """
         Acquires data array from older Vitesse devices. Older legacy version,
         only triggered as a fallback.
 
+        Args:
+            timing (Optional[FrameTiming]): Timing of the frame, from _startFrameTiming.
+
         Returns:
             numpy.ndarray: Echo signal data for all enabled channels with shape
                           (numChannelsOn, recordPoints).
 
         Raises:
-            IOError: If SPI device is not initialised.
+            IOError: If SPI device is not initialised, or the frame is lost to read errors twice.
         """
         if self.spiDevice is None:
             raise IOError(
@@ -1233,23 +2344,38 @@ class Vitesse:
         for i in range(len(self.peripheralsOnArray)):
             additionalBytes += self.bytesArray[i]*self.peripheralsOnArray[i]
 
-        self.spiDevice.write(b'faaaa')
-        time.sleep(self.numAverages/self.prf)
-
-        byteBack = 0
-
-        while byteBack != 100:
-            Byte = self.spiDevice.read(1)
-            time.sleep(self.READ_DELAY)
-            byteBack = np.frombuffer(Byte, dtype=np.uint8)
-
-        remainingBytes = int(self.recordPoints*self.messageBytes *
-                             self.numChannelsOnReceive+2*self.numChannelsOnReceive-1) + additionalBytes
-        bytesBack = bytearray()
-        while remainingBytes > self.MAX_READ_CHUNK:
-            remainingBytes -= self.MAX_READ_CHUNK
-            bytesBack += self.spiDevice.read(self.MAX_READ_CHUNK)
-        bytesBack += self.spiDevice.read(remainingBytes)
+        frameBytes = int(self.recordPoints*self.messageBytes *
+                         self.numChannelsOnReceive+2*self.numChannelsOnReceive-1) + additionalBytes
+        for attempt in range(2):
+            try:
+                if attempt > 0:
+                    # The channel recovered from a read error: drain and acquire again
+                    self._clearBuffer()
+                start = time.perf_counter()
+                self.spiDevice.write(b'faaaa')
+                self._triggeredAt = time.perf_counter()
+                if timing is not None:
+                    timing.mark(PHASE_TRIGGER, start, self._triggeredAt)
+
+                payload, _ = self._waitForFrame(frameBytes, timing)
+                start = time.perf_counter()
+
+                bytesBack = bytearray(payload)
+                remainingBytes = frameBytes - len(bytesBack)
+                while remainingBytes > self.MAX_READ_CHUNK:
+                    remainingBytes -= self.MAX_READ_CHUNK
+                    bytesBack += self.spiDevice.read(self.MAX_READ_CHUNK)
+                if remainingBytes > 0:
+                    bytesBack += self.spiDevice.read(remainingBytes)
+                break
+            except sbftdi.ReadRecoveredError:
+                if attempt > 0:
+                    raise
+        if timing is not None:
+            timing.mark(PHASE_TRANSFER, start)
+            timing.bytesRead += frameBytes - len(payload)
+            timing.retries = self.spiDevice.readRetries - timing._retriesAtStart
+            start = time.perf_counter()
 
         array = np.frombuffer(bytesBack, dtype=np.uint8)
         array = np.insert(array, 0, 100)
@@ -1303,6 +2429,9 @@ class Vitesse:
             else:
                 echoSignal[i] = np.subtract(normArray[i], 2048)
 
+        if timing is not None:
+            timing.mark(PHASE_DECODE, start)
+            self._finishFrameTiming(timing)
         return echoSignal
 
     def setSleepTime(self, sleepTime: int) -> Self:
@@ -1344,7 +2473,7 @@ class Vitesse:
 
             try:
                 # Preferred path: device returns 0x32 and _writeSpiDevice consumes it.
-                self._writeSpiDevice(check_shm_command)
+                self._writeSpiDevice(check_shm_command, immediate=True)
             except ValueError:
                 raise ValueError(
                     "check_shm_command: device returned 'Invalid' (200) for checkShm command.")
@@ -1377,18 +2506,18 @@ class Vitesse:
         Closes the connection to the Vitesse device.
 
         Raises:
-            IOError: If SPI device is not initialised.
+            IOError: If SPI device is not initialised, or it does not return to its idle pattern.
         """
         if self.spiDevice is None:
             raise IOError(
                 "SPI Device not initialised. Perhaps you forgot to call initialise()")
 
+        self.stopAcquisition()
+        self.invalidateShadow()
+
         if not self.simulation:
             # Clearing the buffer
-            finalarray = [0, 0, 0]
-            while finalarray[-1] != 200 or finalarray[-2] != 200 or finalarray[-3] != 200:
-                finalarray = np.frombuffer(
-                    self.spiDevice.read(1000), dtype=np.uint8)
+            self._clearBuffer()
             return
 
         self.setChannelReceive([0, 0, 0, 0, 0, 0, 0, 0])
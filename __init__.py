@@ -1 +1,10 @@
 from .VitesseAPI import Vitesse, initialiseVitesse  # type: ignore
+from .asyncVitesse import AsyncVitesse  # type: ignore
+from .vitesseProfile import VitesseProfile  # type: ignore
+from .layout import FrameLayout, decode_frame, check_frame  # type: ignore
+from .recording import RecordingWriter, RecordingReader  # type: ignore
+from .replay import SessionRecorder, ReplayFtdiChannel  # type: ignore
+from .emulator import VitesseEmulator  # type: ignore
+from .timing import FrameTiming, TimingStats  # type: ignore
+from .transport import TransportProfile  # type: ignore
+from .group import VitesseGroup, FrameSet  # type: ignore
@@ -0,0 +1,226 @@
+from __future__ import annotations
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Optional, TypeVar
+import numpy as np
+import numpy.typing as npt
+from .VitesseAPI import Vitesse, CommandBatch
+from . import sonoboticsFTDI as sbftdi
+
+T = TypeVar("T")
+
+
+class AsyncVitesse:
+    """
+    asyncio facade over a Vitesse device.
+
+    Every blocking FTDI call runs on a dedicated single-thread executor owned by this
+    device, so calls reach the device in order and never block the event loop. The waits
+    of the protocol (encoder clearing, the numAverages / prf acquisition time and the
+    READ_DELAY before reading the status of configuration commands) are awaited on the
+    event loop instead of sleeping on the device thread. Queries that read a value back
+    (version, frequency) still wait on the device thread.
+
+    Methods mirror the camelCase names of the Vitesse class; set_config and get_array are
+    provided as aliases of setConfig and getArray.
+    """
+
+    def __init__(self, device: Optional[Vitesse] = None):
+        self.device: Vitesse = device if device is not None else Vitesse()
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="Vitesse")
+        # Serialises multi-step transactions (e.g. trigger, wait, read) between coroutines
+        self._lock: Optional[asyncio.Lock] = None
+        self._frameBuffer: Optional[np.ndarray] = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, _type, _value, _traceback):  # type: ignore
+        await self.closeDevice()
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        # Created lazily so that it binds to the running event loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def run(self, function: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Runs a blocking callable on the device thread, e.g.
+        await AV.run(AV.device.setAverages, 100).
+
+        Returns:
+            The return value of the callable.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(function, *args, **kwargs))
+
+    async def configure(self, function: Callable[..., Any], *args: Any, **kwargs: Any) -> CommandBatch:
+        """
+        Runs a configuration call on the device thread with its commands queued in a batch,
+        e.g. await AV.configure(AV.device.setAverages, 100), then sends the batch, awaiting
+        READ_DELAY on the event loop between each write and the read of its status bytes.
+
+        Returns:
+            CommandBatch: The sent commands and their status bytes.
+
+        Raises:
+            ValueError: If the device returns invalid response (200) to a command.
+            RuntimeError: If a device operation fails (other response codes), or an
+                acquisition stream is running.
+        """
+        device = self.device
+        batch = await self.run(self._queue, function, *args, **kwargs)
+        try:
+            await self._sendBatch(batch)
+        except BaseException:
+            # Queued values were recorded in the shadow but may never have reached the device
+            device.invalidateShadow()
+            raise
+        return batch
+
+    def _queue(self, function: Callable[..., Any], *args: Any, **kwargs: Any) -> CommandBatch:
+        # Runs on the device thread; nested batch() blocks join this batch
+        device = self.device
+        device._batch = batch = CommandBatch()
+        try:
+            function(*args, **kwargs)
+        except BaseException:
+            device.invalidateShadow()
+            raise
+        finally:
+            device._batch = None
+        return batch
+
+    async def _sendBatch(self, batch: CommandBatch) -> None:
+        """
+        Asynchronous counterpart of Vitesse._flushBatch.
+        """
+        device = self.device
+        if not batch.pending or device.spiDevice is None:
+            return
+        device._checkStreamStopped()
+        commands, batch.pending = batch.pending, []
+        statuses: list[int] = []
+        try:
+            for chunk in device._batchChunks(commands):
+                await self.run(device.spiDevice.write, b''.join(chunk))
+                await asyncio.sleep(device.READ_DELAY)
+                statuses += list(await self.run(device.spiDevice.read, len(chunk)))
+        except sbftdi.ReadRecoveredError:
+            # Which commands were applied is unknown
+            await self.run(device._clearBuffer)
+            device.invalidateShadow()
+            raise
+        device._checkBatchStatuses(batch, commands, statuses)
+
+    async def initialise(self, serialNumber: Optional[str] = None, simulation: bool = False) -> AsyncVitesse:
+        """
+        Initialises a connected Vitesse device, or a virtual (simulated) device if simulation == True.
+        See Vitesse.initialise.
+
+        Returns:
+            AsyncVitesse: Returns the instance for method chaining.
+        """
+        async with self.lock:
+            await self.run(self.device._connect, serialNumber, simulation)
+        if not self.device.simulation:
+            # Load default parameters
+            await self.setConfig(clearEncoders=True)
+        return self
+
+    async def clearEncoders(self) -> AsyncVitesse:
+        """
+        Clears the encoders on the FPGA. See Vitesse.clearEncoders.
+
+        Returns:
+            AsyncVitesse: Returns the instance for method chaining.
+        """
+        if self.device.version < 1000:
+            return self
+        async with self.lock:
+            await self.configure(self.device.clearCounterEnable, [0, 0, 0, 0, 0, 0, 0, 0])
+            await asyncio.sleep(1)
+            await self.configure(self.device.clearCounterEnable, [1, 0, 0, 0, 0, 0, 0, 0])
+        return self
+
+    async def setConfig(self, clearEncoders: bool = False, **kwargs: Any) -> AsyncVitesse:
+        """
+        Configures the Vitesse device. Accepts the same parameters as Vitesse.setConfig.
+        The commands are sent as one batch, see configure.
+
+        Returns:
+            AsyncVitesse: Returns the instance for method chaining.
+        """
+        if clearEncoders:
+            await self.clearEncoders()
+        async with self.lock:
+            await self.configure(self.device.setConfig, clearEncoders=False, **kwargs)
+        return self
+
+    set_config = setConfig
+
+    async def getArray(self, dtype: npt.DTypeLike = np.float64, raw: bool = False,
+                       out: Optional[np.ndarray] = None) -> np.ndarray[tuple[int, int], np.dtype[Any]]:
+        """
+        Acquires data array from the Vitesse device. See Vitesse.getArray for dtype, raw and out.
+
+        Returns:
+            numpy.ndarray: Echo signal data for all enabled channels with shape
+                        (numChannelsOn, recordPoints).
+
+        Raises:
+            RuntimeError: If an acquisition stream of the device is running.
+        """
+        device = self.device
+        if device._stream is not None and device._stream.running:
+            raise RuntimeError(
+                "An acquisition stream is running; read frames from the stream instead.")
+        async with self.lock:
+            if device.simulation or device.version < 3000:
+                return await self.run(device.getArray, dtype, raw, out)
+
+            frameLength = device.totalBytes + 1
+            if self._frameBuffer is None or len(self._frameBuffer) != frameLength:
+                self._frameBuffer = device._newFrameBuffer()
+            if out is not None:
+                device._checkOutputArray(out, raw)
+
+            await self.run(device._triggerFrame)
+            await asyncio.sleep(device.numAverages / device.prf)
+            await self.run(device._readFrameInto, self._frameBuffer)
+            return await self.run(device._decodeFrame, self._frameBuffer, dtype, raw, out)
+
+    get_array = getArray
+
+    async def stream(self, maxFrames: Optional[int] = None, dtype: npt.DTypeLike = np.float64,
+                     raw: bool = False) -> AsyncIterator[np.ndarray[tuple[int, int], np.dtype[Any]]]:
+        """
+        Asynchronously iterates over consecutive frames.
+
+        Args:
+            maxFrames (Optional[int]): Number of frames to yield. Runs until the caller stops iterating if None.
+            dtype (npt.DTypeLike): See Vitesse.getArray.
+            raw (bool): See Vitesse.getArray.
+
+        Yields:
+            numpy.ndarray: Echo signal data with shape (numChannelsOn, recordPoints).
+        """
+        count = 0
+        while maxFrames is None or count < maxFrames:
+            yield await self.getArray(dtype, raw)
+            count += 1
+
+    async def closeDevice(self) -> None:
+        """
+        Closes the connection to the Vitesse device and stops the device thread.
+        """
+        try:
+            if self.device.spiDevice is not None:
+                async with self.lock:
+                    await self.run(self.device.closeDevice)
+        finally:
+            self._executor.shutdown(wait=False)
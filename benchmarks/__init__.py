@@ -0,0 +1 @@
+from .suite import runBenchmarks, compareResults, saveResults, loadResults  # type: ignore
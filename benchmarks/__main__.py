@@ -0,0 +1,55 @@
+"""
+Runs the benchmark suite offline and optionally compares it with a stored baseline.
+
+    python -m VitesseAPI.benchmarks --output results.json
+    python -m VitesseAPI.benchmarks --compare baseline.json --tolerance 0.1
+
+Exits with status 1 if any benchmark regressed beyond the tolerance.
+"""
+from __future__ import annotations
+import argparse
+import sys
+from tabulate import tabulate
+from .suite import runBenchmarks, compareResults, saveResults, loadResults
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m VitesseAPI.benchmarks",
+                                     description="Vitesse API benchmark suite.")
+    parser.add_argument("--output", "-o", help="Write the results as JSON to this file.")
+    parser.add_argument("--compare", "-c", help="Baseline JSON results to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Relative slowdown tolerated before flagging a regression (default 0.1).")
+    parser.add_argument("--quick", action="store_true", help="Run a reduced configuration matrix.")
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="Minimum measuring time per benchmark in seconds (default 0.2).")
+    parser.add_argument("--read-delay", type=float, default=None,
+                        help="READ_DELAY of the device in seconds (default: library default).")
+    parser.add_argument("--bandwidth", type=float, default=None,
+                        help="USB throughput modelled by the emulator in bytes/s (default: unlimited).")
+    parser.add_argument("--transfer-latency", type=float, default=0.0,
+                        help="Per-transfer latency modelled by the emulator in seconds (default 0).")
+    args = parser.parse_args(argv)
+
+    results = runBenchmarks(args.quick, args.min_time, args.read_delay, args.bandwidth, args.transfer_latency,
+                            progress=lambda group: print(f"Running {group} benchmarks...", file=sys.stderr))
+    if args.output:
+        saveResults(results, args.output)
+
+    print(tabulate([[r["name"], r["metric"], f'{r["value"]:.4g}'] for r in results["results"]],
+                   headers=["Benchmark", "Metric", "Value"]))
+
+    if not args.compare:
+        return 0
+    comparison = compareResults(results, loadResults(args.compare), args.tolerance)
+    print()
+    print(tabulate([[c["name"], f'{c["baseline"]:.4g}', f'{c["current"]:.4g}', f'{c["change"]:+.1%}',
+                     "REGRESSION" if c["regression"] else ""] for c in comparison],
+                   headers=["Benchmark", "Baseline", "Current", "Change", ""]))
+    regressions = [c for c in comparison if c["regression"]]
+    print(f"\n{len(regressions)} regression(s) out of {len(comparison)} compared benchmarks.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+from __future__ import annotations
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+import numpy as np
+from ..VitesseAPI import Vitesse
+from ..emulator import VitesseEmulator
+
+# Format of the JSON results, bumped when benchmark names or metrics change meaning
+RESULTS_FORMAT = 1
+
+CHANNEL_COUNTS = [1, 2, 4, 8]
+RECORD_LENGTHS = [50e-6, 100e-6, 200e-6, 400e-6, 800e-6]
+SAMPLING_MODES = [16, 24]
+PERIPHERALS = {"off": [0, 0, 0, 0, 0, 0, 0, 0], "on": [1, 1, 1, 1, 1, 1, 1, 0]}
+
+
+def maxRecordLength(numChannels: int) -> float:
+    """
+    Longest record the device supports for a channel count: 800 us on one channel, 100 us on eight.
+    """
+    return 800e-6 / numChannels
+
+
+def _channels(numChannels: int) -> list[int]:
+    return [1] * numChannels + [0] * (8 - numChannels)
+
+
+def timeCall(function: Callable[[], Any], minTime: float = 0.2, minRepeat: int = 5) -> list[float]:
+    """
+    Calls function repeatedly, after one warm-up call, for at least minTime seconds
+    and minRepeat calls.
+
+    Returns:
+        list[float]: Duration of every call in seconds.
+    """
+    function()
+    durations: list[float] = []
+    start = time.perf_counter()
+    while len(durations) < minRepeat or time.perf_counter() - start < minTime:
+        t = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - t)
+    return durations
+
+
+def peakMemory(function: Callable[[], Any]) -> int:
+    """
+    Returns the peak of memory allocated by one call of function, in bytes, NumPy buffers included.
+    """
+    function()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        function()
+        return tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+
+
+def _result(name: str, metric: str, value: float, higherIsBetter: bool, **details: Any) -> dict[str, Any]:
+    return {"name": name, "metric": metric, "value": float(value), "higherIsBetter": higherIsBetter, **details}
+
+
+def emulatedDevice(readDelay: Optional[float] = None, **emulatorArgs: Any) -> Vitesse:
+    """
+    Returns a Vitesse connected to a VitesseEmulator whose frames are ready at once,
+    so that only the host side is measured.
+    """
+    emulatorArgs.setdefault("seed", 0)
+    emulatorArgs.setdefault("realTime", False)
+    V = Vitesse()
+    if readDelay is not None:
+        V.READ_DELAY = readDelay
+    V.spiDevice = VitesseEmulator(**emulatorArgs)
+    V._handshake(V.spiDevice.maxChannels)
+    return V.setConfig()
+
+
+def benchmarkDecode(V: Vitesse, minTime: float, quick: bool = False) -> list[dict[str, Any]]:
+    """
+    Decode throughput of a frame already in memory, in samples per second, and the peak
+    memory allocated per decoded frame, over channel counts, record lengths, sampling
+    modes and peripherals.
+    """
+    results = []
+    for numChannels in ([1, 8] if quick else CHANNEL_COUNTS):
+        for recordLength in ([100e-6] if quick else RECORD_LENGTHS):
+            if recordLength > maxRecordLength(numChannels) * (1 + 1e-9):
+                continue
+            for samplingMode in SAMPLING_MODES:
+                for peripherals, peripheralsOnArray in PERIPHERALS.items():
+                    V.setConfig(channelsOnReceive=_channels(numChannels), recordLength=recordLength,
+                                samplingMode=samplingMode, peripheralsOnArray=peripheralsOnArray, PRF=1000)
+                    frame = V._newFrameBuffer()
+                    V._acquireFrameInto(frame)
+                    samples = V.numChannelsOnReceive * V.recordPoints
+                    durations = timeCall(lambda: V._decodeFrame(frame), minTime)
+                    name = f"decode/{numChannels}ch/{round(recordLength * 1e6)}us/{samplingMode}bit/peripherals-{peripherals}"
+                    details = dict(channels=numChannels, recordLength=recordLength, samplingMode=samplingMode,
+                                   peripherals=peripherals, samples=samples)
+                    results.append(_result(name, "samples_per_s", samples / statistics.median(durations),
+                                           True, **details))
+                    results.append(_result(name.replace("decode/", "memory/", 1), "peak_bytes_per_frame",
+                                           peakMemory(lambda: V._decodeFrame(frame)), False, **details))
+    return results
+
+
+def benchmarkAcquisition(V: Vitesse, minTime: float) -> list[dict[str, Any]]:
+    """
+    End-to-end getArray through the emulated channel, in frames per second. The
+    numAverages / prf wait of the real device is included (200 us here).
+    """
+    results = []
+    for numChannels in (1, 8):
+        V.setConfig(channelsOnReceive=_channels(numChannels), recordLength=100e-6,
+                    numAverages=1, PRF=5000)
+        durations = timeCall(V.getArray, minTime)
+        results.append(_result(f"getArray/emulated/{numChannels}ch/100us", "frames_per_s",
+                               1 / statistics.median(durations), True, channels=numChannels))
+    return results
+
+
+def benchmarkSimulation(minTime: float) -> list[dict[str, Any]]:
+    """
+    getArray in simulation mode, in frames per second, at a low and a high numAverages.
+    """
+    V = Vitesse().initialise(simulation=True).setSimulationSeed(0)
+    results = []
+    for numAverages in (1, 1000):
+        V.setConfig(numAverages=numAverages)
+        durations = timeCall(V.getArray, minTime)
+        results.append(_result(f"getArray/simulation/{numAverages}avg", "frames_per_s",
+                               1 / statistics.median(durations), True, numAverages=numAverages))
+    return results
+
+
+def benchmarkCommands(V: Vitesse, minTime: float) -> list[dict[str, Any]]:
+    """
+    Round-trip time of a single command through _writeSpiDevice, and setConfig wall time
+    with the register shadow cold (every command sent) and warm (nothing to send).
+    """
+    command: list[Union[str, int]] = ['3', 10, 0, 'a', 'a']
+    durations = timeCall(lambda: V._writeSpiDevice(command), minTime)
+    results = [
+        _result("command/roundtrip/median", "seconds", statistics.median(durations), False),
+        _result("command/roundtrip/p95", "seconds", float(np.percentile(durations, 95)), False),
+    ]
+
+    def coldSetConfig() -> None:
+        V.invalidateShadow()
+        V.setConfig()
+
+    V.setConfig()
+    results.append(_result("setConfig/cold", "seconds",
+                           statistics.median(timeCall(coldSetConfig, minTime)), False))
+    results.append(_result("setConfig/warm", "seconds",
+                           statistics.median(timeCall(V.setConfig, minTime)), False))
+    return results
+
+
+def runBenchmarks(quick: bool = False, minTime: float = 0.2, readDelay: Optional[float] = None,
+                  bandwidth: Optional[float] = None, transferLatency: float = 0.0,
+                  progress: Optional[Callable[[str], None]] = None) -> dict[str, Any]:
+    """
+    Runs the whole suite offline, against simulation and an emulated channel.
+
+    Args:
+        quick (bool): Run a reduced configuration matrix.
+        minTime (float): Minimum measuring time per benchmark, in seconds.
+        readDelay (Optional[float]): READ_DELAY of the device; the library default if None.
+        bandwidth (Optional[float]): USB throughput modelled by the emulator, see VitesseEmulator.
+        transferLatency (float): Per-transfer latency modelled by the emulator, see VitesseEmulator.
+        progress (Optional[Callable[[str], None]]): Called with the name of each group as it starts.
+
+    Returns:
+        dict[str, Any]: JSON-serialisable results, see compareResults.
+    """
+    V = emulatedDevice(readDelay, bandwidth=bandwidth, transferLatency=transferLatency)
+    results: list[dict[str, Any]] = []
+    groups: list[tuple[str, Callable[[], list[dict[str, Any]]]]] = [
+        ("decode", lambda: benchmarkDecode(V, minTime, quick)),
+        ("acquisition", lambda: benchmarkAcquisition(V, minTime)),
+        ("simulation", lambda: benchmarkSimulation(minTime)),
+        ("commands", lambda: benchmarkCommands(V, minTime)),
+    ]
+    for group, run in groups:
+        if progress is not None:
+            progress(group)
+        results += run()
+
+    return {
+        "format": RESULTS_FORMAT,
+        "meta": {
+            "created": time.time(),
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "quick": quick,
+            "readDelay": V.READ_DELAY,
+            "bandwidth": bandwidth,
+            "transferLatency": transferLatency,
+        },
+        "results": results,
+    }
+
+
+def compareResults(current: dict[str, Any], baseline: dict[str, Any],
+                   tolerance: float = 0.1) -> list[dict[str, Any]]:
+    """
+    Compares results against a stored baseline, benchmark by benchmark.
+
+    Args:
+        current (dict[str, Any]): Output of runBenchmarks.
+        baseline (dict[str, Any]): Output of runBenchmarks from an earlier run.
+        tolerance (float): Relative change tolerated before flagging a regression.
+
+    Returns:
+        list[dict[str, Any]]: One entry per benchmark present in both, with the baseline and current
+            values, the relative change (positive is better) and whether it is a regression.
+    """
+    previous = {result["name"]: result for result in baseline.get("results", [])}
+    comparison = []
+    for result in current["results"]:
+        old = previous.get(result["name"])
+        if old is None or old["metric"] != result["metric"] or old["value"] == 0:
+            continue
+        change = (result["value"] - old["value"]) / abs(old["value"])
+        if not result["higherIsBetter"]:
+            change = -change
+        comparison.append({"name": result["name"], "metric": result["metric"], "baseline": old["value"],
+                           "current": result["value"], "change": change, "regression": change < -tolerance})
+    return comparison
+
+
+def saveResults(results: dict[str, Any], path: Union[str, Path]) -> None:
+    Path(path).write_text(json.dumps(results, indent=2))
+
+
+def loadResults(path: Union[str, Path]) -> dict[str, Any]:
+    results = json.loads(Path(path).read_text())
+    if results.get("format") != RESULTS_FORMAT:
+        raise ValueError(
+            f"Unsupported benchmark results format {results.get('format')}.")
+    return results
@@ -0,0 +1,307 @@
+from __future__ import annotations
+import threading
+import time
+from typing import Callable, Optional, Union
+import numpy as np
+from .sonoboticsFTDI import ftdiChannel, WritableBuffer
+from .utils import float24_array_from_decimal, float16_array_from_decimal, channel_signs, load_simulator_ascans
+
+# Bytes clocked out by the device
+STATUS_OK = 50
+STATUS_INVALID = 200  # Also what an idle device returns, hence the three-200 idle pattern
+READY_BYTE = 100      # Precedes a frame, and doubles as the start marker of the first channel
+FRAME_MARKER = 100    # Start and end markers of the channel blocks and of the trailer (assumed, see utils.FRAME_MARKER)
+
+COMMAND_BYTES = 5
+# Wire size of each peripheral, in the order of Vitesse.peripheralsOnArray
+PERIPHERAL_BYTES = [2, 2, 4, 4, 4, 4, 4, 0]
+PULSE_FREQUENCY = int(200e6)
+
+# Default firmware version: major 27, with drive channels and encoder constants
+DEFAULT_VERSION = 6944
+
+
+def _simulatorSignal(channels: np.ndarray, recordPoints: int) -> np.ndarray:
+    """
+    Default echo signal: the first reference A-scan of the simulator, on every channel.
+    """
+    ascan = np.resize(load_simulator_ascans()[0], recordPoints)
+    return np.broadcast_to(ascan, (len(channels), recordPoints))
+
+
+class VitesseEmulator(ftdiChannel):
+    """
+    Channel emulating the SPI protocol of a Vitesse device, so that the real code path
+    (command encoding, status bytes, ready detection, framing and decoding) runs without
+    hardware. Connect with Vitesse.initialiseChannel.
+
+    Every 5-byte command is acknowledged with a status byte (50, or 200 if invalid), in
+    order, also when several commands arrive in one write. 'v' and 's' follow their status
+    with the version and the ADC frequency, and 'g' answers with the SHM flag. 'f' triggers
+    a frame: after the acquisition time the device answers with the ready byte, the Float24
+    or Float16 accumulator codes of each enabled channel between marker bytes, and the
+    peripheral trailer. With nothing to send, the device clocks out 200s.
+
+    Args:
+        version (int): Firmware version reported by 'v'. Binaries older than 3000 are not emulated.
+        maxChannels (int): Number of channels of the device.
+        signal (Optional[Callable[[np.ndarray, int], np.ndarray]]): Returns the echo signal, as
+            getArray would decode it without noise, for the given channel IDs and record points.
+            Defaults to a reference A-scan of the simulator.
+        noise (float): Standard deviation of the noise of one pulse; averaging reduces it by sqrt(numAverages).
+        seed (Optional[int]): Seed of the noise generator.
+        bandwidth (Optional[float]): USB throughput in bytes per second; unlimited if None.
+        transferLatency (float): Fixed cost in seconds of every read or write call, e.g. the USB latency timer.
+        commandLatency (float): Firmware processing time in seconds before a frame is ready, on top of
+            numAverages / prf.
+        realTime (bool): Model the acquisition time of frames. If False, frames are ready at once.
+        isSHM (bool): Emulate an SHM system, which answers 'g' and accepts 'e' and 'r'.
+        encoderStep (int): Counts added to both encoders at every frame.
+    """
+
+    def __init__(self,
+                 version: int = DEFAULT_VERSION,
+                 maxChannels: int = 8,
+                 signal: Optional[Callable[[np.ndarray, int], np.ndarray]] = None,
+                 noise: float = 100.0,
+                 seed: Optional[int] = None,
+                 bandwidth: Optional[float] = None,
+                 transferLatency: float = 0.0,
+                 commandLatency: float = 0.0,
+                 realTime: bool = True,
+                 isSHM: bool = False,
+                 encoderStep: int = 0):
+        super().__init__()
+        if version < 3000:
+            raise ValueError("Binaries older than 3000 are not emulated.")
+        self.version = version
+        self.maxChannels = maxChannels
+        self.signal = signal if signal is not None else _simulatorSignal
+        self.noise = noise
+        self.rng = np.random.default_rng(seed)
+        self.bandwidth = bandwidth
+        self.transferLatency = transferLatency
+        self.commandLatency = commandLatency
+        self.realTime = realTime
+        self.isSHM = isSHM
+        self.encoderStep = encoderStep
+
+        # Registers, as set by the commands
+        self.numChips = 1
+        self.numCycles = 1
+        self.channelsOnReceive = 0
+        self.channelsOnDrive = 0
+        self.numAverages = 1
+        self.prfCount = PULSE_FREQUENCY // 1000
+        self.adcThreshold = 0
+        self.recordPoints = 0
+        self.phase = [0] * 8
+        self.delay = [0] * 8
+        self.peripherals = 0
+        self.samplingMode = 24
+        self.adcFrequency = int(50e6)
+        self.encoderWheelbase = 0.0
+        self.encoderConstant = 0.0
+        self.sleepTime = 0
+        self.encoders = [0, 0]
+        self.internalTemp = 40.0
+        self.externalTemp = 25.0
+
+        self.framesTriggered = 0
+        self.commandsReceived = 0
+        self._lock = threading.Lock()
+        self._pending = bytearray()  # Partial command of the last write
+        self._output = bytearray()   # Bytes to clock out
+        self._frames: list[tuple[float, bytes]] = []  # Triggered frames and when they are ready
+
+    @property
+    def prf(self) -> float:
+        return PULSE_FREQUENCY / max(self.prfCount, 1)
+
+    @property
+    def enabledChannels(self) -> np.ndarray:
+        return np.flatnonzero([(self.channelsOnReceive >> i) & 1 for i in range(8)])
+
+    def _transfer(self, numBytes: int) -> None:
+        """
+        Waits for the time a transfer of numBytes takes on the modelled USB link.
+        """
+        cost = self.transferLatency
+        if self.bandwidth:
+            cost += numBytes / self.bandwidth
+        if cost > 0:
+            time.sleep(cost)
+
+    def write(self, data: Union[bytes, bytearray]) -> None:
+        super().write(data)
+        self._transfer(len(data))
+        with self._lock:
+            self._pending += data
+            while len(self._pending) >= COMMAND_BYTES:
+                command = bytes(self._pending[:COMMAND_BYTES])
+                del self._pending[:COMMAND_BYTES]
+                self.commandsReceived += 1
+                self._execute(command)
+
+    def _execute(self, command: bytes) -> None:
+        """
+        Applies one command and queues its answer. Must be called with the lock held.
+        """
+        code, args = chr(command[0]), command[1:]
+        reply = bytearray([STATUS_OK])
+
+        if code == '1':
+            if not (1 <= args[0] <= 100 and 1 <= args[1] <= 3):
+                reply[0] = STATUS_INVALID
+            else:
+                self.numChips, self.numCycles = args[0], args[1]
+        elif code == '2':
+            if bin(args[0]).count("1") > self.maxChannels:
+                reply[0] = STATUS_INVALID
+            else:
+                self.channelsOnReceive = args[0]
+        elif code == '3':
+            numAverages = args[0] | args[1] << 8
+            if not 1 <= numAverages <= 1000:
+                reply[0] = STATUS_INVALID
+            else:
+                self.numAverages = numAverages
+        elif code == '4':
+            self.prfCount = int.from_bytes(args, "little")
+        elif code == '5':
+            self.adcThreshold = args[1]
+        elif code == '6':
+            self.recordPoints = args[0] | args[1] << 8
+        elif code in '78':
+            values = self.phase if code == '7' else self.delay
+            if args[:1] == b'N':
+                values[:] = [0] * 8
+            elif args[0] < 8:
+                values[args[0]] = int.from_bytes(args[1:], "little")
+            else:
+                reply[0] = STATUS_INVALID
+        elif code == '9':
+            self.peripherals = args[0]
+        elif code == 'b':
+            self.samplingMode = 16 if args[0] == 2 else 24
+        elif code == 'c':
+            clocks = {0x80: int(100e6), 0x40: int(50e6), 0x20: int(25e6)}
+            if args[0] not in clocks:
+                reply[0] = STATUS_INVALID
+            else:
+                self.adcFrequency = clocks[args[0]]
+        elif code == 'd':
+            self.channelsOnDrive = args[0]
+        elif code == 'e' and self.isSHM:
+            pass
+        elif code == 'f':
+            self._trigger()
+            return  # The ready byte is the answer
+        elif code == 'g' and self.isSHM:
+            reply.append(1)
+        elif code == 'h':
+            self.encoderWheelbase = float(np.frombuffer(args, dtype=np.float32)[0])
+        elif code == 'i':
+            self.encoderConstant = float(np.frombuffer(args, dtype=np.float32)[0])
+        elif code == 'r' and self.isSHM:
+            self.sleepTime = args[0]
+        elif code == 's':
+            frequency = self.adcFrequency // 1000000
+            reply.append(frequency)
+        elif code == 'v':
+            reply += self.version.to_bytes(2, "big")
+        elif code == 'x':
+            # Counters are held cleared while bit 0 is low
+            if not args[0] & 1:
+                self.encoders = [0, 0]
+        else:
+            reply[0] = STATUS_INVALID
+
+        # Answers to commands queue behind frames still waiting to be read
+        if self._frames:
+            readyAt, frame = self._frames[-1]
+            self._frames[-1] = (readyAt, frame + bytes(reply))
+        else:
+            self._output += reply
+
+    def _trigger(self) -> None:
+        acquisitionTime = self.commandLatency
+        if self.realTime:
+            acquisitionTime += self.numAverages / self.prf
+        self._frames.append((time.perf_counter() + acquisitionTime, self.frame()))
+        self.framesTriggered += 1
+        self.encoders = [(e + self.encoderStep) & 0xFFFFFFFF for e in self.encoders]
+
+    def frame(self) -> bytes:
+        """
+        Builds the answer to a trigger for the current registers: the ready byte, then the
+        channel blocks and the peripheral trailer.
+        """
+        channels = self.enabledChannels
+        messageBytes = 2 if self.samplingMode == 16 else 3
+
+        echo = np.asarray(self.signal(channels, self.recordPoints), dtype=np.float64)
+        if self.noise:
+            echo = echo + self.rng.normal(0.0, self.noise / np.sqrt(self.numAverages), echo.shape)
+        # Accumulated ADC codes, as getArray inverts and offsets them
+        signs = channel_signs(self.maxChannels, list(channels))
+        codes = np.clip(echo * signs[:, None] + 2048, 0, 4095) * self.numAverages
+        if messageBytes == 2:
+            samples = float16_array_from_decimal(codes)
+        else:
+            samples = float24_array_from_decimal(codes)
+
+        blocks = np.full((len(channels), self.recordPoints * messageBytes + 2), FRAME_MARKER, dtype=np.uint8)
+        blocks[:, 1:-1] = samples.reshape(len(channels), -1)
+        blocks[0, 0] = READY_BYTE
+        return blocks.tobytes() + self._trailer()
+
+    def _trailer(self) -> bytes:
+        """
+        Marker byte, enabled peripherals and padding: additionalBytes in total.
+        """
+        values = [
+            (int(round((self.internalTemp + 273.15) * 4096 / 503.975)) << 4).to_bytes(2, "big"),
+            self._rtdCode(self.externalTemp).to_bytes(2, "big"),
+            self.encoders[0].to_bytes(4, "big"),
+            self.encoders[1].to_bytes(4, "big"),
+            np.float32(0).astype(">f4").tobytes(),
+            np.float32(0).astype(">f4").tobytes(),
+            np.float32(0).astype(">f4").tobytes(),
+            b"",
+        ]
+        trailer = bytearray([FRAME_MARKER])
+        for i, value in enumerate(values):
+            if (self.peripherals >> i) & 1:
+                trailer += value
+        additionalBytes = sum(PERIPHERAL_BYTES[i] * ((self.peripherals >> i) & 1) + 2 for i in range(8))
+        return bytes(trailer.ljust(additionalBytes, b"\0"))
+
+    @staticmethod
+    def _rtdCode(temperature: float) -> int:
+        """
+        PT100 reading at temperature, as read by ext_temp with a 3900 Ohm reference.
+        """
+        resistance = 100.0 * (1 + 3.9083e-3 * temperature - 5.775e-7 * temperature ** 2)
+        return int(round(resistance / 3900 * 32768)) << 1
+
+    def read(self, numBytes: int) -> bytes:
+        buffer = bytearray(numBytes)
+        self.read_into(buffer, 0, numBytes)
+        return bytes(buffer)
+
+    def read_into(self, buffer: WritableBuffer, offset: int, numBytes: int) -> int:
+        if self._closed:
+            raise IOError("Emulated device is closed.")
+        self._transfer(numBytes)
+        view = memoryview(buffer).cast('B')
+        with self._lock:
+            now = time.perf_counter()
+            while self._frames and self._frames[0][0] <= now:
+                self._output += self._frames.pop(0)[1]
+            count = min(numBytes, len(self._output))
+            view[offset:offset + count] = self._output[:count]
+            del self._output[:count]
+        # Nothing more to send: the device clocks out 200s
+        view[offset + count:offset + numBytes] = bytes([STATUS_INVALID]) * (numBytes - count)
+        return numBytes
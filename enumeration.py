@@ -0,0 +1,122 @@
+from __future__ import annotations
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+from . import sonoboticsFTDI as sbftdi
+
+# (serialNumber, deviceName, numberOfChannels), as returned by Vitesse.listDevices
+DeviceEntry = tuple[str, str, int]
+
+# Seconds a scan is reused for, and most devices probed at once
+DEVICE_CACHE_TTL = 5.0
+ENUMERATION_WORKERS = 8
+
+
+def vitesse_entry(eepromData: dict[str, Any]) -> Optional[DeviceEntry]:
+    """
+    Returns the listDevices entry described by the EEPROM of an FTDI device, or None if
+    the device is not a Vitesse.
+    """
+    manufacturer = eepromData['Manufacturer']
+    serialNumber = eepromData['Serial Number']
+    device = eepromData['Device']
+    if manufacturer == 'Sonobotics' and serialNumber != "0" and device[:1].isdigit():
+        return (serialNumber, device, int(device[0]))
+    return None
+
+
+def _probe(index: int) -> tuple[int, Optional[DeviceEntry]]:
+    """
+    Opens the FTDI device at index, reads its EEPROM and closes it.
+
+    Raises:
+        Exception: If the device cannot be opened or read, e.g. because another process has it open.
+    """
+    spiDevice = sbftdi.sonoboticsFtdiChannel("SPI", "deviceNum", index)
+    try:
+        return index, vitesse_entry(spiDevice.readEEPROM())
+    finally:
+        spiDevice.close()
+
+
+class DeviceEnumerator:
+    """
+    Cache of the Vitesse devices connected to the host, keyed by FTDI device index.
+
+    A scan probes the EEPROM of the devices in parallel and is reused for ttl seconds, as
+    long as the number of FTDI devices stays the same. Devices that could not be opened,
+    e.g. because they are in use, are remembered as such and left out until the scan expires.
+    Safe to use from several threads; scans never overlap.
+
+    Args:
+        ttl (float): Seconds a scan is reused for.
+        workers (int): Most devices probed at once.
+    """
+
+    def __init__(self, ttl: float = DEVICE_CACHE_TTL, workers: int = ENUMERATION_WORKERS):
+        self.ttl = ttl
+        self.workers = workers
+        self._lock = threading.Lock()
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """
+        Forgets every device, so that the next listing scans again.
+        """
+        # None for FTDI devices that are not Vitesse devices or could not be opened
+        self._entries: dict[int, Optional[DeviceEntry]] = {}
+        self._numDevices = -1
+        self._scannedAt = float("-inf")
+
+    def listDevices(self, refresh: bool = False) -> list[DeviceEntry]:
+        """
+        Returns the connected Vitesse devices, see Vitesse.listDevices.
+
+        Args:
+            refresh (bool): Scan again even if the last scan is still fresh.
+        """
+        with self._lock:
+            numDevices = sbftdi.getNumDevices()
+            if refresh or numDevices != self._numDevices or time.monotonic() - self._scannedAt > self.ttl:
+                self.invalidate()
+            unknown = [i for i in range(numDevices) if i not in self._entries]
+            if unknown:
+                self._scan(unknown)
+            self._numDevices = numDevices
+            return self._devices()
+
+    def lookup(self, serialNumber: str) -> Optional[DeviceEntry]:
+        """
+        Returns the entry of a device from a scan that is still fresh, without touching the
+        devices, or None if the scan is stale or did not find the device.
+        """
+        with self._lock:
+            if time.monotonic() - self._scannedAt > self.ttl:
+                return None
+            return next((entry for entry in self._devices() if entry[0] == serialNumber), None)
+
+    def _scan(self, indices: list[int]) -> None:
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(indices))),
+                                thread_name_prefix="VitesseProbe") as executor:
+            futures = [executor.submit(_probe, i) for i in indices]
+        for index, future in zip(indices, futures):
+            # Cannot connect to a device, probably because it's locked by other process (or
+            # this one); omit it until the scan expires
+            self._entries[index] = future.result()[1] if future.exception() is None else None
+        if self._scannedAt == float("-inf"):
+            self._scannedAt = time.monotonic()
+
+    def _devices(self) -> list[DeviceEntry]:
+        # Both channels of a device share its EEPROM; list it once, in index order
+        devices: list[DeviceEntry] = []
+        serialNumbers: set[str] = set()
+        for index in sorted(self._entries):
+            entry = self._entries[index]
+            if entry is not None and entry[0] not in serialNumbers:
+                devices.append(entry)
+                serialNumbers.add(entry[0])
+        return devices
+
+
+deviceEnumerator = DeviceEnumerator()
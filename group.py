@@ -0,0 +1,355 @@
+from __future__ import annotations
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Mapping, Optional, Sequence, TypeVar, Union
+if sys.version_info >= (3, 11):
+    from typing import Self
+else:
+    from typing_extensions import Self
+import numpy as np
+import numpy.typing as npt
+from .VitesseAPI import Vitesse
+from .vitesseProfile import VitesseProfile
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class FrameSet:
+    """
+    One frame from each device of a VitesseGroup, acquired together.
+
+    Attributes:
+        frames (dict[str, np.ndarray]): Echo signal of each device that returned a frame,
+            keyed by device name, see Vitesse.getArray.
+        timestamps (dict[str, float]): time.time() at which each device was triggered.
+        errors (dict[str, BaseException]): The error of each device that returned no frame.
+    """
+    frames: dict[str, np.ndarray]
+    timestamps: dict[str, float]
+    errors: dict[str, BaseException]
+
+    @property
+    def complete(self) -> bool:
+        """
+        Whether every device returned a frame.
+        """
+        return not self.errors
+
+    @property
+    def skew(self) -> float:
+        """
+        Seconds between the first and the last trigger of the set.
+        """
+        if not self.timestamps:
+            return 0.0
+        return max(self.timestamps.values()) - min(self.timestamps.values())
+
+
+class VitesseGroup:
+    """
+    Several Vitesse devices on one host, acquired concurrently.
+
+    Each device is driven by its own I/O thread, so calls reach a device in order while the
+    devices work in parallel. The blocking FTDI calls release the GIL, hence the throughput
+    grows with the number of devices. Devices are named by serial number.
+
+    Args:
+        devices (Optional[Union[Sequence[Vitesse], Mapping[str, Vitesse]]]): Already initialised
+            devices to group, e.g. simulated ones. Unnamed devices are named by serial number,
+            or "device<i>" if they have none.
+    """
+    # Seconds the I/O threads wait for each other before triggering anyway
+    TRIGGER_TIMEOUT = 1.0
+
+    def __init__(self, devices: Optional[Union[Sequence[Vitesse], Mapping[str, Vitesse]]] = None):
+        self.devices: dict[str, Vitesse] = {}
+        self._executors: dict[str, ThreadPoolExecutor] = {}
+        self._health: dict[str, dict[str, Any]] = {}
+        self._healthLock = threading.Lock()
+        if isinstance(devices, Mapping):
+            for name, device in devices.items():
+                self.addDevice(device, name)
+        elif devices is not None:
+            for device in devices:
+                self.addDevice(device)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, _type, _value, _traceback):  # type: ignore
+        self.closeDevices()
+
+    def __len__(self) -> int:
+        return len(self.devices)
+
+    def __getitem__(self, name: str) -> Vitesse:
+        return self.devices[name]
+
+    @property
+    def names(self) -> list[str]:
+        return list(self.devices)
+
+    def addDevice(self, device: Vitesse, name: Optional[str] = None) -> Self:
+        """
+        Adds an initialised device to the group, with its own I/O thread.
+
+        Args:
+            device (Vitesse): The device.
+            name (Optional[str]): Name of the device in the group, by default its serial number.
+
+        Returns:
+            Self: Returns the instance for method chaining.
+
+        Raises:
+            ValueError: If the group already has a device of that name.
+        """
+        if name is None:
+            name = device.serialNumber or f"device{len(self.devices)}"
+        if name in self.devices:
+            raise ValueError(f"The group already has a device named {name}.")
+        self.devices[name] = device
+        self._executors[name] = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=f"Vitesse-{name}")
+        self._health[name] = {"frames": 0, "errors": 0, "consecutiveErrors": 0,
+                              "lastError": None, "lastFrameAt": None}
+        return self
+
+    def initialise(self, serialNumbers: Optional[Sequence[str]] = None) -> Self:
+        """
+        Opens connected Vitesse devices in parallel and loads their default configuration.
+
+        Args:
+            serialNumbers (Optional[Sequence[str]]): Serial numbers of the devices to open,
+                by default every connected Vitesse device.
+
+        Returns:
+            Self: Returns the instance for method chaining.
+
+        Raises:
+            ValueError: A serial number does not belong to a connected Vitesse device.
+            IOError: No Vitesse device connected.
+            RuntimeError: Some of the devices could not be opened. Those that could are
+                          kept in the group.
+        """
+        # Listed once: listing opens every device, which would fail on those being opened
+        devices = Vitesse.listDevices()
+        if len(devices) == 0:
+            raise IOError("No Vitesse device connected.")
+        available = [serialNumber for (serialNumber, _, _) in devices]
+        if serialNumbers is None:
+            serialNumbers = available
+        for serialNumber in serialNumbers:
+            if serialNumber not in available:
+                raise ValueError(
+                    f"The serial number {serialNumber} does not belong to a Vitesse device.")
+
+        for serialNumber in serialNumbers:
+            self.addDevice(Vitesse(), serialNumber)
+
+        def openDevice(device: Vitesse, serialNumber: str) -> None:
+            device._connect(serialNumber, devices=devices)
+            # Load default parameters
+            device.setConfig(clearEncoders=True)
+
+        results = self._gather({name: self._executors[name].submit(openDevice, self.devices[name], name)
+                                for name in serialNumbers})
+        failed = [name for name, (_, error) in results.items() if error is not None]
+        for name in failed:
+            self._removeDevice(name)
+        self._raiseErrors("opened", results)
+        return self
+
+    def run(self, function: Callable[[Vitesse], T], names: Optional[Sequence[str]] = None) -> dict[str, T]:
+        """
+        Calls function with each device on the I/O thread of the device, all devices at once,
+        e.g. group.run(lambda device: device.setAverages(100)).
+
+        Args:
+            function (Callable[[Vitesse], T]): Called with each device.
+            names (Optional[Sequence[str]]): Devices to call it for, by default all of them.
+
+        Returns:
+            dict[str, T]: The return value for each device.
+
+        Raises:
+            RuntimeError: If the function raised for any device, once every device is done.
+        """
+        names = self.names if names is None else list(names)
+        results = self._gather({name: self._executors[name].submit(function, self.devices[name])
+                                for name in names})
+        self._raiseErrors("run", results)
+        return {name: result for name, (result, _) in results.items()}
+
+    def setConfig(self, perDevice: Optional[Mapping[str, Mapping[str, Any]]] = None, **config: Any) -> Self:
+        """
+        Configures every device in parallel, see Vitesse.setConfig.
+
+        Args:
+            perDevice (Optional[Mapping[str, Mapping[str, Any]]]): Parameters of individual
+                devices, by name, overriding those given for all of them.
+            **config: Parameters of every device.
+
+        Returns:
+            Self: Returns the instance for method chaining.
+
+        Raises:
+            ValueError: If perDevice names a device that is not in the group.
+            RuntimeError: If any device could not be configured.
+        """
+        perDevice = perDevice or {}
+        for name in perDevice:
+            if name not in self.devices:
+                raise ValueError(f"The group has no device named {name}.")
+        self.run(lambda device: device.setConfig(**{**config, **perDevice.get(self._nameOf(device), {})}))
+        return self
+
+    def apply(self, profiles: Union[VitesseProfile, Mapping[str, VitesseProfile]]) -> Self:
+        """
+        Applies a compiled profile to every device in parallel, see Vitesse.apply.
+
+        Args:
+            profiles (Union[VitesseProfile, Mapping[str, VitesseProfile]]): The profile of every
+                device, or a profile per device name.
+
+        Returns:
+            Self: Returns the instance for method chaining.
+
+        Raises:
+            RuntimeError: If the profile could not be applied to any device.
+        """
+        if isinstance(profiles, VitesseProfile):
+            self.run(lambda device: device.apply(profiles))
+        else:
+            self.run(lambda device: device.apply(profiles[self._nameOf(device)]), list(profiles))
+        return self
+
+    def getFrameSet(self, dtype: npt.DTypeLike = np.float64, raw: bool = False) -> FrameSet:
+        """
+        Triggers every device at the same time and reads the frames concurrently. A device
+        that fails does not hold up the others: its error is reported in the set and in its
+        health.
+
+        Args:
+            dtype (npt.DTypeLike): See Vitesse.getArray.
+            raw (bool): See Vitesse.getArray.
+
+        Returns:
+            FrameSet: The frame of each device and when it was triggered.
+        """
+        barrier = threading.Barrier(len(self.devices)) if self.devices else None
+        timestamps: dict[str, float] = {}
+
+        def acquire(name: str) -> np.ndarray:
+            try:
+                barrier.wait(self.TRIGGER_TIMEOUT)  # type: ignore
+            except threading.BrokenBarrierError:
+                pass
+            timestamps[name] = time.time()
+            return self.devices[name].getArray(dtype, raw)
+
+        results = self._gather({name: self._executors[name].submit(acquire, name) for name in self.devices}, 1)
+        return FrameSet(frames={name: frame for name, (frame, error) in results.items() if error is None},
+                        timestamps=timestamps,
+                        errors={name: error for name, (_, error) in results.items() if error is not None})
+
+    def getArrays(self, numFrames: int, dtype: npt.DTypeLike = np.float64,
+                  raw: bool = False) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+        """
+        Acquires numFrames consecutive frames on every device concurrently, each device
+        pipelined as in Vitesse.getArrays. The devices start together; the per-frame
+        timestamps of the tables align the frames of different devices.
+
+        Returns:
+            dict[str, tuple[np.ndarray, np.ndarray]]: The frames and the timestamp/peripheral
+                table of each device, see Vitesse.getArrays.
+
+        Raises:
+            RuntimeError: If any device failed, once every device is done.
+        """
+        barrier = threading.Barrier(len(self.devices)) if self.devices else None
+
+        def acquire(device: Vitesse) -> tuple[np.ndarray, np.ndarray]:
+            try:
+                barrier.wait(self.TRIGGER_TIMEOUT)  # type: ignore
+            except threading.BrokenBarrierError:
+                pass
+            return device.getArrays(numFrames, dtype, raw)
+
+        results = self._gather({name: self._executors[name].submit(acquire, device)
+                                for name, device in self.devices.items()}, numFrames)
+        self._raiseErrors("acquired", results)
+        return {name: result for name, (result, _) in results.items()}
+
+    def health(self) -> dict[str, dict[str, Any]]:
+        """
+        Returns the health of each device: frames acquired and calls failed through the group,
+        consecutive failures, the last error and when the last frame arrived (time.time()),
+        and the read errors recovered from and frames resynchronised by the device.
+        """
+        with self._healthLock:
+            health = {name: dict(values) for name, values in self._health.items()}
+        for name, device in self.devices.items():
+            health[name]["healthy"] = health[name]["consecutiveErrors"] == 0
+            health[name]["readRetries"] = device.spiDevice.readRetries if device.spiDevice is not None else 0
+            health[name]["framesDesynced"] = device.framesDesynced
+            health[name]["framesRecovered"] = device.framesRecovered
+        return health
+
+    def closeDevices(self) -> None:
+        """
+        Closes every device in parallel and stops the I/O threads.
+
+        Raises:
+            RuntimeError: If any device could not be closed. The others are closed regardless.
+        """
+        results = self._gather({name: self._executors[name].submit(device.closeDevice)
+                                for name, device in self.devices.items() if device.spiDevice is not None})
+        for name in list(self.devices):
+            self._removeDevice(name)
+        self._raiseErrors("closed", results)
+
+    def _nameOf(self, device: Vitesse) -> str:
+        return next(name for name, member in self.devices.items() if member is device)
+
+    def _removeDevice(self, name: str) -> None:
+        self.devices.pop(name)
+        self._executors.pop(name).shutdown(wait=False)
+        with self._healthLock:
+            self._health.pop(name)
+
+    def _gather(self, futures: dict[str, Future[T]], frames: int = 0) -> dict[str, tuple[Optional[T], Optional[BaseException]]]:
+        """
+        Waits for a call on each device, recording its outcome, and the frames it acquired,
+        in the health of the device.
+        """
+        results: dict[str, tuple[Optional[T], Optional[BaseException]]] = {}
+        for name, future in futures.items():
+            error = future.exception()
+            results[name] = (None if error is not None else future.result(), error)
+            with self._healthLock:
+                health = self._health.get(name)
+                if health is None:
+                    continue
+                if error is None:
+                    health["consecutiveErrors"] = 0
+                    if frames:
+                        health["frames"] += frames
+                        health["lastFrameAt"] = time.time()
+                else:
+                    health["errors"] += 1
+                    health["consecutiveErrors"] += 1
+                    health["lastError"] = repr(error)
+        return results
+
+    @staticmethod
+    def _raiseErrors(action: str, results: dict[str, tuple[Any, Optional[BaseException]]]) -> None:
+        errors = {name: error for name, (_, error) in results.items() if error is not None}
+        if not errors:
+            return
+        details = "; ".join(f"{name}: {error}" for name, error in errors.items())
+        raise RuntimeError(
+            f"{len(errors)} of {len(results)} devices could not be {action} ({details})") from next(iter(errors.values()))
@@ -0,0 +1,139 @@
+from __future__ import annotations
+from dataclasses import dataclass, asdict
+from typing import TYPE_CHECKING, Any, Optional, Union
+import numpy as np
+import numpy.typing as npt
+from .utils import decode_echo_signal, channel_signs, check_output_dtype, frame_markers_valid
+
+if TYPE_CHECKING:
+    from .VitesseAPI import Vitesse
+
+
+@dataclass(frozen=True)
+class FrameLayout:
+    """
+    Snapshot of the configuration that determines how a raw frame is laid out and decoded.
+
+    A raw frame is the totalBytes read after the ready sentinel: numChannelsOnReceive
+    blocks of recordPoints * messageBytes samples, each between two marker bytes (the
+    sentinel serves as the first marker), followed by additionalBytes of peripheral data.
+    """
+    version: int
+    maxChannels: int
+    samplingMode: int
+    messageBytes: int
+    recordPoints: int
+    numChannelsOnReceive: int
+    enabledChannelReceive: tuple[int, ...]
+    peripheralsOnArray: tuple[int, ...]
+    numAverages: int
+    additionalBytes: int
+    totalDataBytes: int
+    totalBytes: int
+
+    @classmethod
+    def fromDevice(cls, device: Vitesse) -> FrameLayout:
+        """
+        Captures the frame layout of the current configuration of a Vitesse instance.
+        """
+        return cls(
+            version=int(device.version),
+            maxChannels=int(device.maxChannels),
+            samplingMode=int(device.samplingMode),
+            messageBytes=int(device.messageBytes),
+            recordPoints=int(device.recordPoints),
+            numChannelsOnReceive=int(device.numChannelsOnReceive),
+            enabledChannelReceive=tuple(int(x) for x in device.enabledChannelReceive),
+            peripheralsOnArray=tuple(int(x) for x in device.peripheralsOnArray),
+            numAverages=int(device.numAverages),
+            additionalBytes=int(device.additionalBytes),
+            totalDataBytes=int(device.totalDataBytes),
+            totalBytes=int(device.totalBytes),
+        )
+
+    @property
+    def channelBytes(self) -> int:
+        """
+        Bytes per channel block, including its two marker bytes.
+        """
+        return self.recordPoints * self.messageBytes + 2
+
+    def toDict(self) -> dict[str, Any]:
+        """
+        Returns a JSON-serialisable representation, see fromDict.
+        """
+        values = asdict(self)
+        values["enabledChannelReceive"] = list(self.enabledChannelReceive)
+        values["peripheralsOnArray"] = list(self.peripheralsOnArray)
+        return values
+
+    @classmethod
+    def fromDict(cls, values: dict[str, Any]) -> FrameLayout:
+        """
+        Rebuilds a layout from the output of toDict.
+        """
+        values = dict(values)
+        values["enabledChannelReceive"] = tuple(values["enabledChannelReceive"])
+        values["peripheralsOnArray"] = tuple(values["peripheralsOnArray"])
+        return cls(**values)
+
+
+def check_frame(frame: Union[np.ndarray, bytes, bytearray], layout: FrameLayout) -> bool:
+    """
+    Returns whether a raw frame is aligned with its layout: it has totalBytes bytes and
+    each channel marker and the trailer marker is where the layout puts it. A frame
+    that fails the check has dropped or gained bytes and cannot be decoded. The markers are
+    assumed to be utils.FRAME_MARKER, which is unconfirmed for the firmware, see there.
+    """
+    frame = np.frombuffer(frame, dtype=np.uint8) if not isinstance(frame, np.ndarray) else frame
+    if frame.dtype != np.uint8 or frame.shape != (layout.totalBytes,):
+        return False
+    return frame_markers_valid(frame, layout.numChannelsOnReceive, layout.channelBytes)
+
+
+def decode_frame(frame: Union[np.ndarray, bytes, bytearray], layout: FrameLayout,
+                 dtype: npt.DTypeLike = np.float64, raw: bool = False,
+                 out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Decodes a raw frame captured by Vitesse.getRawFrame into the echo signal, exactly as
+    getArray would have returned it for the same frame.
+
+    Args:
+        frame (Union[np.ndarray, bytes, bytearray]): The totalBytes read after the ready sentinel.
+        layout (FrameLayout): The layout the frame was captured with.
+        dtype (npt.DTypeLike): See Vitesse.getArray.
+        raw (bool): See Vitesse.getArray.
+        out (Optional[np.ndarray]): See Vitesse.getArray.
+
+    Returns:
+        numpy.ndarray: Echo signal data with shape (numChannelsOn, recordPoints).
+
+    Raises:
+        ValueError: If the frame or out does not match the layout.
+    """
+    if layout.version < 3000:
+        raise ValueError("Frames of binaries older than 3000 are not supported.")
+    frame = np.frombuffer(frame, dtype=np.uint8) if not isinstance(frame, np.ndarray) else frame
+    if frame.dtype != np.uint8 or frame.shape != (layout.totalBytes,):
+        raise ValueError(
+            f"Expected a uint8 frame of {layout.totalBytes} bytes, got {frame.dtype} {frame.shape}.")
+
+    shape = (layout.numChannelsOnReceive, layout.recordPoints)
+    if out is None:
+        out = np.empty(shape, dtype=np.int32 if raw else check_output_dtype(dtype))
+    elif out.shape != shape:
+        raise ValueError(f"Output array has shape {out.shape}, expected {shape}.")
+    elif raw and out.dtype != np.int32:
+        raise ValueError(f"Output array must be int32 with raw=True, got {out.dtype}.")
+    elif not raw:
+        check_output_dtype(out.dtype)
+
+    # Channel blocks are channelBytes apart, each starting after its marker byte. The
+    # sentinel that marks the first channel is not part of the frame, hence no offset.
+    bytesArray = np.lib.stride_tricks.as_strided(
+        frame, shape=(*shape, layout.messageBytes),
+        strides=(layout.channelBytes * frame.strides[0], layout.messageBytes * frame.strides[0], frame.strides[0]),
+        writeable=False)
+    signs = channel_signs(layout.maxChannels,
+                          list(layout.enabledChannelReceive[:layout.numChannelsOnReceive]))
+    return decode_echo_signal(bytesArray, layout.numAverages, signs, out, raw=raw)
@@ -0,0 +1,390 @@
+from __future__ import annotations
+import json
+import os
+import struct
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Optional, Union
+import numpy as np
+import numpy.typing as npt
+from .layout import FrameLayout, decode_frame
+from .utils import decode_peripherals
+from .vitesseProfile import PROFILE_ATTRIBUTES, _freeze, _thaw
+
+if TYPE_CHECKING:
+    from .VitesseAPI import Vitesse
+
+# A recording is a pair of append-only files:
+#   <path>      header, then one fixed-size record per frame (raw payload or decoded samples)
+#   <path>.idx  index header, then one fixed-size row per frame (timestamp and peripherals)
+# The data header is the magic, the header size and the JSON length as little-endian uint32,
+# then the JSON description, padded so that the records start on a page boundary.
+RECORDING_MAGIC = b"VITREC01"
+INDEX_MAGIC = b"VITIDX01"
+INDEX_HEADER_BYTES = 16
+HEADER_ALIGNMENT = 4096
+RECORDING_FORMAT = 1
+
+
+def indexPath(path: Union[str, Path]) -> Path:
+    """
+    Returns the path of the side index of a recording.
+    """
+    path = Path(path)
+    return path.with_name(path.name + ".idx")
+
+
+def _dtypeToJson(dtype: np.dtype) -> Any:
+    return [list(field) for field in dtype.descr]
+
+
+def _dtypeFromJson(descr: Any) -> np.dtype:
+    return np.dtype([tuple(x if not isinstance(x, list) else tuple(x) for x in field) for field in descr])
+
+
+class RecordingWriter:
+    """
+    Appends frames to a recording that RecordingReader can map without loading it.
+
+    Every frame is written as a fixed-size record, followed by its row in the side
+    index, so a crash leaves at most one partial record behind. Opening an existing
+    recording with append=True discards that partial record.
+
+    Args:
+        path (Union[str, Path]): Path of the recording; the index is written next to it.
+        layout (FrameLayout): Layout of the frames, see Vitesse.getRawFrame.
+        dtype (Optional[npt.DTypeLike]): None to record the raw payloads of getRawFrame,
+            otherwise the dtype of the decoded frames, e.g. np.float32, or np.int32 for the
+            codes of getArray(raw=True).
+        indexDtype (Optional[np.dtype]): Dtype of the index rows. Must start with a float64
+            "timestamp" field, see Vitesse.frameTableDtype. Defaults to the timestamp only.
+        config (Optional[dict[str, Any]]): JSON-serialisable configuration snapshot stored in the header.
+        peripheralDecoder (Optional[Callable[[np.ndarray], np.ndarray]]): Decodes the peripheral
+            trailer of a raw payload into a record, used to index raw frames written without
+            their peripherals.
+        append (bool): Append to an existing recording instead of creating a new one.
+    """
+
+    def __init__(self,
+                 path: Union[str, Path],
+                 layout: FrameLayout,
+                 dtype: Optional[npt.DTypeLike] = None,
+                 indexDtype: Optional[np.dtype] = None,
+                 config: Optional[dict[str, Any]] = None,
+                 peripheralDecoder: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+                 append: bool = False):
+        self.path = Path(path)
+        self.layout = layout
+        if dtype is None:
+            self.frameDtype = np.dtype(np.uint8)
+            self.frameShape: tuple[int, ...] = (layout.totalBytes,)
+        else:
+            self.frameDtype = np.dtype(dtype)
+            self.frameShape = (layout.numChannelsOnReceive, layout.recordPoints)
+        self.raw = dtype is None
+        self.indexDtype = np.dtype(indexDtype) if indexDtype is not None else np.dtype([("timestamp", "f8")])
+        if self.indexDtype.names is None or self.indexDtype.names[0] != "timestamp":
+            raise ValueError('Index dtype must start with a "timestamp" field.')
+        self.config = config if config is not None else {}
+        self._peripheralDecoder = peripheralDecoder
+        self.recordBytes = self.frameDtype.itemsize * int(np.prod(self.frameShape))
+
+        if append and self.path.exists():
+            header = _readHeader(self.path)
+            if (header["layout"] != layout.toDict() or header["frameShape"] != list(self.frameShape)
+                    or np.dtype(header["frameDtype"]) != self.frameDtype
+                    or _dtypeFromJson(header["indexDtype"]) != self.indexDtype):
+                raise ValueError(
+                    "Existing recording has a different layout, frame or index format.")
+            self.headerBytes = header["headerBytes"]
+            self.numFrames = recoverRecording(self.path)
+            self._data = open(self.path, "r+b")
+            self._index = open(indexPath(self.path), "r+b")
+            self._data.seek(0, os.SEEK_END)
+            self._index.seek(0, os.SEEK_END)
+        else:
+            self.numFrames = 0
+            self._data = open(self.path, "wb")
+            self._index = open(indexPath(self.path), "wb")
+            self.headerBytes = self._writeHeader()
+            self._index.write(INDEX_MAGIC.ljust(INDEX_HEADER_BYTES, b"\0"))
+
+        self._row = np.zeros(1, dtype=self.indexDtype)
+
+    @classmethod
+    def fromDevice(cls, path: Union[str, Path], device: Vitesse, dtype: Optional[npt.DTypeLike] = None,
+                   append: bool = False) -> RecordingWriter:
+        """
+        Creates a recording for the current configuration of a Vitesse device, storing its
+        configuration snapshot and indexing the peripheral readings of every frame.
+
+        Args:
+            path (Union[str, Path]): Path of the recording.
+            device (Vitesse): The configured device.
+            dtype (Optional[npt.DTypeLike]): See RecordingWriter.
+            append (bool): See RecordingWriter.
+
+        Returns:
+            RecordingWriter: The open writer.
+        """
+        rawDtype, recordDtype = device.peripheralRawDtype, device.peripheralDtype
+        converters = list(device._peripheralConverters)
+        config = {name: _thaw(_freeze(getattr(device, name)))
+                  for name in PROFILE_ATTRIBUTES if hasattr(device, name)}
+        return cls(path, FrameLayout.fromDevice(device), dtype, device.frameTableDtype(), config,
+                   lambda trailer: decode_peripherals(trailer, rawDtype, recordDtype, converters),
+                   append)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, _type, _value, _traceback):  # type: ignore
+        self.close()
+
+    def _writeHeader(self) -> int:
+        description = json.dumps({
+            "format": RECORDING_FORMAT,
+            "version": self.layout.version,
+            "layout": self.layout.toDict(),
+            "config": self.config,
+            "frameDtype": self.frameDtype.str,
+            "frameShape": list(self.frameShape),
+            "indexDtype": _dtypeToJson(self.indexDtype),
+            "created": time.time(),
+        }).encode()
+        prefixBytes = len(RECORDING_MAGIC) + 8
+        headerBytes = -(-(prefixBytes + len(description)) // HEADER_ALIGNMENT) * HEADER_ALIGNMENT
+        header = RECORDING_MAGIC + struct.pack("<II", headerBytes, len(description)) + description
+        self._data.write(header.ljust(headerBytes, b"\0"))
+        return headerBytes
+
+    def write(self, frame: np.ndarray, timestamp: Optional[float] = None,
+              peripherals: Optional[np.ndarray] = None) -> int:
+        """
+        Appends one frame.
+
+        Args:
+            frame (np.ndarray): A raw payload from getRawFrame, or a decoded frame, matching the recording.
+            timestamp (Optional[float]): Acquisition time; defaults to time.time().
+            peripherals (Optional[np.ndarray]): Peripheral record of the frame, e.g. getPeripheralRecord().
+                Decoded from the trailer of raw frames when omitted.
+
+        Returns:
+            int: Index of the frame in the recording.
+
+        Raises:
+            ValueError: If the frame does not match the recording.
+        """
+        frame = np.asarray(frame)
+        if frame.shape != self.frameShape:
+            raise ValueError(
+                f"Frame has shape {frame.shape}, expected {self.frameShape}.")
+        if peripherals is None and self.raw and self._peripheralDecoder is not None:
+            peripherals = self._peripheralDecoder(frame[self.layout.totalDataBytes:])
+
+        self._data.write(np.ascontiguousarray(frame, dtype=self.frameDtype).data)
+        row = self._row
+        row.fill(0)
+        row["timestamp"] = time.time() if timestamp is None else timestamp
+        if peripherals is not None:
+            for name in peripherals.dtype.names:
+                if name in self.indexDtype.names:
+                    row[name] = peripherals[name]
+        self._index.write(row.data)
+        self.numFrames += 1
+        return self.numFrames - 1
+
+    def writeFrames(self, frames: np.ndarray, table: Optional[np.ndarray] = None) -> None:
+        """
+        Appends a block of frames, e.g. the output of getArrays.
+
+        Args:
+            frames (np.ndarray): Frames stacked along the first axis.
+            table (Optional[np.ndarray]): The per-frame table of getArrays, with the dtype of the index.
+                Raw frames are indexed from their trailers, decoded ones by the current time, when omitted.
+
+        Raises:
+            ValueError: If the frames or the table do not match the recording.
+        """
+        frames = np.asarray(frames)
+        if frames.shape[1:] != self.frameShape:
+            raise ValueError(
+                f"Frames have shape {frames.shape[1:]}, expected {self.frameShape}.")
+        if table is None:
+            for frame in frames:
+                self.write(frame)
+            return
+        if table.dtype != self.indexDtype or len(table) != len(frames):
+            raise ValueError(
+                "Frame table does not match the frames or the index of the recording.")
+        self._data.write(np.ascontiguousarray(frames, dtype=self.frameDtype).data)
+        self._index.write(np.ascontiguousarray(table).data)
+        self.numFrames += len(frames)
+
+    def flush(self, sync: bool = False) -> None:
+        """
+        Flushes the buffered records to the operating system, and to disk if sync is True.
+        """
+        for file in (self._data, self._index):
+            file.flush()
+            if sync:
+                os.fsync(file.fileno())
+
+    def close(self) -> None:
+        if not self._data.closed:
+            self.flush()
+            self._data.close()
+            self._index.close()
+
+
+def _readHeader(path: Union[str, Path]) -> dict[str, Any]:
+    """
+    Reads the JSON description of a recording, adding its header size as "headerBytes".
+
+    Raises:
+        ValueError: If the file is not a recording.
+    """
+    with open(path, "rb") as file:
+        prefix = file.read(len(RECORDING_MAGIC) + 8)
+        if len(prefix) < len(RECORDING_MAGIC) + 8 or prefix[:len(RECORDING_MAGIC)] != RECORDING_MAGIC:
+            raise ValueError(f"{path} is not a Vitesse recording.")
+        headerBytes, descriptionBytes = struct.unpack("<II", prefix[len(RECORDING_MAGIC):])
+        header = json.loads(file.read(descriptionBytes))
+    if header.get("format") != RECORDING_FORMAT:
+        raise ValueError(
+            f"Unsupported recording format {header.get('format')}.")
+    header["headerBytes"] = headerBytes
+    return header
+
+
+def _completeFrames(path: Path, header: dict[str, Any]) -> tuple[int, int, int]:
+    """
+    Returns the number of complete frames, and the byte sizes of a data record and an index row.
+    """
+    frameDtype = np.dtype(header["frameDtype"])
+    recordBytes = frameDtype.itemsize * int(np.prod(header["frameShape"]))
+    rowBytes = _dtypeFromJson(header["indexDtype"]).itemsize
+    dataFrames = (path.stat().st_size - header["headerBytes"]) // recordBytes
+    index = indexPath(path)
+    indexFrames = (index.stat().st_size - INDEX_HEADER_BYTES) // rowBytes if index.exists() else 0
+    return max(0, min(dataFrames, indexFrames)), recordBytes, rowBytes
+
+
+def recoverRecording(path: Union[str, Path]) -> int:
+    """
+    Truncates a recording interrupted mid-write to its last complete frame.
+
+    Returns:
+        int: The number of frames kept.
+    """
+    path = Path(path)
+    header = _readHeader(path)
+    numFrames, recordBytes, rowBytes = _completeFrames(path, header)
+    os.truncate(path, header["headerBytes"] + numFrames * recordBytes)
+    index = indexPath(path)
+    if not index.exists():
+        index.write_bytes(INDEX_MAGIC.ljust(INDEX_HEADER_BYTES, b"\0"))
+    os.truncate(index, INDEX_HEADER_BYTES + numFrames * rowBytes)
+    return numFrames
+
+
+class RecordingReader:
+    """
+    Read-only access to a recording written by RecordingWriter.
+
+    Frames and index are memory-mapped, so only the pages actually touched are read.
+    A partial record at the end (e.g. after a crash) is ignored; truncated reports it.
+
+    Args:
+        path (Union[str, Path]): Path of the recording.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        header = _readHeader(self.path)
+        self.header = header
+        self.layout = FrameLayout.fromDict(header["layout"])
+        self.version: int = header["version"]
+        self.config: dict[str, Any] = header["config"]
+        self.frameDtype = np.dtype(header["frameDtype"])
+        self.frameShape: tuple[int, ...] = tuple(header["frameShape"])
+        self.indexDtype = _dtypeFromJson(header["indexDtype"])
+        self.raw = self.frameShape == (self.layout.totalBytes,) and self.frameDtype == np.uint8
+
+        self.numFrames, recordBytes, rowBytes = _completeFrames(self.path, header)
+        dataBytes = self.path.stat().st_size - header["headerBytes"]
+        index = indexPath(self.path)
+        indexBytes = index.stat().st_size - INDEX_HEADER_BYTES if index.exists() else 0
+        self.truncated = (dataBytes != self.numFrames * recordBytes
+                          or indexBytes != self.numFrames * rowBytes)
+
+        # np.memmap cannot map an empty range
+        if self.numFrames == 0:
+            self.frames: np.ndarray = np.empty((0, *self.frameShape), dtype=self.frameDtype)
+            self.index: np.ndarray = np.empty(0, dtype=self.indexDtype)
+        else:
+            self.frames = np.memmap(self.path, dtype=self.frameDtype, mode="r", offset=header["headerBytes"],
+                                    shape=(self.numFrames, *self.frameShape))
+            self.index = np.memmap(index, dtype=self.indexDtype, mode="r", offset=INDEX_HEADER_BYTES,
+                                   shape=(self.numFrames,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, _type, _value, _traceback):  # type: ignore
+        self.close()
+
+    def __len__(self) -> int:
+        return self.numFrames
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        return self.frames[key]
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self.index["timestamp"]
+
+    def getArray(self, frameIndex: int, dtype: npt.DTypeLike = np.float64, raw: bool = False) -> np.ndarray:
+        """
+        Returns a frame as getArray would have, decoding raw payloads with decode_frame.
+        Decoded recordings are returned as a view, dtype and raw are then ignored.
+        """
+        if self.raw:
+            return decode_frame(self.frames[frameIndex], self.layout, dtype, raw)
+        return self.frames[frameIndex]
+
+    def seekTime(self, timestamp: float) -> int:
+        """
+        Returns the index of the first frame acquired at or after timestamp (len(self) if none).
+        """
+        return int(np.searchsorted(self.index["timestamp"], timestamp, side="left"))
+
+    def seekEncoder(self, value: float, field: str = "encoder1") -> int:
+        """
+        Returns the index of the frame whose reading of an indexed peripheral is closest to value.
+
+        Raises:
+            ValueError: If the field is not indexed or the recording is empty.
+        """
+        if field not in self.indexDtype.names:
+            raise ValueError(f'"{field}" is not in the index of this recording.')
+        if self.numFrames == 0:
+            raise ValueError("Recording is empty.")
+        return int(np.argmin(np.abs(self.index[field].astype(np.float64) - value)))
+
+    def framesBetween(self, low: float, high: float, field: str = "timestamp") -> np.ndarray:
+        """
+        Returns the indices of the frames whose indexed field lies in [low, high].
+        """
+        if field not in self.indexDtype.names:
+            raise ValueError(f'"{field}" is not in the index of this recording.')
+        values = self.index[field]
+        return np.flatnonzero((values >= low) & (values <= high))
+
+    def close(self) -> None:
+        """
+        Drops the memory maps; they are unmapped once no view obtained from the reader remains.
+        """
+        self.frames = np.empty((0, *self.frameShape), dtype=self.frameDtype)
+        self.index = np.empty(0, dtype=self.indexDtype)
+        self.numFrames = 0
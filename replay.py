@@ -0,0 +1,215 @@
+from __future__ import annotations
+import json
+import struct
+import time
+from pathlib import Path
+from typing import Any, BinaryIO, Optional, Union
+from .sonoboticsFTDI import ftdiChannel, WritableBuffer
+
+# A session file is the magic, the length of a JSON metadata block as a little-endian
+# uint32 and the metadata, followed by one event per transfer: its kind (b"w" or b"r"),
+# its time in seconds since the start of the session and its length, then the bytes.
+SESSION_MAGIC = b"VITSES01"
+EVENT_HEADER = struct.Struct("<cdI")
+
+# Replay timing modes
+REPLAY_FAST = "fast"          # Reads are served as soon as they are requested
+REPLAY_ORIGINAL = "original"  # Reads are served no earlier, after each write, than they were recorded
+VALID_REPLAY_TIMING = [REPLAY_FAST, REPLAY_ORIGINAL]
+
+
+class SessionRecorder(ftdiChannel):
+    """
+    Channel forwarding every transfer to another channel and logging it to a session
+    file, for ReplayFtdiChannel to play back.
+
+    Other attributes (setTimeouts, readEEPROM...) are forwarded unchanged.
+
+    Args:
+        channel (ftdiChannel): The channel to record, usually a sonoboticsFtdiChannel.
+        path (Union[str, Path]): Path of the session file.
+        metadata (Optional[dict[str, Any]]): JSON-serialisable information stored with the
+            session, e.g. the serial number and the number of channels of the device.
+    """
+
+    def __init__(self, channel: ftdiChannel, path: Union[str, Path], metadata: Optional[dict[str, Any]] = None):
+        super().__init__()
+        self.channel = channel
+        self.path = Path(path)
+        self.metadata = metadata if metadata is not None else {}
+        self._file: BinaryIO = open(self.path, "wb")
+        description = json.dumps(self.metadata).encode()
+        self._file.write(SESSION_MAGIC + struct.pack("<I", len(description)) + description)
+        self._start = time.perf_counter()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.channel, name)
+
+    def _log(self, kind: bytes, data: Union[bytes, bytearray, memoryview]) -> None:
+        self._file.write(EVENT_HEADER.pack(kind, time.perf_counter() - self._start, len(data)))
+        self._file.write(data)
+
+    def write(self, data: Union[bytes, bytearray]) -> None:
+        # Logged when sent, since the device reacts from then on
+        self._log(b"w", bytes(data))
+        self.channel.write(data)
+
+    def read(self, numBytes: int) -> bytes:
+        data = self.channel.read(numBytes)
+        self._log(b"r", data)
+        return data
+
+    def read_into(self, buffer: WritableBuffer, offset: int, numBytes: int) -> int:
+        count = self.channel.read_into(buffer, offset, numBytes)
+        self._log(b"r", memoryview(buffer).cast('B')[offset:offset + count])
+        return count
+
+    # Defined on ftdiChannel, so not reached through __getattr__
+    def setTimeouts(self, readTimeOut: int, writeTimeOut: int) -> None:
+        self.channel.setTimeouts(readTimeOut, writeTimeOut)
+
+    def setUSBParameters(self, inTransferSize: int, outTransferSize: int) -> None:
+        self.channel.setUSBParameters(inTransferSize, outTransferSize)
+
+    def setLatencyTimer(self, timer: int) -> None:
+        self.channel.setLatencyTimer(timer)
+
+    def readEEPROM(self):
+        return self.channel.readEEPROM()
+
+    def close(self) -> None:
+        try:
+            self.channel.close()
+        finally:
+            if not self._file.closed:
+                self._file.close()
+            super().close()
+
+
+class _ReadEvent:
+    __slots__ = ("writeOffset", "delay", "data", "position")
+
+    def __init__(self, writeOffset: int, delay: float, data: bytes):
+        self.writeOffset = writeOffset  # Bytes written before the read was issued
+        self.delay = delay              # Seconds between the preceding write and the read
+        self.data = data
+        self.position = 0               # Bytes already served
+
+
+class ReplayFtdiChannel(ftdiChannel):
+    """
+    Channel serving a session recorded by SessionRecorder through the read/write
+    interface of the device, so that getArray and the rest of the API can run at line
+    rate, or with the original timing, without hardware.
+
+    Reads and writes are matched as byte streams rather than call by call, so the replayed
+    code may batch commands or chunk reads differently from the recorded one. Recorded
+    read bytes left unread when the next write is issued are discarded, as the device only
+    produces bytes while they are being clocked out.
+
+    Args:
+        path (Union[str, Path]): Path of the session file.
+        timing (str): One of VALID_REPLAY_TIMING.
+        strict (bool): Raise IOError when the bytes written differ from the recorded ones.
+    """
+
+    def __init__(self, path: Union[str, Path], timing: str = REPLAY_FAST, strict: bool = False):
+        super().__init__()
+        if timing not in VALID_REPLAY_TIMING:
+            raise ValueError(
+                f'Invalid replay timing, expected one of {VALID_REPLAY_TIMING}.')
+        self.timing = timing
+        self.strict = strict
+        self.metadata, self._written, self._reads = self._load(Path(path))
+        self._writeOffset = 0
+        self._next = 0
+        self._lastWrite = time.perf_counter()
+        self.discardedBytes = 0
+
+    @staticmethod
+    def _load(path: Path) -> tuple[dict[str, Any], bytes, list[_ReadEvent]]:
+        with open(path, "rb") as file:
+            content = file.read()
+        if content[:len(SESSION_MAGIC)] != SESSION_MAGIC:
+            raise ValueError(f"{path} is not a Vitesse session.")
+        position = len(SESSION_MAGIC)
+        (descriptionBytes,) = struct.unpack_from("<I", content, position)
+        position += 4
+        metadata = json.loads(content[position:position + descriptionBytes])
+        position += descriptionBytes
+
+        written = bytearray()
+        reads: list[_ReadEvent] = []
+        lastWrite = 0.0
+        # A session cut short (e.g. by a crash) ends with a partial event, which is ignored
+        while position + EVENT_HEADER.size <= len(content):
+            kind, timestamp, length = EVENT_HEADER.unpack_from(content, position)
+            position += EVENT_HEADER.size
+            if position + length > len(content):
+                break
+            data = content[position:position + length]
+            position += length
+            if kind == b"w":
+                written += data
+                lastWrite = timestamp
+            elif length:
+                reads.append(_ReadEvent(len(written), timestamp - lastWrite, data))
+        return metadata, bytes(written), reads
+
+    @property
+    def exhausted(self) -> bool:
+        return self._next >= len(self._reads)
+
+    def write(self, data: Union[bytes, bytearray]) -> None:
+        super().write(data)
+        data = bytes(data)
+        if self.strict:
+            expected = self._written[self._writeOffset:self._writeOffset + len(data)]
+            if not expected:
+                raise IOError("Replay session exhausted.")
+            if expected != data:
+                raise IOError(
+                    f"Replay diverged at byte {self._writeOffset} written: expected {expected.hex()}, got {data.hex()}.")
+        self._writeOffset += len(data)
+        self._lastWrite = time.perf_counter()
+
+        # Whatever the device answered to earlier commands and was not read is lost
+        while self._next < len(self._reads) and self._reads[self._next].writeOffset < self._writeOffset:
+            event = self._reads[self._next]
+            self.discardedBytes += len(event.data) - event.position
+            self._next += 1
+
+    def read(self, numBytes: int) -> bytes:
+        buffer = bytearray(numBytes)
+        count = self.read_into(buffer, 0, numBytes)
+        return bytes(buffer[:count])
+
+    def read_into(self, buffer: WritableBuffer, offset: int, numBytes: int) -> int:
+        """
+        Serves up to numBytes of the recorded answers to the commands written so far.
+
+        Raises:
+            IOError: If the session holds no more answers to the commands written so far.
+        """
+        if self._closed:
+            raise IOError("Replayed device is closed.")
+        view = memoryview(buffer).cast('B')
+        count = 0
+        while count < numBytes and self._next < len(self._reads):
+            event = self._reads[self._next]
+            if event.writeOffset > self._writeOffset:
+                break  # Recorded after a command that has not been sent yet
+            if self.timing == REPLAY_ORIGINAL and event.position == 0:
+                remaining = self._lastWrite + event.delay - time.perf_counter()
+                if remaining > 0:
+                    time.sleep(remaining)
+            chunk = min(numBytes - count, len(event.data) - event.position)
+            view[offset + count:offset + count + chunk] = event.data[event.position:event.position + chunk]
+            event.position += chunk
+            count += chunk
+            if event.position == len(event.data):
+                self._next += 1
+
+        if count == 0 and numBytes > 0:
+            raise IOError("Replay session exhausted.")
+        return count
@@ -7,8 +7,13 @@ import platform
 import os
 import sys
 import time
+import threading
 import subprocess
-from typing import Union
+from collections import deque
+from typing import Any, Callable, Optional, Union
+
+# Any object exposing a writable, contiguous buffer: bytearray, memoryview, np.ndarray...
+WritableBuffer = Any
 
 # =========================== importing ftd2xx drivers ===========================
 
@@ -73,11 +78,48 @@ def _get_resource_path(relative_path: str) -> Union[str, Path]:
         import pkg_resources  # type: ignore # nopep8
         return pkg_resources.resource_filename(package, relative_path)  # type: ignore # nopep8
 
+# The driver library is loaded once per process, on first use, see _setup_driver
+_driver: Any = None
+_driver_lock = threading.Lock()
+_kernel_module_unloaded = False
+
+
+def _setup_driver():
+    """
+    Returns the external C++ Library for interacting with the FTDI device, loading it and
+    declaring its prototypes on the first call only. Thread-safe.
+    """
+    global _driver
+    if _driver is None:
+        with _driver_lock:
+            if _driver is None:
+                _driver = _load_driver()
+    return _driver
+
+
+def _unload_kernel_module(force: bool = False):
+    """
+    Unloads the ftdi_sio kernel module on Linux, which would otherwise claim the device.
+    Done once per process when the driver is loaded, and again, forced, before the reopen
+    recovery tier, in case the device was plugged in again.
+    """
+    global _kernel_module_unloaded
+    if sys.platform.startswith("win") or (_kernel_module_unloaded and not force):
+        return
+    if platform.machine() == 'aarch64':
+        # Always sanitize the file first by replacing CRLF with LF
+        os.system(
+            f"sed -i -e 's/\r$//' {_get_resource_path('drivers/linux_arm_FTDI/unload_ftdi.sh')}")
+        subprocess.run(["sudo", "bash", _get_resource_path(
+            "drivers/linux_arm_FTDI/unload_ftdi.sh")], check=True)
+    os.system('sudo rmmod ftdi_sio 2>/dev/null')
+    _kernel_module_unloaded = True
+
 # Dynamically loads the external C++ Library for interacting with the FTDI device, depending on the platform.
 # Returns reference to the library.
 
 
-def _setup_driver():
+def _load_driver():
 
     if sys.platform.startswith("win"):
         # Copy ftd2xx.dll to system32 before loading the main library
@@ -90,15 +132,10 @@ def _setup_driver():
 
     elif platform.machine() == 'x86_64':
         lib = ctypes.CDLL(_get_resource_path("libraries/ftdiHandler64.so"))
-        os.system('sudo rmmod ftdi_sio 2>/dev/null')
+        _unload_kernel_module()
     elif platform.machine() == 'aarch64':
         lib = ctypes.CDLL(_get_resource_path("libraries/ftdiHandler.so"))
-        # Always sanitize the file first by replacing CRLF with LF
-        os.system(
-            f"sed -i -e 's/\r$//' {_get_resource_path('drivers/linux_arm_FTDI/unload_ftdi.sh')}")
-        subprocess.run(["sudo", "bash", _get_resource_path(
-            "drivers/linux_arm_FTDI/unload_ftdi.sh")], check=True)
-        os.system('sudo rmmod ftdi_sio 2>/dev/null')
+        _unload_kernel_module()
     else:
         raise OSError('Incompatible with this operating system!')
 
@@ -136,6 +173,14 @@ def _setup_driver():
     lib.setTimeouts.restype = ctypes.c_int
     lib.setUSBParameters.restype = ctypes.c_int
 
+    # D2XX calls used to recover from read errors, where the library exports them
+    if hasattr(lib, "FT_Purge"):
+        lib.FT_Purge.argtypes = [ctypes.c_void_p, wintypes.ULONG]
+        lib.FT_Purge.restype = ctypes.c_ulong
+    if hasattr(lib, "FT_ResetDevice"):
+        lib.FT_ResetDevice.argtypes = [ctypes.c_void_p]
+        lib.FT_ResetDevice.restype = ctypes.c_ulong
+
     return lib
 
 # ============================== error status messages ==============================
@@ -163,6 +208,22 @@ STATUS_MESSAGES = {
     18: "A non-specific or undocumented error occurred"
 }
 
+FT_PURGE_RX = 1
+FT_PURGE_TX = 2
+
+# Recovery tiers for failed SPI reads, tried in order, see sonoboticsFtdiChannel
+RECOVERY_PURGE = "purge"    # Purge the FTDI buffers
+RECOVERY_RESET = "reset"    # Reset the device and set SPI up again on the same handle
+RECOVERY_REOPEN = "reopen"  # Close the handle, unload ftdi_sio again and connect again
+RECOVERY_TIERS = [RECOVERY_PURGE, RECOVERY_RESET, RECOVERY_REOPEN]
+
+
+class ReadRecoveredError(IOError):
+    """
+    Raised when a read failed and the channel recovered: it works again, but the bytes of
+    the read were lost, so the caller must resynchronise with the device.
+    """
+
 # =========================== library classes and methods ===========================
 
 # returns number of connected FTDI devices
@@ -181,7 +242,13 @@ def getNumDevices():
 class ftdiChannel:
     """
     Template for FTDI/SPI channel used by Vitesse.
+
+    Channels that support it count their transfers in bytesRead and bytesWritten, and
+    the read errors they recovered from in readRetries.
     """
+    bytesRead: int = 0
+    bytesWritten: int = 0
+    readRetries: int = 0
 
     def __init__(self):
         self._closed = False
@@ -195,6 +262,17 @@ class ftdiChannel:
             raise IOError("Simulated device is closed.")
         return bytes()
 
+    def read_into(self, buffer: WritableBuffer, offset: int, numBytes: int) -> int:
+        """
+        Reads numBytes into a caller-owned writable buffer starting at offset.
+        Channels without a native implementation fall back to read() and a copy.
+        Returns the number of bytes written.
+        """
+        data = self.read(numBytes)
+        view = memoryview(buffer).cast('B')
+        view[offset:offset + len(data)] = data
+        return len(data)
+
     def readEEPROM(self):
         return {
             "Manufacturer": "Sonobotics",
@@ -202,6 +280,16 @@ class ftdiChannel:
             "Device": "1CH SONUS Vitesse",
         }
 
+    # USB transport settings have no effect on channels without a USB link
+    def setTimeouts(self, readTimeOut: int, writeTimeOut: int) -> None:
+        pass
+
+    def setUSBParameters(self, inTransferSize: int, outTransferSize: int) -> None:
+        pass
+
+    def setLatencyTimer(self, timer: int) -> None:
+        pass
+
     def close(self) -> None:
         self._closed = True
 
@@ -209,20 +297,47 @@ class ftdiChannel:
 class sonoboticsFtdiChannel(ftdiChannel):
     '''
     The actual implementation of the FTDI interface.
+
+    A failed SPI read is recovered from in tiers (RECOVERY_TIERS), each tried a few times
+    with exponential backoff until a test read succeeds, after which ReadRecoveredError is
+    raised for the caller to resynchronise. More than ERROR_BUDGET read errors within
+    ERROR_WINDOW seconds on the channel are fatal.
     '''
+    # Per-channel error budget over a sliding window
+    ERROR_BUDGET = 10
+    ERROR_WINDOW = 3600.0
+    # Attempts per recovery tier, and the backoff before each attempt, doubling up to the maximum
+    RECOVERY_ATTEMPTS = {RECOVERY_PURGE: 2, RECOVERY_RESET: 2, RECOVERY_REOPEN: 5}
+    BACKOFF_INITIAL = 0.005
+    BACKOFF_MAX = 0.5
+
     # constructor
     # PROTOCOL: SPI/UART
     # CONNMODE: "serialNum"/"deviceNum"
     # CONNID: the device's serial number or device number
-    errorCounter: list[float] = []
-
     def __init__(self, protocol: str, connMode: str, connID: Union[int, bytes]):
         self.protocol = protocol
         self.connID = connID
         self.connMode = connMode
         self.lib = _setup_driver()
 
+        self._errorTimes: deque[float] = deque()
+        # Transport settings, applied again when the handle is reopened
+        self._settings: dict[str, tuple[int, ...]] = {}
+        self.recoveryAttempts: dict[str, int] = {tier: 0 for tier in RECOVERY_TIERS}
+        self.recoveries: dict[str, int] = {tier: 0 for tier in RECOVERY_TIERS}
+        self.recoveryFailures = 0
+        self.recoveryTime = 0.0
+        # Called with a dictionary describing each recovery: tier, attempts, duration, returnCode
+        self.onRecovery: Optional[Callable[[dict[str, Any]], None]] = None
+
+        self._open()
+
+    def _open(self):
         # gets the devices ftHandle
+        protocol = self.protocol
+        connMode = self.connMode
+        connID = self.connID
         if connMode == "serialNum":
             ftHandle = ctypes.c_void_p()
             return_code = self.lib.connect_device(
@@ -277,6 +392,7 @@ class sonoboticsFtdiChannel(ftdiChannel):
                 error_msg = STATUS_MESSAGES.get(
                     return_code, f"Unknown status code: {return_code}")
                 raise Exception(f"Can't write to device ({error_msg})")
+            self.bytesWritten += len(data) if isinstance(data, (bytes, bytearray, str)) else byteLength
 
         elif self.protocol == "SPI":
             if isinstance(data, (bytes, bytearray)):
@@ -296,18 +412,29 @@ class sonoboticsFtdiChannel(ftdiChannel):
                 error_msg = STATUS_MESSAGES.get(
                     return_code, f"Unknown status code: {return_code}")
                 raise Exception(f"Can't write to device ({error_msg})")
+            self.bytesWritten += len(data) if isinstance(data, (bytes, bytearray, str)) else byteLength
 
     # reads data from device and returns as a byte array
 
     def read(self, numBytes: int):
-        if self.protocol == "UART":
-            # Allocate buffer correctly
-            data = (ctypes.c_char * numBytes)()  # Creates an array of c_ubyte
+        py_bytes = bytearray(numBytes)
+        self.read_into(py_bytes, 0, numBytes)
+        return py_bytes
 
-            # Get a proper pointer type
-            data_ptr = ctypes.cast(data, ctypes.POINTER(ctypes.c_char))
+    # reads data from device directly into a caller-owned writable buffer
+    # (bytearray, memoryview or contiguous NumPy array), without intermediate copies
 
-            # Call spiRead with the correct pointer type
+    def read_into(self, buffer: WritableBuffer, offset: int, numBytes: int) -> int:
+        if offset < 0 or numBytes < 0 or offset + numBytes > memoryview(buffer).nbytes:
+            raise ValueError("Read does not fit in the provided buffer")
+
+        # Map a ctypes array straight onto the caller's memory
+        data = (ctypes.c_char * numBytes).from_buffer(buffer, offset)
+
+        # Get a proper pointer type
+        data_ptr = ctypes.cast(data, ctypes.POINTER(ctypes.c_char))
+
+        if self.protocol == "UART":
             return_code = self.lib.uartRead(ctypes.c_void_p(
                 self.ftHandle), wintypes.DWORD(numBytes), data_ptr)
 
@@ -316,62 +443,114 @@ class sonoboticsFtdiChannel(ftdiChannel):
                     return_code, f"Unknown status code: {return_code}")
                 raise Exception(f"Can't read from device ({error_msg})")
 
-            # Convert the buffer to a Python bytearray
-            py_bytes = bytearray(data.raw)
-
         elif self.protocol == "SPI":
-            # Allocate buffer correctly
-            data = (ctypes.c_char * numBytes)()  # Creates an array of c_ubyte
-
-            # Get a proper pointer type
-            data_ptr = ctypes.cast(data, ctypes.POINTER(ctypes.c_char))
-
             # Call spiRead with the correct pointer type
             return_code = self.lib.spiRead(ctypes.c_void_p(
                 self.ftHandle), numBytes, data_ptr)
 
-            # While error detected
-            # This ensures no garbage data is leaked
-            while return_code != 0:
-                # Counting the errors, if > 10 times in 1 hour, raise error
-                errorTimestamp = time.time()
-                self.errorCounter.append(errorTimestamp)
-                self.errorCounter = self.errorCounter[-10:]
-
-                if (len(self.errorCounter) >= 10 and time.time() - self.errorCounter[0] < 3600):
-                    error_msg = STATUS_MESSAGES.get(
-                        return_code, f"Unknown status code: {return_code}")
-                    raise Exception(
-                        f"Repetitive read error occured from device ({error_msg})")
-
-                # Try reloading driver and reconnecting SPI device
-                MAX_RETRIES = 20
-                for i in range(MAX_RETRIES):
-                    try:
-                        self.close()
-                        self.__init__(
-                            self.protocol, self.connMode, self.connID)
-                        break
-                    except:
-                        time.sleep(0.1)
-                        # If cannot connect to device in 20 tries, raise error
-                        if i == MAX_RETRIES - 1:
-                            error_msg = STATUS_MESSAGES.get(
-                                return_code, f"Unknown status code: {return_code}")
-                            raise Exception(
-                                f"Can't read from device ({error_msg})")
-
-                # Try reading again
-                return_code = self.lib.spiRead(ctypes.c_void_p(
-                    self.ftHandle), numBytes, data_ptr)
-
-            # Convert the buffer to a Python bytearray
-            py_bytes = bytearray(data.raw)
+            # The bytes of a failed read are never handed over: recover, then let the caller resync
+            if return_code != 0:
+                self._recover(return_code)
+                error_msg = STATUS_MESSAGES.get(
+                    return_code, f"Unknown status code: {return_code}")
+                raise ReadRecoveredError(
+                    f"Read of {numBytes} bytes failed and was recovered from, its data is lost ({error_msg})")
 
         else:
             raise ValueError("Uninterpretable self.protocol")
 
-        return py_bytes
+        self.bytesRead += numBytes
+        return numBytes
+
+    def _recover(self, return_code: int):
+        """
+        Brings the channel back after a failed SPI read, escalating through RECOVERY_TIERS.
+
+        Raises:
+            IOError: If the error budget of the channel is exhausted, or no tier recovered it.
+        """
+        error_msg = STATUS_MESSAGES.get(
+            return_code, f"Unknown status code: {return_code}")
+        now = time.monotonic()
+        self._errorTimes.append(now)
+        while self._errorTimes and now - self._errorTimes[0] > self.ERROR_WINDOW:
+            self._errorTimes.popleft()
+        if len(self._errorTimes) > self.ERROR_BUDGET:
+            raise IOError(
+                f"Repetitive read error occured from device ({error_msg})")
+
+        start = time.perf_counter()
+        delay = self.BACKOFF_INITIAL
+        attempts = 0
+        for tier in RECOVERY_TIERS:
+            for _ in range(self.RECOVERY_ATTEMPTS.get(tier, 0)):
+                time.sleep(delay)
+                delay = min(2 * delay, self.BACKOFF_MAX)
+                attempts += 1
+                self.recoveryAttempts[tier] += 1
+                try:
+                    recovered = self._recoverWith(tier)
+                except Exception:
+                    recovered = False
+                if recovered:
+                    duration = time.perf_counter() - start
+                    self.readRetries += 1
+                    self.recoveries[tier] += 1
+                    self.recoveryTime += duration
+                    if self.onRecovery is not None:
+                        self.onRecovery({"tier": tier, "attempts": attempts,
+                                         "duration": duration, "returnCode": return_code})
+                    return
+
+        self.recoveryFailures += 1
+        self.recoveryTime += time.perf_counter() - start
+        raise IOError(f"Can't read from device ({error_msg})")
+
+    def _recoverWith(self, tier: str) -> bool:
+        """
+        Applies one recovery tier and returns whether a test read then succeeds.
+        """
+        handle = ctypes.c_void_p(self.ftHandle)
+        if tier == RECOVERY_PURGE:
+            if not hasattr(self.lib, "FT_Purge"):
+                return False
+            self.lib.FT_Purge(handle, FT_PURGE_RX | FT_PURGE_TX)
+        elif tier == RECOVERY_RESET:
+            if not hasattr(self.lib, "FT_ResetDevice"):
+                return False
+            if self.lib.FT_ResetDevice(handle) != 0 or self.lib.configureSPI(handle) != 0:
+                return False
+            self._applySettings()
+        else:
+            try:
+                self.lib.close(handle)
+            except Exception:
+                pass
+            # A device that dropped off the bus and came back is claimed by ftdi_sio again
+            _unload_kernel_module(force=True)
+            self._open()
+            self._applySettings()
+
+        probe = (ctypes.c_char * 1)()
+        return self.lib.spiRead(ctypes.c_void_p(self.ftHandle), 1,
+                                ctypes.cast(probe, ctypes.POINTER(ctypes.c_char))) == 0
+
+    def _applySettings(self):
+        for name, arguments in self._settings.items():
+            getattr(self, name)(*arguments)
+
+    def recoveryMetrics(self) -> dict[str, Any]:
+        """
+        Returns the read error recovery counters of the channel: errors within the current
+        window, attempts and successes per tier, failures and the total time spent recovering.
+        """
+        return {
+            "errorsInWindow": len(self._errorTimes),
+            "attempts": dict(self.recoveryAttempts),
+            "recoveries": dict(self.recoveries),
+            "failures": self.recoveryFailures,
+            "recoveryTime": self.recoveryTime,
+        }
 
     def readEEPROM(self):
 
@@ -437,6 +616,7 @@ class sonoboticsFtdiChannel(ftdiChannel):
 
     # configure device timouts
     def setTimeouts(self, readTimeOut: int, writeTimeOut: int):
+        self._settings["setTimeouts"] = (readTimeOut, writeTimeOut)
         return_code = self.lib.setTimeouts(ctypes.c_void_p(self.ftHandle), wintypes.DWORD(
             readTimeOut), wintypes.DWORD(writeTimeOut))
         if return_code != 0:
@@ -446,6 +626,7 @@ class sonoboticsFtdiChannel(ftdiChannel):
 
     # configure device USB parameters
     def setUSBParameters(self, inTransferSize: int, outTransferSize: int):
+        self._settings["setUSBParameters"] = (inTransferSize, outTransferSize)
         return_code = self.lib.setUSBParameters(ctypes.c_void_p(
             self.ftHandle), wintypes.DWORD(inTransferSize), wintypes.DWORD(outTransferSize))
         if return_code != 0:
@@ -455,6 +636,7 @@ class sonoboticsFtdiChannel(ftdiChannel):
 
     # configure device latency timer
     def setLatencyTimer(self, timer: int):
+        self._settings["setLatencyTimer"] = (timer,)
         return_code = self.lib.setLatencyTimer(
             ctypes.c_void_p(self.ftHandle), wintypes.CHAR(timer))
         if return_code != 0:
@@ -0,0 +1,196 @@
+from __future__ import annotations
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Iterator, Optional
+import numpy as np
+
+# Backpressure policies applied when the ring is full and the consumer falls behind
+BACKPRESSURE_BLOCK = "block"              # The producer waits for the consumer
+BACKPRESSURE_DROP_OLDEST = "drop-oldest"  # The oldest undelivered frame is discarded
+BACKPRESSURE_DROP_NEWEST = "drop-newest"  # The frame just acquired is discarded
+VALID_BACKPRESSURE = [BACKPRESSURE_BLOCK,
+                      BACKPRESSURE_DROP_OLDEST, BACKPRESSURE_DROP_NEWEST]
+
+
+class VitesseStream:
+    """
+    Background acquisition with a bounded ring of preallocated frame buffers.
+
+    A producer thread repeatedly acquires raw frames into free buffers of the ring,
+    while consumers iterate over decoded frames. Since the blocking FTDI calls release
+    the GIL, device transfers overlap with decoding in the consumer.
+
+    Args:
+        newBuffer (Callable[[], Any]): Allocates one frame buffer of the ring.
+        acquire (Callable[[Any], Any]): Fills a buffer with the next frame and returns the
+            object to hand to decode (usually the buffer itself).
+        decode (Callable[[Any], np.ndarray]): Turns an acquired frame into the echo signal.
+        numBuffers (int): Maximum number of acquired frames waiting for a consumer.
+        backpressure (str): One of VALID_BACKPRESSURE.
+    """
+
+    def __init__(self,
+                 newBuffer: Callable[[], Any],
+                 acquire: Callable[[Any], Any],
+                 decode: Callable[[Any], np.ndarray],
+                 numBuffers: int = 8,
+                 backpressure: str = BACKPRESSURE_BLOCK):
+        if numBuffers < 1:
+            raise ValueError('Number of buffers must be at least 1.')
+        if backpressure not in VALID_BACKPRESSURE:
+            raise ValueError(
+                f'Invalid backpressure policy, expected one of {VALID_BACKPRESSURE}.')
+
+        self.numBuffers = numBuffers
+        self.backpressure = backpressure
+        self._acquire = acquire
+        self._decode = decode
+
+        # One extra buffer for the frame in flight on the producer side and one
+        # for the frame being decoded on the consumer side.
+        self._buffers: list[Any] = [newBuffer() for _ in range(numBuffers + 2)]
+        self._free: deque[int] = deque(range(len(self._buffers)))
+        self._filled: deque[tuple[int, Any]] = deque()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._error: Optional[BaseException] = None
+
+        self.acquiredFrames: int = 0
+        self.deliveredFrames: int = 0
+        self.droppedFrames: int = 0
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, _type, _value, _traceback):  # type: ignore
+        self.stop()
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        while True:
+            frame = self.get()
+            if frame is None:
+                return
+            yield frame
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> VitesseStream:
+        """
+        Starts the producer thread.
+
+        Returns:
+            VitesseStream: Returns the instance for method chaining.
+        """
+        if self.running:
+            return self
+        self._stopping = False
+        self._error = None
+        self._thread = threading.Thread(
+            target=self._produce, name="VitesseStream", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stops the producer thread once the frame in flight has been fully read,
+        so the device is left at a frame boundary. Undelivered frames are discarded.
+        """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        with self._condition:
+            while self._filled:
+                self._free.append(self._filled.popleft()[0])
+
+    def get(self, timeout: Optional[float] = None) -> Optional[np.ndarray]:
+        """
+        Returns the next decoded frame, oldest first.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait for a frame. Waits indefinitely if None.
+
+        Returns:
+            numpy.ndarray: The decoded frame, or None once the stream is stopped and drained.
+
+        Raises:
+            TimeoutError: If no frame became available within the timeout.
+            Exception: Whatever error stopped the producer thread.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while not self._filled:
+                if self._error is not None:
+                    error, self._error = self._error, None
+                    raise error
+                if self._stopping or not self.running:
+                    return None
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("No frame acquired within the timeout.")
+                self._condition.wait(remaining)
+            index, frame = self._filled.popleft()
+            self._condition.notify_all()
+
+        try:
+            return self._decode(frame)
+        finally:
+            with self._condition:
+                self._free.append(index)
+                self.deliveredFrames += 1
+                self._condition.notify_all()
+
+    def _produce(self) -> None:
+        try:
+            with self._condition:
+                index = self._free.popleft()
+            while not self._stopping:
+                frame = self._acquire(self._buffers[index])
+                with self._condition:
+                    self.acquiredFrames += 1
+                    index = self._publish(index, frame)
+                    if index is None:
+                        return
+        except BaseException as error:
+            with self._condition:
+                self._error = error
+        finally:
+            with self._condition:
+                self._stopping = True
+                self._condition.notify_all()
+
+    def _publish(self, index: int, frame: Any) -> Optional[int]:
+        """
+        Queues an acquired frame according to the backpressure policy and returns the
+        index of the next buffer to acquire into. Must be called with the lock held.
+        """
+        if len(self._filled) >= self.numBuffers:
+            if self.backpressure == BACKPRESSURE_DROP_NEWEST:
+                self.droppedFrames += 1
+                return index
+            if self.backpressure == BACKPRESSURE_DROP_OLDEST:
+                self._free.append(self._filled.popleft()[0])
+                self.droppedFrames += 1
+            while len(self._filled) >= self.numBuffers and not self._stopping:
+                self._condition.wait()
+            if self._stopping:
+                return None
+
+        self._filled.append((index, frame))
+        self._condition.notify_all()
+
+        # Consumers may still be holding buffers while decoding
+        while not self._free and not self._stopping:
+            if self.backpressure == BACKPRESSURE_DROP_OLDEST and self._filled:
+                self._free.append(self._filled.popleft()[0])
+                self.droppedFrames += 1
+            else:
+                self._condition.wait()
+        if self._stopping:
+            return None
+        return self._free.popleft()
@@ -0,0 +1,24 @@
+import importlib.util
+import sys
+from pathlib import Path
+import pytest
+
+# The repository root is the VitesseAPI package itself; import it under that name
+ROOT = Path(__file__).resolve().parent.parent
+if "VitesseAPI" not in sys.modules:
+    spec = importlib.util.spec_from_file_location(
+        "VitesseAPI", ROOT / "__init__.py", submodule_search_locations=[str(ROOT)])
+    package = importlib.util.module_from_spec(spec)
+    sys.modules["VitesseAPI"] = package
+    spec.loader.exec_module(package)
+
+
+@pytest.fixture
+def device():
+    """
+    A Vitesse on a VitesseEmulator whose frames are ready at once, with the default configuration.
+    """
+    from VitesseAPI.benchmarks.suite import emulatedDevice
+    V = emulatedDevice(readDelay=0)
+    yield V
+    V.spiDevice.close()
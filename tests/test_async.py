@@ -0,0 +1,36 @@
+import asyncio
+import time
+import pytest
+from VitesseAPI import AsyncVitesse
+
+
+def test_configuration_waits_on_the_event_loop(device, monkeypatch):
+    device.READ_DELAY = 0.01
+    blocking = []
+    sleep = time.sleep
+    monkeypatch.setattr(time, "sleep", lambda seconds: (blocking.append(seconds), sleep(seconds)))
+
+    async def main():
+        AV = AsyncVitesse(device)
+        await AV.set_config(numAverages=7, PRF=2000)
+        batch = await AV.configure(device.setAverages, 9)
+        data = await AV.get_array()
+        await AV.closeDevice()
+        return batch, data
+
+    batch, data = asyncio.run(main())
+    assert device.READ_DELAY not in blocking
+    assert batch.statuses == [50]
+    assert device.spiDevice.numAverages == 9
+    assert data.shape == (1, device.recordPoints)
+
+
+def test_failed_status_invalidates_shadow(device):
+    device.spiDevice.read = lambda numBytes: bytes([200]) * numBytes
+
+    async def main():
+        AV = AsyncVitesse(device)
+        with pytest.raises(ValueError):
+            await AV.setConfig(numAverages=7)
+    asyncio.run(main())
+    assert device._shadow == {}
@@ -0,0 +1,54 @@
+import types
+import pytest
+from VitesseAPI import sonoboticsFTDI as sbftdi
+
+
+def _answer(V, status):
+    """
+    Makes the emulated device answer every status read with status.
+    """
+    V.spiDevice.read = types.MethodType(lambda self, numBytes: bytes([status]) * numBytes, V.spiDevice)
+
+
+def test_repeated_configuration_sends_nothing(device):
+    commands = device.spiDevice.commandsReceived
+    device.setConfig()
+    assert device.spiDevice.commandsReceived == commands
+
+
+def test_configuration_sends_only_changed_registers(device):
+    commands = device.spiDevice.commandsReceived
+    with device.batch() as batch:
+        device.setAverages(7).setAverages(7)
+    assert device.spiDevice.commandsReceived == commands + 1
+    assert batch.statuses == [50]
+    assert device.spiDevice.numAverages == 7
+
+
+def test_invalidated_shadow_resends_every_register(device):
+    device.setConfig()
+    commands = device.spiDevice.commandsReceived
+    device.invalidateShadow().setConfig()
+    assert device.spiDevice.commandsReceived > commands
+
+
+@pytest.mark.parametrize("status, error", [(200, ValueError), (7, RuntimeError)])
+def test_failed_status_raises_and_invalidates_shadow(device, status, error):
+    _answer(device, status)
+    with pytest.raises(error):
+        with device.batch():
+            device.setAverages(7)
+    assert device._shadow == {}
+
+
+def test_lost_statuses_drain_and_invalidate_shadow(device):
+    def read(self, numBytes):
+        # Lose the statuses once, then behave as an idle device
+        self.read = types.MethodType(lambda self, numBytes: bytes([200]) * numBytes, self)
+        raise sbftdi.ReadRecoveredError("lost")
+    device.spiDevice.read = types.MethodType(read, device.spiDevice)
+
+    with pytest.raises(sbftdi.ReadRecoveredError):
+        with device.batch():
+            device.setAverages(7)
+    assert device._shadow == {}
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from VitesseAPI import utils
+
+
+@pytest.mark.parametrize("numBytes, vectorised, scalar", [
+    (2, utils.float16_array_to_decimal, utils.float16_to_decimal),
+    (3, utils.float24_array_to_decimal, utils.float24_to_decimal),
+])
+def test_array_decoding_matches_scalar_baseline(numBytes, vectorised, scalar):
+    rng = np.random.default_rng(0)
+    samples = rng.integers(0, 256, (4000, numBytes), dtype=np.uint8)
+    # Subnormals, zeros and both signs, which random bytes rarely hit
+    samples[:4] = [[0] * numBytes, [0x80] + [0] * (numBytes - 1),
+                   [0x00] + [0xFF] * (numBytes - 1), [0xFF] * numBytes]
+
+    expected = np.array([scalar("".join(f"{byte:08b}" for byte in sample)) for sample in samples])
+    decoded = vectorised(samples.reshape(40, 100, numBytes)).ravel()
+    assert np.array_equal(decoded.view(np.uint64), expected.view(np.uint64))
+
+
+@pytest.mark.parametrize("numBytes, decode, encode", [
+    (2, utils.float16_array_to_decimal, utils.float16_array_from_decimal),
+    (3, utils.float24_array_to_decimal, utils.float24_array_from_decimal),
+])
+def test_encoding_round_trips_adc_codes(numBytes, decode, encode):
+    codes = np.arange(0, 4096 * 100, 37, dtype=np.float64)
+    encoded = encode(codes)
+    assert encoded.shape == (len(codes), numBytes)
+    assert np.allclose(decode(encoded), codes, rtol=2.0 ** -8 if numBytes == 2 else 2.0 ** -16)
+
+
+def test_array_decoding_checks_sample_width():
+    with pytest.raises(ValueError):
+        utils.float24_array_to_decimal(np.zeros((4, 2), dtype=np.uint8))
+
+
+@pytest.mark.parametrize("shape", [(3, 7), (2, utils.DECODE_BLOCK_SAMPLES + 5), (5, 0)])
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_echo_signal_decoding_matches_stepwise_reference(shape, dtype):
+    rng = np.random.default_rng(1)
+    samples = rng.integers(0, 256, shape + (3,), dtype=np.uint8)
+    signs = np.array([1.0, -1.0, -1.0, 1.0, 1.0])[:shape[0]]
+
+    expected = (utils.float24_array_to_decimal(samples) / 100 - 2048) * signs[:, None]
+    decoded = utils.decode_echo_signal(samples, 100, signs, np.empty(shape, dtype=dtype))
+    assert np.array_equal(decoded, expected.astype(dtype))
@@ -0,0 +1,37 @@
+import pytest
+from VitesseAPI import Vitesse
+from VitesseAPI import sonoboticsFTDI as sbftdi
+
+
+class FrequencyOnlyChannel(sbftdi.ftdiChannel):
+    """
+    Firmware that answers 's' with the frequency byte and no status byte.
+    """
+
+    def __init__(self, frequency):
+        super().__init__()
+        self.frequency = frequency
+        self.output = bytearray()
+
+    def write(self, data):
+        super().write(data)
+        if bytes(data[:1]) == b"s":
+            self.output.append(self.frequency)
+
+    def read(self, numBytes):
+        data = bytes(self.output[:numBytes]).ljust(numBytes, b"\xc8")
+        del self.output[:numBytes]
+        return data
+
+
+@pytest.mark.parametrize("frequency", [25, 50, 100])
+def test_frequency_with_status(device, frequency):
+    device.spiDevice.adcFrequency = frequency * 1000000
+    assert device.getFrequency() == frequency * 1000000
+
+
+def test_frequency_without_status():
+    V = Vitesse()
+    V.READ_DELAY = 0
+    V.spiDevice = FrequencyOnlyChannel(25)
+    assert V.getFrequency() == 25000000
@@ -0,0 +1,107 @@
+import types
+import pytest
+from VitesseAPI import check_frame
+from VitesseAPI import sonoboticsFTDI as sbftdi
+
+
+def _corrupt(V, corruption, times=1):
+    """
+    Makes the emulated device send its next frames corrupted by corruption(frame).
+    """
+    emulator = V.spiDevice
+    build = emulator.frame
+    remaining = [times]
+
+    def frame(self):
+        data = build()
+        if remaining[0] > 0:
+            remaining[0] -= 1
+            return corruption(data)
+        return data
+    emulator.frame = types.MethodType(frame, emulator)
+
+
+def _dropByte(frame):
+    return frame[:10] + frame[11:]
+
+
+def _insertByte(frame):
+    return frame[:10] + b"\x07" + frame[10:]
+
+
+@pytest.fixture
+def checked(device):
+    device.setConfig(channelsOnReceive=[1, 1, 0, 0, 0, 0, 0, 0])
+    return device
+
+
+def test_raw_frames_match_layout(device):
+    frame, layout = device.getRawFrame()
+    assert check_frame(frame, layout)
+    assert not check_frame(_dropByte(frame.tobytes()) + b"\xc8", layout)
+    assert not check_frame(frame[:-1], layout)
+
+
+def test_gained_byte_is_detected_by_default(checked):
+    assert checked.FRAME_CHECK and not checked.FRAME_MARKER_CHECK
+    _corrupt(checked, _insertByte)
+    checked.getArray()
+    assert (checked.framesDesynced, checked.framesRecovered) == (1, 1)
+
+
+def test_lost_byte_needs_the_marker_check(checked):
+    _corrupt(checked, _dropByte)
+    checked.getArray()
+    assert checked.framesDesynced == 0
+
+    checked.FRAME_MARKER_CHECK = True
+    _corrupt(checked, _dropByte)
+    checked.getArray()
+    assert (checked.framesDesynced, checked.framesRecovered) == (1, 1)
+
+
+@pytest.mark.parametrize("corruption", [_dropByte, _insertByte])
+def test_misaligned_frame_is_read_again(checked, corruption):
+    checked.FRAME_MARKER_CHECK = True
+    expected = checked.getArray(raw=True)
+    _corrupt(checked, corruption)
+    assert checked.getArray(raw=True).shape == expected.shape
+    assert checked.framesDesynced == 1
+    assert checked.framesRecovered == 1
+    # The device was left idle, so the next frame is aligned at once
+    checked.getArray(raw=True)
+    assert checked.framesDesynced == 1
+
+
+def test_persistent_misalignment_raises(checked):
+    _corrupt(checked, _insertByte, times=checked.FRAME_RESYNC_ATTEMPTS + 1)
+    with pytest.raises(IOError):
+        checked.getArray()
+    assert checked.framesDesynced == checked.FRAME_RESYNC_ATTEMPTS + 1
+    assert checked.framesRecovered == 0
+
+
+def test_recovered_read_error_counts_as_resync(checked):
+    # Long enough for the frame to need more than its ready block
+    checked.setConfig(channelsOnReceive=[1, 1, 0, 0, 0, 0, 0, 0], recordLength=200e-6)
+    emulator = checked.spiDevice
+    readInto = emulator.read_into
+    failures = [1]
+
+    def read_into(self, buffer, offset, numBytes):
+        # Fail the first read of the frame after its ready block
+        if failures[0] and numBytes > checked.READY_BLOCK_BYTES:
+            failures[0] -= 1
+            raise sbftdi.ReadRecoveredError("lost")
+        return readInto(buffer, offset, numBytes)
+    emulator.read_into = types.MethodType(read_into, emulator)
+
+    checked.getArray()
+    assert (checked.framesDesynced, checked.framesRecovered) == (1, 1)
+
+
+def test_check_can_be_disabled(checked):
+    checked.FRAME_CHECK = False
+    _corrupt(checked, _insertByte)
+    checked.getArray()
+    assert checked.framesDesynced == 0
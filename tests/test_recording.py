@@ -0,0 +1,64 @@
+import os
+import numpy as np
+import pytest
+from VitesseAPI import RecordingWriter, RecordingReader
+from VitesseAPI.recording import indexPath, recoverRecording
+
+
+@pytest.fixture
+def recording(device, tmp_path):
+    """
+    A recording of five raw frames with peripherals, and the frames written.
+    """
+    device.setConfig(peripheralsOnArray=[1, 1, 1, 1, 0, 0, 0, 0])
+    path = tmp_path / "frames.vrec"
+    frames = []
+    with RecordingWriter.fromDevice(path, device) as writer:
+        for i in range(5):
+            frame, _ = device.getRawFrame()
+            writer.write(frame, timestamp=float(i))
+            frames.append(frame.copy())
+    return path, frames
+
+
+def test_reader_returns_written_frames(recording, device):
+    path, frames = recording
+    with RecordingReader(path) as reader:
+        assert len(reader) == 5 and not reader.truncated
+        assert np.array_equal(reader[:], frames)
+        assert np.array_equal(reader.timestamps, np.arange(5.0))
+        assert reader.seekTime(2.5) == 3
+
+
+@pytest.mark.parametrize("dataCut, indexCut, kept", [(1, 0, 4), (0, 1, 4), (0, 0, 5)])
+def test_recovery_truncates_to_last_complete_frame(recording, dataCut, indexCut, kept):
+    path, frames = recording
+    os.truncate(path, path.stat().st_size - dataCut)
+    index = indexPath(path)
+    os.truncate(index, index.stat().st_size - indexCut)
+
+    with RecordingReader(path) as reader:
+        assert len(reader) == kept
+        assert reader.truncated == (kept < 5)
+    assert recoverRecording(path) == kept
+    with RecordingReader(path) as reader:
+        assert len(reader) == kept and not reader.truncated
+        assert np.array_equal(reader[:], frames[:kept])
+
+
+def test_recovery_recreates_missing_index(recording):
+    path, _ = recording
+    indexPath(path).unlink()
+    assert recoverRecording(path) == 0
+    assert len(RecordingReader(path)) == 0
+
+
+def test_append_discards_partial_frame(recording, device):
+    path, frames = recording
+    os.truncate(path, path.stat().st_size - 3)
+    with RecordingWriter.fromDevice(path, device, append=True) as writer:
+        assert writer.numFrames == 4
+        writer.write(frames[-1], timestamp=4.0)
+    with RecordingReader(path) as reader:
+        assert len(reader) == 5 and not reader.truncated
+        assert np.array_equal(reader[:], frames)
@@ -0,0 +1,150 @@
+import types
+import pytest
+from VitesseAPI import sonoboticsFTDI as sbftdi
+
+FT_IO_ERROR = 4
+
+
+class FakeLib:
+    """
+    Stands in for the driver library: spiRead returns the queued status codes, then 0.
+    """
+
+    def __init__(self, readCodes=(), resetCode=0):
+        self.readCodes = list(readCodes)
+        self.resetCode = resetCode
+        self.calls: list[str] = []
+
+    def connect_device_num(self, connID, handle):
+        self.calls.append("connect")
+        handle._obj.value = 1
+        return 0
+
+    def configureSPI(self, handle):
+        self.calls.append("configureSPI")
+        return 0
+
+    def spiRead(self, handle, numBytes, data):
+        return self.readCodes.pop(0) if self.readCodes else 0
+
+    def FT_Purge(self, handle, mask):
+        self.calls.append("purge")
+        return 0
+
+    def FT_ResetDevice(self, handle):
+        self.calls.append("reset")
+        return self.resetCode
+
+    def setLatencyTimer(self, handle, timer):
+        self.calls.append("setLatencyTimer")
+        return 0
+
+    def close(self, handle):
+        self.calls.append("close")
+        return 0
+
+
+def _channel(monkeypatch, lib):
+    monkeypatch.setattr(sbftdi, "_setup_driver", lambda: lib)
+    monkeypatch.setattr(sbftdi, "_unload_kernel_module",
+                        lambda force=False: lib.calls.append(f"unload(force={force})"))
+    channel = sbftdi.sonoboticsFtdiChannel("SPI", "deviceNum", 0)
+    channel.BACKOFF_INITIAL = 0
+    channel.setLatencyTimer(2)
+    lib.calls.clear()
+    return channel
+
+
+def test_successful_read_counts_bytes(monkeypatch):
+    channel = _channel(monkeypatch, FakeLib())
+    assert len(channel.read(10)) == 10
+    assert channel.bytesRead == 10
+    assert channel.recoveryMetrics()["errorsInWindow"] == 0
+
+
+def test_purge_recovers(monkeypatch):
+    lib = FakeLib([FT_IO_ERROR])
+    channel = _channel(monkeypatch, lib)
+    events = []
+    channel.onRecovery = events.append
+
+    with pytest.raises(sbftdi.ReadRecoveredError):
+        channel.read(10)
+    assert lib.calls == ["purge"]
+    assert [event["tier"] for event in events] == [sbftdi.RECOVERY_PURGE]
+    metrics = channel.recoveryMetrics()
+    assert metrics["recoveries"][sbftdi.RECOVERY_PURGE] == 1
+    assert metrics["errorsInWindow"] == 1
+    assert channel.bytesRead == 0
+    assert len(channel.read(10)) == 10
+
+
+def test_reset_recovers_and_restores_settings(monkeypatch):
+    # The read, then both purge test reads fail
+    lib = FakeLib([FT_IO_ERROR] * 3)
+    channel = _channel(monkeypatch, lib)
+
+    with pytest.raises(sbftdi.ReadRecoveredError):
+        channel.read(10)
+    assert lib.calls == ["purge", "purge", "reset", "configureSPI", "setLatencyTimer"]
+    metrics = channel.recoveryMetrics()
+    assert metrics["attempts"] == {sbftdi.RECOVERY_PURGE: 2, sbftdi.RECOVERY_RESET: 1, sbftdi.RECOVERY_REOPEN: 0}
+    assert metrics["recoveries"][sbftdi.RECOVERY_RESET] == 1
+
+
+def test_reopen_recovers(monkeypatch):
+    lib = FakeLib([FT_IO_ERROR] * 3, resetCode=FT_IO_ERROR)
+    channel = _channel(monkeypatch, lib)
+
+    with pytest.raises(sbftdi.ReadRecoveredError):
+        channel.read(10)
+    assert lib.calls[-5:] == ["close", "unload(force=True)", "connect", "configureSPI", "setLatencyTimer"]
+    assert channel.recoveryMetrics()["recoveries"][sbftdi.RECOVERY_REOPEN] == 1
+
+
+def test_unrecoverable_read_raises_io_error(monkeypatch):
+    lib = FakeLib([FT_IO_ERROR] * 100)
+    channel = _channel(monkeypatch, lib)
+
+    with pytest.raises(IOError) as error:
+        channel.read(10)
+    assert not isinstance(error.value, sbftdi.ReadRecoveredError)
+    metrics = channel.recoveryMetrics()
+    assert metrics["failures"] == 1
+    assert sum(metrics["attempts"].values()) == sum(channel.RECOVERY_ATTEMPTS.values())
+
+
+def test_error_budget_is_fatal(monkeypatch):
+    channel = _channel(monkeypatch, FakeLib())
+    channel.ERROR_BUDGET = 2
+    for _ in range(2):
+        channel.lib.readCodes = [FT_IO_ERROR]
+        with pytest.raises(sbftdi.ReadRecoveredError):
+            channel.read(10)
+
+    channel.lib.readCodes = [FT_IO_ERROR]
+    with pytest.raises(IOError) as error:
+        channel.read(10)
+    assert not isinstance(error.value, sbftdi.ReadRecoveredError)
+
+
+def test_drain_survives_recovered_read_error(device):
+    emulator = device.spiDevice
+    readInto = emulator.read_into
+    failures = [1]
+
+    def read_into(self, buffer, offset, numBytes):
+        if failures[0]:
+            failures[0] -= 1
+            raise sbftdi.ReadRecoveredError("lost")
+        return readInto(buffer, offset, numBytes)
+    emulator.read_into = types.MethodType(read_into, emulator)
+    device.closeDevice()
+    assert failures == [0]
+
+
+def test_drain_of_a_busy_device_times_out(device):
+    device.CLEAR_TIMEOUT = 0.05
+    device.spiDevice.read = types.MethodType(lambda self, numBytes: bytes(numBytes), device.spiDevice)
+    with pytest.raises(IOError):
+        device._clearBuffer()
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from VitesseAPI import Vitesse, VitesseEmulator, SessionRecorder, ReplayFtdiChannel
+
+
+@pytest.fixture
+def session(tmp_path):
+    """
+    A session recording the default configuration and two frames, and the frames read.
+    """
+    path = tmp_path / "session.vses"
+    recorder = SessionRecorder(VitesseEmulator(seed=0, realTime=False), path, {"maxChannels": 8})
+    V = Vitesse()
+    V.READ_DELAY = 0
+    V.initialiseChannel(recorder, maxChannels=8)
+    frames = [V.getArray(), V.getArray()]
+    V.closeDevice()
+    return path, frames
+
+
+def test_replay_reproduces_session(session):
+    path, frames = session
+    replay = ReplayFtdiChannel(path, strict=True)
+    V = Vitesse()
+    V.READ_DELAY = 0
+    V.initialiseChannel(replay, replay.metadata["maxChannels"])
+    for frame in frames:
+        assert np.array_equal(V.getArray(), frame)
+    assert replay.discardedBytes == 0
+
+
+def test_strict_replay_refuses_divergent_commands(session):
+    path, _ = session
+    replay = ReplayFtdiChannel(path, strict=True)
+    V = Vitesse()
+    V.READ_DELAY = 0
+    V.initialiseChannel(replay, replay.metadata["maxChannels"])
+    with pytest.raises(IOError):
+        V.setAverages(7)
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+from VitesseAPI import Vitesse, VitesseGroup
+
+
+@pytest.fixture
+def simulated():
+    V = Vitesse().initialise(simulation=True).setSimulationSeed(0)
+    V.setConfig(channelsOnReceive=[1, 1, 0, 0, 0, 0, 0, 0])
+    return V
+
+
+@pytest.mark.parametrize("raw", [False, True])
+def test_frame_block_has_the_shape_of_simulated_frames(simulated, raw):
+    frames, table = simulated.getArrays(3, raw=raw)
+    assert frames.shape == (3, *simulated.getArray().shape)
+    assert frames.dtype == (np.int32 if raw else np.float64)
+    assert len(table) == 3
+
+
+def test_frame_block_decodes_into_caller_array(simulated):
+    out = np.zeros((2, *simulated.getArray().shape), dtype=np.float32)
+    frames, _ = simulated.getArrays(2, out=out)
+    assert frames is out and np.all(out != 0)
+    with pytest.raises(ValueError):
+        simulated.getArrays(3, out=out)
+
+
+def test_group_acquires_simulated_devices(simulated):
+    other = Vitesse().initialise(simulation=True)
+    with VitesseGroup([simulated, other]) as group:
+        results = group.getArrays(2)
+    assert [frames.shape[0] for frames, _ in results.values()] == [2, 2]
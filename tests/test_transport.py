@@ -0,0 +1,33 @@
+import pytest
+from VitesseAPI import transport
+
+
+def _calibrate(device):
+    return device.calibrateTransport([4096], [1, 2], [16384], [250e-6], numFrames=1, persist=False)
+
+
+def test_calibration_applies_best_profile(device):
+    profile, measurements = _calibrate(device)
+    assert device.transportProfile == profile
+    assert len(measurements) == 2 and all("frameReadTime" in m for m in measurements)
+    assert device.numAverages == 100
+
+
+def test_failed_calibration_restores_previous_profile(device, monkeypatch):
+    device.setTransportProfile("bulk-throughput")
+    previous = device.transportProfile
+    monkeypatch.setattr(transport, "_frameReadTime", lambda *_: (_ for _ in ()).throw(TimeoutError()))
+    with pytest.raises(RuntimeError, match="previous settings were restored"):
+        _calibrate(device)
+    assert device.transportProfile == previous
+    assert (device.READ_DELAY, device.MAX_READ_CHUNK) == (previous.readDelay, previous.maxReadChunk)
+    assert device.numAverages == 100
+
+
+def test_failed_calibration_without_profile_restores_host_settings(device, monkeypatch):
+    before = (device.READ_DELAY, device.MAX_READ_CHUNK)
+    monkeypatch.setattr(transport, "_frameReadTime", lambda *_: (_ for _ in ()).throw(TimeoutError()))
+    with pytest.raises(RuntimeError, match="driver defaults cannot be read back"):
+        _calibrate(device)
+    assert device.transportProfile is None
+    assert (device.READ_DELAY, device.MAX_READ_CHUNK) == before
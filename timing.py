@@ -0,0 +1,151 @@
+from __future__ import annotations
+import threading
+import time
+from collections import deque
+from typing import Optional
+import numpy as np
+
+# Phases of an acquisition, in the order they happen
+PHASE_TRIGGER = "trigger"          # Sending queued commands and the acquisition command
+PHASE_WAIT = "wait"                # The numAverages / prf sleep while the device averages
+PHASE_READY = "ready"              # Polling for the ready byte
+PHASE_TRANSFER = "transfer"        # Reading the frame
+PHASE_PERIPHERALS = "peripherals"  # Decoding the peripheral trailer
+PHASE_DECODE = "decode"            # Decoding the samples
+PHASES = [PHASE_TRIGGER, PHASE_WAIT, PHASE_READY, PHASE_TRANSFER, PHASE_PERIPHERALS, PHASE_DECODE]
+# Statistics key for the whole frame, from trigger to decoded
+TOTAL = "total"
+
+STATISTICS_PERCENTILES = [50, 95, 99]
+
+
+class FrameTiming:
+    """
+    Timing of one acquired frame. Timestamps are time.perf_counter() values, which are
+    monotonic and comparable across threads of the process.
+
+    Attributes:
+        index (int): Number of the frame among the frames timed by the device.
+        start (float): When the acquisition was started.
+        phases (dict[str, tuple[float, float]]): (start, end) of each phase that took place,
+            keyed by the PHASE_* constants.
+        bytesRead (int): Bytes read from the device for the frame, ready polls included.
+        pollIterations (int): Reads needed to see the ready byte.
+        retries (int): Read errors the channel recovered from while reading the frame.
+    """
+    __slots__ = ("index", "start", "phases", "bytesRead", "pollIterations", "retries", "_retriesAtStart")
+
+    def __init__(self, index: int, start: float, retriesAtStart: int = 0):
+        self.index = index
+        self.start = start
+        self.phases: dict[str, tuple[float, float]] = {}
+        self.bytesRead = 0
+        self.pollIterations = 0
+        self.retries = 0
+        self._retriesAtStart = retriesAtStart
+
+    def __repr__(self) -> str:
+        durations = ", ".join(f"{phase}={duration * 1e3:.3f} ms" for phase, duration in self.durations().items())
+        return f"FrameTiming(index={self.index}, {durations}, bytesRead={self.bytesRead}, " \
+            f"pollIterations={self.pollIterations}, retries={self.retries})"
+
+    def mark(self, phase: str, start: float, end: Optional[float] = None) -> None:
+        """
+        Records a phase that started at start and ends at end (now if None).
+        """
+        self.phases[phase] = (start, time.perf_counter() if end is None else end)
+
+    def duration(self, phase: str) -> float:
+        """
+        Returns the duration of a phase in seconds, 0 if it did not take place.
+        """
+        if phase not in self.phases:
+            return 0.0
+        start, end = self.phases[phase]
+        return end - start
+
+    def durations(self) -> dict[str, float]:
+        """
+        Returns the duration of each phase that took place, in seconds, in phase order.
+        """
+        return {phase: self.duration(phase) for phase in PHASES if phase in self.phases}
+
+    @property
+    def end(self) -> float:
+        return max((end for _, end in self.phases.values()), default=self.start)
+
+    @property
+    def total(self) -> float:
+        return self.end - self.start
+
+
+class TimingStats:
+    """
+    Rolling statistics of the last frames timed by a device: percentiles of the duration of
+    each phase and of the whole frame, and running totals of the transfer counters.
+    Safe to update from several threads.
+
+    Args:
+        window (int): Number of most recent frames the percentiles are computed over.
+    """
+
+    def __init__(self, window: int = 1000):
+        if window < 1:
+            raise ValueError('Window must hold at least one frame.')
+        self.window = window
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Forgets every frame recorded so far.
+        """
+        with self._lock:
+            self._durations: dict[str, deque[float]] = {
+                phase: deque(maxlen=self.window) for phase in PHASES + [TOTAL]}
+            self.frames = 0
+            self.bytesRead = 0
+            self.pollIterations = 0
+            self.retries = 0
+
+    def record(self, timing: FrameTiming) -> None:
+        with self._lock:
+            for phase, (start, end) in timing.phases.items():
+                self._durations[phase].append(end - start)
+            self._durations[TOTAL].append(timing.total)
+            self.frames += 1
+            self.bytesRead += timing.bytesRead
+            self.pollIterations += timing.pollIterations
+            self.retries += timing.retries
+
+    def durations(self, phase: str) -> np.ndarray:
+        """
+        Returns the durations of a phase (or TOTAL) over the window, oldest first, in seconds.
+        """
+        with self._lock:
+            return np.fromiter(self._durations[phase], dtype=np.float64)
+
+    def percentile(self, phase: str, q: float) -> float:
+        """
+        Returns the q-th percentile of the duration of a phase (or TOTAL) over the window,
+        in seconds, or NaN if the phase has not been timed.
+        """
+        durations = self.durations(phase)
+        if len(durations) == 0:
+            return float("nan")
+        return float(np.percentile(durations, q))
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """
+        Returns, for each phase timed in the window and for TOTAL, the number of samples,
+        the mean and the p50/p95/p99 durations in seconds.
+        """
+        summary: dict[str, dict[str, float]] = {}
+        for phase in PHASES + [TOTAL]:
+            durations = self.durations(phase)
+            if len(durations) == 0:
+                continue
+            summary[phase] = {"count": len(durations), "mean": float(durations.mean())}
+            for q, value in zip(STATISTICS_PERCENTILES, np.percentile(durations, STATISTICS_PERCENTILES)):
+                summary[phase][f"p{q}"] = float(value)
+        return summary
@@ -0,0 +1,257 @@
+from __future__ import annotations
+import json
+import os
+import statistics
+import time
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional, Sequence, Union
+from .timing import FrameTiming, PHASE_TRIGGER, PHASE_READY, PHASE_TRANSFER
+
+if TYPE_CHECKING:
+    from .VitesseAPI import Vitesse
+
+# Calibrated profiles are kept per serial number in this JSON file, unless overridden
+# by the environment variable
+TRANSPORT_CALIBRATION_ENV = "VITESSE_TRANSPORT_CALIBRATION"
+DEFAULT_CALIBRATION_PATH = Path.home() / ".vitesse" / "transport.json"
+
+# Candidates tried by Vitesse.calibrateTransport
+CALIBRATION_TRANSFER_SIZES = [4096, 16384, 65536]
+CALIBRATION_LATENCY_TIMERS = [1, 2, 4, 16]
+# Reads have always been at most 64000 bytes; larger spiRead calls are untested
+CALIBRATION_CHUNK_SIZES = [16384, 32768, 64000]
+CALIBRATION_READ_DELAYS = [500e-6, 250e-6, 100e-6]
+
+
+@dataclass(frozen=True)
+class TransportProfile:
+    """
+    USB transport settings of a Vitesse connection: the FTDI USB transfer sizes, latency
+    timer and timeouts, and the read chunk size and command read delay used by Vitesse.
+    Apply with Vitesse.setTransportProfile.
+
+    Attributes:
+        name (str): Name of the profile, e.g. "low-latency" or "calibrated".
+        inTransferSize (int): USB IN transfer size in bytes, a multiple of 64 up to 65536.
+        outTransferSize (int): USB OUT transfer size in bytes, a multiple of 64 up to 65536.
+        latencyTimer (int): FTDI latency timer in milliseconds (1-255), after which a partly
+            filled buffer is sent to the host.
+        readTimeout (int): FTDI read timeout in milliseconds.
+        writeTimeout (int): FTDI write timeout in milliseconds.
+        maxReadChunk (int): Largest single read of a frame, see Vitesse.MAX_READ_CHUNK.
+        readDelay (float): Seconds between a command and the read of its status, and between
+            ready polls, see Vitesse.READ_DELAY.
+    """
+    name: str
+    inTransferSize: int
+    outTransferSize: int
+    latencyTimer: int
+    readTimeout: int
+    writeTimeout: int
+    maxReadChunk: int
+    readDelay: float
+
+    def __post_init__(self):
+        for size in (self.inTransferSize, self.outTransferSize):
+            if size < 64 or size > 65536 or size % 64 != 0:
+                raise ValueError(
+                    f'USB transfer size must be a multiple of 64 between 64 and 65536, got {size}.')
+        if not 1 <= self.latencyTimer <= 255:
+            raise ValueError(
+                f'Latency timer must be between 1 and 255 ms, got {self.latencyTimer}.')
+        if self.readTimeout < 1 or self.writeTimeout < 1:
+            raise ValueError('Timeouts must be at least 1 ms.')
+        if self.maxReadChunk < 1:
+            raise ValueError('Read chunk must be at least 1 byte.')
+        if self.readDelay < 0:
+            raise ValueError('Read delay cannot be negative.')
+
+    def toDict(self) -> dict[str, Any]:
+        """
+        Returns a JSON-serialisable representation, see fromDict.
+        """
+        return dict(self.__dict__)
+
+    @classmethod
+    def fromDict(cls, values: dict[str, Any]) -> TransportProfile:
+        """
+        Rebuilds a profile from the output of toDict.
+        """
+        return cls(**values)
+
+
+TRANSPORT_LOW_LATENCY = "low-latency"
+TRANSPORT_BULK_THROUGHPUT = "bulk-throughput"
+TRANSPORT_PROFILES = {
+    # Small transfers flushed after 1 ms: fastest command round trips and ready polls
+    TRANSPORT_LOW_LATENCY: TransportProfile(
+        TRANSPORT_LOW_LATENCY, inTransferSize=4096, outTransferSize=4096, latencyTimer=1,
+        readTimeout=1000, writeTimeout=1000, maxReadChunk=64000, readDelay=250e-6),
+    # Full 64 KB USB transfers, for long records and many channels
+    TRANSPORT_BULK_THROUGHPUT: TransportProfile(
+        TRANSPORT_BULK_THROUGHPUT, inTransferSize=65536, outTransferSize=4096, latencyTimer=16,
+        readTimeout=5000, writeTimeout=1000, maxReadChunk=64000, readDelay=500e-6),
+}
+
+
+def calibrationPath(path: Optional[Union[str, Path]] = None) -> Path:
+    """
+    Returns the file holding the calibrated profiles: path if given, else the file named by
+    TRANSPORT_CALIBRATION_ENV, else DEFAULT_CALIBRATION_PATH.
+    """
+    if path is not None:
+        return Path(path)
+    return Path(os.environ.get(TRANSPORT_CALIBRATION_ENV, DEFAULT_CALIBRATION_PATH))
+
+
+def _readCalibrations(path: Path) -> dict[str, Any]:
+    try:
+        calibrations = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+    return calibrations if isinstance(calibrations, dict) else {}
+
+
+def loadTransportProfile(serialNumber: str, path: Optional[Union[str, Path]] = None) -> Optional[TransportProfile]:
+    """
+    Returns the profile saved for a device by saveTransportProfile, or None if there is none
+    or it cannot be read.
+    """
+    values = _readCalibrations(calibrationPath(path)).get(serialNumber)
+    if values is None:
+        return None
+    try:
+        return TransportProfile.fromDict(values)
+    except (TypeError, ValueError):
+        return None
+
+
+def saveTransportProfile(serialNumber: str, profile: TransportProfile,
+                         path: Optional[Union[str, Path]] = None) -> Path:
+    """
+    Saves the profile of a device, keeping those of other devices.
+
+    Returns:
+        Path: The file the profile was saved to.
+    """
+    path = calibrationPath(path)
+    calibrations = _readCalibrations(path)
+    calibrations[serialNumber] = profile.toDict()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Written aside and moved into place, so a crash never leaves a truncated file
+    temporary = path.with_name(path.name + ".tmp")
+    temporary.write_text(json.dumps(calibrations, indent=2))
+    os.replace(temporary, path)
+    return path
+
+
+def _commandRoundTrips(device: Vitesse, command: bytes, numCommands: int) -> list[float]:
+    durations = []
+    for _ in range(numCommands):
+        start = time.perf_counter()
+        device._writeSpiDevice(command, immediate=True)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def _frameReadTime(device: Vitesse, numFrames: int) -> tuple[float, float]:
+    """
+    Returns the median time spent triggering and reading a frame, the device averaging
+    excluded, and the median transfer throughput in bytes per second.
+    """
+    frame = device._newFrameBuffer()
+    device._acquireFrameInto(frame)  # Warm-up, also settles the ready latency estimate
+    readTimes = []
+    throughputs = []
+    for _ in range(numFrames):
+        timing = FrameTiming(0, time.perf_counter())
+        device._acquireFrameInto(frame, timing)
+        readTimes.append(sum(timing.duration(phase) for phase in (PHASE_TRIGGER, PHASE_READY, PHASE_TRANSFER)))
+        throughputs.append(device.totalBytes / max(timing.duration(PHASE_TRANSFER), 1e-9))
+    return statistics.median(readTimes), statistics.median(throughputs)
+
+
+def calibrateTransport(device: Vitesse,
+                       transferSizes: Sequence[int] = CALIBRATION_TRANSFER_SIZES,
+                       latencyTimers: Sequence[int] = CALIBRATION_LATENCY_TIMERS,
+                       chunkSizes: Sequence[int] = CALIBRATION_CHUNK_SIZES,
+                       readDelays: Sequence[float] = CALIBRATION_READ_DELAYS,
+                       numFrames: int = 5,
+                       numCommands: int = 20) -> tuple[TransportProfile, list[dict[str, Any]]]:
+    """
+    Measures the transport of a configured device and returns the best settings, see
+    Vitesse.calibrateTransport. The device is left with the best settings applied. If no
+    combination could be measured, its previous profile is applied again; without one, only
+    READ_DELAY and MAX_READ_CHUNK can be restored.
+    """
+    if device.simulation:
+        raise RuntimeError("The transport of a simulated device cannot be calibrated.")
+    if not device._shadow:
+        raise RuntimeError("Configure the device with setConfig before calibrating the transport.")
+    previous = device.transportProfile
+    base = previous or TRANSPORT_PROFILES[TRANSPORT_LOW_LATENCY]
+    readDelayBefore, maxReadChunkBefore = device.READ_DELAY, device.MAX_READ_CHUNK
+    numAverages = device.numAverages
+
+    best: Optional[TransportProfile] = None
+    measurements: list[dict[str, Any]] = []
+    try:
+        # The transport does not depend on the averaging: keep the device waits short
+        device.setAverages(1)
+        # Resending an acknowledged register command leaves the device unchanged
+        command = next(iter(device._shadow.values()))[0]
+
+        # Shortest delay at which every status byte is read back correctly
+        readDelay = max(readDelays)
+        for candidate in sorted(readDelays, reverse=True):
+            device.READ_DELAY = candidate
+            try:
+                _commandRoundTrips(device, command, numCommands)
+            except (ValueError, RuntimeError, OSError):
+                device._clearBuffer()
+                break
+            readDelay = candidate
+        device.READ_DELAY = readDelay
+
+        bestTime = float("inf")
+        for latencyTimer in latencyTimers:
+            for transferSize in transferSizes:
+                for chunkSize in chunkSizes:
+                    profile = replace(base, name="calibrated", inTransferSize=transferSize, latencyTimer=latencyTimer,
+                                      maxReadChunk=chunkSize, readDelay=readDelay)
+                    measurement: dict[str, Any] = {"latencyTimer": latencyTimer, "inTransferSize": transferSize,
+                                                   "maxReadChunk": chunkSize, "readDelay": readDelay}
+                    measurements.append(measurement)
+                    try:
+                        device.setTransportProfile(profile)
+                        roundTrip = statistics.median(_commandRoundTrips(device, command, numCommands))
+                        readTime, throughput = _frameReadTime(device, numFrames)
+                    except (ValueError, RuntimeError, OSError) as error:
+                        # A combination the link cannot sustain is skipped, not fatal
+                        measurement["error"] = repr(error)
+                        device._clearBuffer()
+                        continue
+                    measurement.update(roundTrip=roundTrip, frameReadTime=readTime, throughput=throughput)
+                    if readTime < bestTime:
+                        best, bestTime = profile, readTime
+    finally:
+        if best is not None:
+            device.setTransportProfile(best)
+        else:
+            if previous is not None:
+                device.setTransportProfile(previous)
+            # Without a profile the driver defaults were in use, which cannot be read back
+            device.transportProfile = previous
+            device.READ_DELAY, device.MAX_READ_CHUNK = readDelayBefore, maxReadChunkBefore
+        device.setAverages(numAverages)
+
+    if best is None:
+        if previous is not None:
+            raise RuntimeError(
+                "No transport settings could be measured, the previous settings were restored.")
+        raise RuntimeError(
+            "No transport settings could be measured. READ_DELAY and MAX_READ_CHUNK were restored, but the "
+            "FTDI transfer sizes, latency timer and timeouts of the last combination tried are still applied, "
+            "as the driver defaults cannot be read back. Apply a transport profile, or initialise the device again.")
+    return best, measurements
@@ -3,7 +3,9 @@ import numpy as np
 import math
 from tabulate import tabulate
 import struct
-from typing import TYPE_CHECKING
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
 
 if TYPE_CHECKING:
     from VitesseAPI import Vitesse
@@ -48,6 +50,73 @@ def ext_temp(np_list: np.ndarray) -> float:
     return temp
 
 
+def ext_temp_array(raw16: np.ndarray) -> np.ndarray:
+    """
+    Vectorised counterpart of ext_temp, taking the big-endian 16-bit words
+    (byte2 << 8 | byte3) of any number of readings.
+    """
+    # Reconstruct 15-bit RTD ADC code
+    data = np.asarray(raw16).astype(np.int64) >> 1
+
+    # Convert ADC code to resistance
+    ratio = data / 32768.0
+    RREF = 3900  # ohms
+    resistance = RREF * ratio
+
+    # Callendar-Van Dusen inverse formula
+    iCVD_A = 3.9083e-3
+    iCVD_B = -5.775e-7
+    PT100_NOMINAL = 100.0  # ohms
+
+    Z1 = -iCVD_A
+    Z2 = iCVD_A ** 2 - (4 * iCVD_B)
+    Z3 = (4 * iCVD_B) / PT100_NOMINAL
+    Z4 = 2 * iCVD_B
+    temp = Z2 + (Z3 * resistance)
+    valid = temp >= 0
+    # Out of range readings give 0, as in ext_temp
+    return np.where(valid, (np.sqrt(np.where(valid, temp, 0)) + Z1) / Z4, 0.0)
+
+
+def int_temp_array(raw16: np.ndarray) -> np.ndarray:
+    """
+    Vectorised counterpart of int_temp, taking the big-endian 16-bit words
+    (MSB << 8 | LSB) of any number of readings.
+    """
+    # Extract the top 12 bits (MSB-justified)
+    temp_code = np.asarray(raw16).astype(np.int64) >> 4
+
+    # Convert to °C using internal FPGA formula
+    return (temp_code * 503.975 / 4096.0) - 273.15
+
+
+def decode_peripherals(trailers: np.ndarray, rawDtype: np.dtype, recordDtype: np.dtype,
+                       converters: list) -> np.ndarray:
+    """
+    Decodes the peripheral trailer of one or more frames in a single pass.
+
+    Parameters:
+    -----------
+    trailers : np.ndarray of dtype np.uint8 and shape (..., rawDtype.itemsize)
+        The trailer bytes following the channel data of each frame.
+    rawDtype : np.dtype
+        Structured dtype locating each enabled peripheral in the trailer.
+    recordDtype : np.dtype
+        Structured dtype of the decoded record, with the same field names.
+    converters : list
+        For each field, a vectorised converter (e.g. int_temp_array), or None to cast as is.
+
+    Returns:
+    --------
+    np.ndarray of dtype recordDtype and shape trailers.shape[:-1]
+    """
+    raw = np.ascontiguousarray(trailers).view(rawDtype)[..., 0]
+    records = np.empty(raw.shape, dtype=recordDtype)
+    for name, converter in zip(recordDtype.names or (), converters):
+        records[name] = raw[name] if converter is None else converter(raw[name])
+    return records
+
+
 def int_temp(np_list: np.ndarray) -> float:
     """
     Convert two-byte FPGA/XADC output (from internal temperature register)
@@ -169,6 +238,244 @@ def float16_to_decimal(bin_str: str) -> float:
     return value
 
 
+def _float_array_to_decimal(bytes_array: np.ndarray, fractionBits: int,
+                            out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Shared implementation of the vectorised Float24/Float16 decoders.
+
+    The last axis of bytes_array holds the big-endian bytes of one sample. The
+    sample is assembled as an unsigned integer code and split into its sign,
+    exponent (bias 63) and mantissa fields, so the whole frame is decoded in a
+    handful of array operations instead of one string per sample.
+    """
+    bytes_array = np.asarray(bytes_array, dtype=np.uint8)
+    # Codes are at most 24 bits wide
+    codes = np.zeros(bytes_array.shape[:-1], dtype=np.int32)
+    for i in range(bytes_array.shape[-1]):
+        codes <<= 8
+        codes |= bytes_array[..., i]
+
+    sign_bit = codes >> (fractionBits + 7)
+    exponent_bits = (codes >> fractionBits) & 0x7F
+    fraction_bits = codes & ((1 << fractionBits) - 1)
+
+    bias = 63
+    normal = exponent_bits != 0
+    # Subnormal numbers have no implicit leading one and use exponent 1 - bias
+    mantissa = (fraction_bits | (normal.astype(np.int32) << fractionBits)).astype(np.float64)
+    exponent = np.where(normal, exponent_bits, 1) - bias - fractionBits
+
+    value = np.ldexp(mantissa, exponent, out=out)
+    np.negative(value, out=value, where=sign_bit.astype(bool))
+    return value
+
+
+def float24_array_to_decimal(bytes_array: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Vectorised counterpart of float24_to_decimal.
+
+    Input: bytes_array — uint8 array whose last axis holds the 3 bytes of a
+    Float24 sample, MSB first (e.g. shape (channels, points, 3)).
+           out — optional float64 array receiving the result.
+
+    Returns:
+        float64 array with the last axis removed, bit-exact with float24_to_decimal.
+    """
+    if np.shape(bytes_array)[-1] != 3:
+        raise ValueError("Last axis must contain exactly three bytes.")
+    return _float_array_to_decimal(bytes_array, 16, out)
+
+
+def float16_array_to_decimal(bytes_array: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Vectorised counterpart of float16_to_decimal.
+
+    Input: bytes_array — uint8 array whose last axis holds the 2 bytes of a
+    Float16 sample, MSB first (e.g. shape (channels, points, 2)).
+           out — optional float64 array receiving the result.
+
+    Returns:
+        float64 array with the last axis removed, bit-exact with float16_to_decimal.
+    """
+    if np.shape(bytes_array)[-1] != 2:
+        raise ValueError("Last axis must contain exactly two bytes.")
+    return _float_array_to_decimal(bytes_array, 8, out)
+
+
+def _decimal_to_float_array(values: np.ndarray, fractionBits: int, numBytes: int) -> np.ndarray:
+    """
+    Shared implementation of the Float24/Float16 encoders, the inverse of
+    _float_array_to_decimal. Values are rounded to the nearest representable
+    number and saturate at the largest one.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    magnitude = np.abs(values)
+    bias = 63
+    mantissa, exponent = np.frexp(magnitude)  # magnitude = mantissa * 2**exponent, 0.5 <= mantissa < 1
+    biased = exponent.astype(np.int64) - 1 + bias
+    normal = biased > 0
+    # Adding rather than OR-ing the fraction lets a mantissa rounded up to 2 carry into the exponent
+    fraction = np.where(normal,
+                        np.rint(mantissa * 2.0 ** (fractionBits + 1)) - 2 ** fractionBits,
+                        np.rint(magnitude * 2.0 ** (bias - 1 + fractionBits))).astype(np.int64)
+    codes = (np.where(normal, biased, 0) << fractionBits) + fraction
+    codes = np.minimum(codes, (1 << (fractionBits + 7)) - 1)
+    codes = np.where(magnitude == 0, 0, codes)
+    codes |= np.signbit(values).astype(np.int64) << (fractionBits + 7)
+
+    shifts = 8 * np.arange(numBytes - 1, -1, -1)
+    return ((codes[..., None] >> shifts) & 0xFF).astype(np.uint8)
+
+
+def float24_array_from_decimal(values: np.ndarray) -> np.ndarray:
+    """
+    Inverse of float24_array_to_decimal.
+
+    Input: values — array of numbers of any shape.
+
+    Returns:
+        uint8 array with a trailing axis of 3 bytes, MSB first.
+    """
+    return _decimal_to_float_array(values, 16, 3)
+
+
+def float16_array_from_decimal(values: np.ndarray) -> np.ndarray:
+    """
+    Inverse of float16_array_to_decimal.
+
+    Input: values — array of numbers of any shape.
+
+    Returns:
+        uint8 array with a trailing axis of 2 bytes, MSB first.
+    """
+    return _decimal_to_float_array(values, 8, 2)
+
+
+# Reference A-scans of the simulation mode, cycled through in this order
+SIMULATOR_ASCANS = ["sample_ascan_6.25mm.npy", "sample_ascan_12.5mm.npy",
+                    "sample_ascan_18.75mm.npy", "sample_ascan_25mm.npy"]
+
+
+@lru_cache(maxsize=None)
+def load_simulator_ascans() -> tuple[np.ndarray, ...]:
+    """
+    Returns the reference A-scans of the simulator as read-only memory maps, opened
+    once per process and shared by all simulated devices.
+    """
+    sim_dir = Path(__file__).resolve().parent / "simulator"
+    return tuple(np.load(sim_dir / name, mmap_mode="r") for name in SIMULATOR_ASCANS)
+
+
+def channel_signs(max_channels: int, enabled_channels: list[int]) -> np.ndarray:
+    """
+    Input: max_channels — number of channels of the device.
+           enabled_channels — IDs of the enabled receive channels, in frame order.
+
+    Returns:
+        float64 array of +1/-1 per enabled channel, -1 where the channel is inverted.
+    """
+    if max_channels <= 4:
+        inversion_array = [0, 3]
+    else:
+        inversion_array = [0, 1, 6, 7]
+
+    # Conditional inversion for specific channel IDs
+    inverted = np.isin(enabled_channels, inversion_array)
+    return np.where(inverted, -1.0, 1.0)
+
+
+def check_output_dtype(dtype) -> np.dtype:
+    """
+    Returns dtype as a np.dtype, raising ValueError unless it is a floating point type.
+    """
+    dtype = np.dtype(dtype)
+    if not np.issubdtype(dtype, np.floating):
+        raise ValueError(
+            f"Echo signal dtype must be a floating point type, got {dtype}. Use raw=True for integer codes.")
+    return dtype
+
+
+# Samples decode_echo_signal decodes at a time, so that a block and its temporaries stay in cache
+DECODE_BLOCK_SAMPLES = 16384
+
+
+def decode_echo_signal(bytes_array: np.ndarray, num_averages: int, signs: np.ndarray, out: np.ndarray,
+                       scratch: Optional[np.ndarray] = None, raw: bool = False) -> np.ndarray:
+    """
+    Decodes the samples of a frame into the echo signal returned by getArray.
+
+    The frame is processed in blocks of up to DECODE_BLOCK_SAMPLES samples: each block is
+    assembled, decoded and scaled while it is in cache, then written to out once, so the
+    frame makes a single pass through memory. The averaging and the channel inversion are
+    folded into one divisor per channel, num_averages * sign, and the offset into 2048 * sign.
+    This gives the same values as dividing, subtracting 2048 and inverting one after the other,
+    except that a zero sample on an inverted channel comes out as 0.0 rather than -0.0.
+
+    Input: bytes_array — uint8 array of shape (channels, points, messageBytes).
+           num_averages — number of accumulated pulses per sample.
+           signs — channel_signs of the enabled channels.
+           out — array of shape (channels, points) receiving the echo signal; int32 if raw.
+           scratch — optional float64 buffer of at least DECODE_BLOCK_SAMPLES elements,
+           reused between calls.
+           raw — keep the undivided accumulator codes, without offset or inversion.
+
+    Returns:
+        out.
+    """
+    if scratch is None or scratch.size < DECODE_BLOCK_SAMPLES or scratch.dtype != np.float64:
+        scratch = np.empty(DECODE_BLOCK_SAMPLES, dtype=np.float64)
+    decode = float16_array_to_decimal if bytes_array.shape[-1] == 2 else float24_array_to_decimal
+    channels, points = out.shape
+    columns = max(1, min(points, DECODE_BLOCK_SAMPLES))
+    rows = max(1, DECODE_BLOCK_SAMPLES // columns)
+    divisors = (num_averages * signs)[:, None]
+    offsets = (2048 * signs)[:, None]
+    limits = np.iinfo(np.int32)
+
+    for row in range(0, channels, rows):
+        rowEnd = min(row + rows, channels)
+        for column in range(0, points, columns):
+            columnEnd = min(column + columns, points)
+            samples = scratch[:(rowEnd - row) * (columnEnd - column)].reshape(rowEnd - row, columnEnd - column)
+            decode(bytes_array[row:rowEnd, column:columnEnd], out=samples)
+            if raw:
+                # Saturate rather than wrap codes that do not fit in int32
+                np.clip(samples, limits.min, limits.max, out=samples)
+                np.copyto(out[row:rowEnd, column:columnEnd], samples, casting='unsafe')
+            else:
+                np.divide(samples, divisors[row:rowEnd], out=samples)
+                np.subtract(samples, offsets[row:rowEnd], out=out[row:rowEnd, column:columnEnd],
+                            casting='same_kind')
+    return out
+
+
+# Value the marker bytes around the channel blocks and before the trailer are assumed to have.
+# Only the ready sentinel (the first start marker) is known to be 100: decoding has always
+# skipped the other markers without reading them, so this is unconfirmed against the firmware
+FRAME_MARKER = 100
+
+
+def frame_markers_valid(frame: np.ndarray, num_channels: int, channel_bytes: int) -> bool:
+    """
+    Input: frame — uint8 raw frame, the bytes read after the ready sentinel.
+           num_channels — number of channel blocks in the frame.
+           channel_bytes — bytes per channel block, markers included.
+
+    Returns:
+        True if every channel end and start marker, and the trailer marker, is FRAME_MARKER.
+        The first start marker is the ready sentinel, which is not part of the frame.
+        Frames of firmware that uses other marker values never pass, see FRAME_MARKER.
+    """
+    if num_channels < 1 or len(frame) < num_channels * channel_bytes:
+        return False
+    # Row k holds the end marker of channel k and the start marker that follows it: that of
+    # channel k + 1, or of the trailer for the last channel
+    markers = np.lib.stride_tricks.as_strided(
+        frame[channel_bytes - 2:], shape=(num_channels, 2),
+        strides=(channel_bytes * frame.strides[0], frame.strides[0]), writeable=False)
+    return bool((markers == FRAME_MARKER).all())
+
+
 def decode_version_old(version_u16: int) -> list[int]:
     # Split into 4 nibbles (4 bits each)
     n1 = (version_u16 >> 12) & 0xF
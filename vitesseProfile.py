@@ -0,0 +1,180 @@
+from __future__ import annotations
+import json
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Union
+import numpy as np
+from . import sonoboticsFTDI as sbftdi
+from .layout import FrameLayout
+
+if TYPE_CHECKING:
+    from .VitesseAPI import Vitesse
+
+# Vitesse attributes that setConfig derives from its parameters, restored by Vitesse.apply
+PROFILE_ATTRIBUTES = ["numChips", "pulseFrequency", "opFrequency", "samplingMode", "peripheralsOnArray",
+                      "numChannelsOnReceive", "enabledChannelReceive", "numChannelsOnDrive", "enabledChannelDrive",
+                      "numPeripheralsOn", "numPeripheralsOnArray", "adcFrequency", "numAverages", "prf",
+                      "recordLength", "recordPoints", "phaseArrayMicro", "delayArrayMicro", "encoderWheelbase",
+                      "wheelRadius", "encoderCpr", "messageBytes", "additionalBytes", "totalDataBytes", "totalBytes"]
+
+
+def _freeze(value: Any) -> Any:
+    """
+    Converts lists and NumPy scalars into hashable, JSON-friendly Python values.
+    """
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return tuple(_freeze(x) for x in value)
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    if isinstance(value, (list, tuple)):
+        return [_thaw(x) for x in value]
+    return value
+
+
+class _ProfileRecorder(sbftdi.ftdiChannel):
+    """
+    Channel standing in for the device while a profile is compiled. Every command is
+    acknowledged, and the frequency query answers with the clock last selected.
+    """
+
+    def __init__(self, adcFrequency: int):
+        super().__init__()
+        self.adcFrequency = adcFrequency
+        self._replies = bytearray()
+
+    def write(self, data: Union[bytes, bytearray]) -> None:
+        for i in range(0, len(data), 5):
+            command = bytes(data[i:i + 5])
+            self._replies.append(50)
+            if command[:1] == b'c':
+                # Clock control: 100, 50 or 25 MHz from the most significant bit down
+                self.adcFrequency = {0x80: int(100e6), 0x40: int(50e6),
+                                     0x20: int(25e6)}.get(command[1], self.adcFrequency)
+            elif command[:1] == b's':
+                frequency = self.adcFrequency // 1000000
+                self._replies.append(frequency)
+
+    def read(self, numBytes: int) -> bytearray:
+        replies = self._replies[:numBytes]
+        del self._replies[:numBytes]
+        return replies
+
+
+@dataclass(frozen=True)
+class VitesseProfile:
+    """
+    A validated Vitesse configuration compiled into the commands that set each device
+    register, together with the attributes and frame layout it results in.
+
+    Profiles are immutable, hashable and serialisable, so they can be built ahead of time,
+    cached and applied with Vitesse.apply. They are compiled for a firmware version and a
+    maximum number of channels, and can only be applied to matching devices.
+    """
+    config: tuple[tuple[str, Any], ...]
+    version: int
+    maxChannels: int
+    registers: tuple[tuple[str, tuple[bytes, ...]], ...]
+    attributes: tuple[tuple[str, Any], ...]
+    layout: FrameLayout
+
+    @classmethod
+    def compile(cls, device: Vitesse, **config: Any) -> VitesseProfile:
+        """
+        Validates a configuration and compiles it for the firmware of the given device,
+        without communicating with it.
+
+        Args:
+            device (Vitesse): Provides the firmware version, maximum number of channels and clock.
+            **config: Any parameter of Vitesse.setConfig except clearEncoders.
+
+        Returns:
+            VitesseProfile: The compiled profile.
+
+        Raises:
+            ValueError: If the configuration is invalid.
+        """
+        scratch = type(device)()
+        scratch.version = device.version
+        scratch.version_array = list(device.version_array)
+        scratch.maxChannels = device.maxChannels
+        scratch.adcFrequency = device.adcFrequency
+        scratch.isSHM = device.isSHM
+        scratch.READ_DELAY = 0
+        scratch.spiDevice = _ProfileRecorder(device.adcFrequency)
+        scratch.setConfig(clearEncoders=False, **config)
+
+        return cls(
+            config=tuple(sorted((key, _freeze(value))
+                         for key, value in config.items())),
+            version=int(device.version),
+            maxChannels=int(device.maxChannels),
+            registers=tuple(scratch._shadow.items()),
+            attributes=tuple((name, _freeze(getattr(scratch, name)))
+                             for name in PROFILE_ATTRIBUTES if hasattr(scratch, name)),
+            layout=FrameLayout.fromDevice(scratch),
+        )
+
+    @property
+    def blob(self) -> bytes:
+        """
+        All the commands of the profile, as sent to the device when nothing is cached.
+        """
+        return b''.join(command for _, commands in self.registers for command in commands)
+
+    def checkCompatible(self, device: Vitesse) -> None:
+        """
+        Raises:
+            ValueError: If the profile was compiled for a different firmware or channel count.
+        """
+        if device.version != self.version or device.maxChannels != self.maxChannels:
+            raise ValueError(
+                f"Profile compiled for firmware {self.version} with {self.maxChannels} channels, "
+                f"device has firmware {device.version} with {device.maxChannels} channels.")
+
+    def restoreAttributes(self, device: Vitesse) -> None:
+        """
+        Sets the attributes setConfig would have derived on the given device.
+        """
+        for name, value in self.attributes:
+            setattr(device, name, _thaw(value))
+
+    def toDict(self) -> dict[str, Any]:
+        """
+        Returns a JSON-serialisable representation, see fromDict.
+        """
+        return {
+            "config": {key: _thaw(value) for key, value in self.config},
+            "version": self.version,
+            "maxChannels": self.maxChannels,
+            "registers": [[register, [command.hex() for command in commands]]
+                          for register, commands in self.registers],
+            "attributes": {name: _thaw(value) for name, value in self.attributes},
+            "layout": self.layout.toDict(),
+        }
+
+    @classmethod
+    def fromDict(cls, values: dict[str, Any]) -> VitesseProfile:
+        """
+        Rebuilds a profile from the output of toDict.
+        """
+        return cls(
+            config=tuple(sorted((key, _freeze(value))
+                         for key, value in values["config"].items())),
+            version=int(values["version"]),
+            maxChannels=int(values["maxChannels"]),
+            registers=tuple((register, tuple(bytes.fromhex(command) for command in commands))
+                            for register, commands in values["registers"]),
+            attributes=tuple((name, _freeze(value))
+                             for name, value in values["attributes"].items()),
+            layout=FrameLayout.fromDict(values["layout"]),
+        )
+
+    def toJson(self) -> str:
+        return json.dumps(self.toDict())
+
+    @classmethod
+    def fromJson(cls, text: str) -> VitesseProfile:
+        return cls.fromDict(json.loads(text))